@@ -1,6 +1,6 @@
 import os
 from typing import Optional, List
-from fastapi import FastAPI, APIRouter, HTTPException, Depends
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Request
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.docs import get_swagger_ui_html
@@ -18,8 +18,25 @@ from src.routes import (
 )
 from src.routes.order_routes import router as order_router
 from src.routes.auth_routes import router as auth_router
-from src.routes.admin_routes import router as admin_router
+from src.routes.admin_routes import router as admin_router, require_admin
+from src.routes.reservation_routes import router as reservation_router
+from src.database.indexes import ensure_indexes
+from src.services.reservation_service import ReservationService, run_reservation_sweeper
+from src.services.order_intake_service import OrderIntakeWorkerPool
+from src.services.order_event_service import OrderEventDispatcher
+from src.services.flash_sale_service import FlashSaleService, run_flash_sale_sync
+from src.utils.metrics import metrics
+from src.utils.log import setup_logging, shutdown_logging, request_id_var
+from src.utils.revocation import run_revocation_sync
+from src.utils.auth import require_scope
+from src.utils.signing_keys import signing_keys, uses_signing_keys
 from src.config import settings
+from uuid import uuid4
+import asyncio
+import logging
+
+setup_logging()
+logger = logging.getLogger(__name__)
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -45,23 +62,98 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Tag every request with an ID that is logged with it and echoed back
+@app.middleware("http")
+async def request_id_middleware(request: Request, call_next):
+    request_id = request.headers.get("X-Request-ID") or uuid4().hex
+    token = request_id_var.set(request_id)
+    try:
+        response = await call_next(request)
+    finally:
+        request_id_var.reset(token)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
 # Initialize Database Connection
 @app.on_event("startup")
 async def startup_db_client():
     try:
         Database.get_instance()
-        print("Database connection initialized")
-    except Exception as e:
-        print(f"Failed to initialize database connection: {e}")
+        logger.info("Database connection initialized")
+    except Exception:
+        logger.exception("Failed to initialize database connection")
         raise
+    
+    try:
+        await ensure_indexes()
+        logger.info("Database indexes ensured")
+    except Exception:
+        logger.exception("Failed to ensure database indexes")
+    
+    # Fail fast on a missing or unreadable signing key
+    if uses_signing_keys():
+        signing_keys.jwks()
+    
+    # Preload admission tokens for items in a flash sale
+    try:
+        loaded = await FlashSaleService(Database.get_instance()).load()
+        if loaded:
+            logger.info("Loaded flash-sale items", extra={"count": loaded})
+    except Exception:
+        logger.exception("Failed to load flash-sale items")
+    
+    # Release expired stock reservations in the background
+    app.state.reservation_sweeper = asyncio.create_task(
+        run_reservation_sweeper(ReservationService(Database.get_instance()))
+    )
+    
+    # Keep flash-sale tokens in line with stock changed by other processes
+    app.state.flash_sale_sync = asyncio.create_task(
+        run_flash_sale_sync(FlashSaleService(Database.get_instance()))
+    )
+    
+    # Mirror revoked tokens in memory so authentication needs no database read for them
+    app.state.revocation_sync = asyncio.create_task(run_revocation_sync(Database.get_instance()))
+    
+    # Drain queued order requests when intake mode is on
+    if settings.ORDER_INTAKE_ENABLED:
+        app.state.order_intake_workers = OrderIntakeWorkerPool(Database.get_instance())
+        app.state.order_intake_workers.start()
+    
+    # Deliver order events to in-process subscribers
+    if settings.ORDER_EVENTS_DISPATCHER_ENABLED:
+        app.state.order_event_dispatcher = OrderEventDispatcher(Database.get_instance())
+        app.state.order_event_dispatcher.start()
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    sweeper = getattr(app.state, "reservation_sweeper", None)
+    if sweeper is not None:
+        sweeper.cancel()
+    
+    flash_sale_sync = getattr(app.state, "flash_sale_sync", None)
+    if flash_sale_sync is not None:
+        flash_sale_sync.cancel()
+    
+    revocation_sync = getattr(app.state, "revocation_sync", None)
+    if revocation_sync is not None:
+        revocation_sync.cancel()
+    
+    intake_workers = getattr(app.state, "order_intake_workers", None)
+    if intake_workers is not None:
+        await intake_workers.stop()
+    
+    event_dispatcher = getattr(app.state, "order_event_dispatcher", None)
+    if event_dispatcher is not None:
+        await event_dispatcher.stop()
+    
     try:
         Database.close_connection()
-        print("Database connection closed")
-    except Exception as e:
-        print(f"Error closing database connection: {e}")
+        logger.info("Database connection closed")
+    except Exception:
+        logger.exception("Error closing database connection")
+    
+    shutdown_logging()
 
 # Custom OpenAPI to improve Swagger UI documentation
 def custom_openapi():
@@ -82,11 +174,17 @@ def custom_openapi():
             "scheme": "bearer",
             "bearerFormat": "JWT",
             "description": "Enter JWT token in format: Bearer [token]"
+        },
+        "API Key": {
+            "type": "apiKey",
+            "in": "header",
+            "name": "X-API-Key",
+            "description": "API key of a service client (order and admin routes)"
         }
     }
     
     # Add global security requirement
-    openapi_schema["security"] = [{"Bearer Auth": []}]
+    openapi_schema["security"] = [{"Bearer Auth": []}, {"API Key": []}]
     
     app.openapi_schema = openapi_schema
     return app.openapi_schema
@@ -103,6 +201,7 @@ app.include_router(gpu_router, prefix=api_prefix)
 app.include_router(case_router, prefix=api_prefix)
 app.include_router(psu_router, prefix=api_prefix)
 app.include_router(order_router, prefix=api_prefix)
+app.include_router(reservation_router, prefix=api_prefix)
 app.include_router(auth_router, prefix=api_prefix)
 app.include_router(admin_router, prefix=api_prefix)
 
@@ -151,6 +250,26 @@ async def health_check():
             "error": str(e)
         }
 
+# Public keys for verifying access tokens without calling this service
+@app.get("/.well-known/jwks.json", include_in_schema=False)
+async def get_jwks():
+    """
+    JSON Web Key Set of the token signing keys (empty with HS256)
+    """
+    jwks = signing_keys.jwks() if uses_signing_keys() else {"keys": []}
+    return JSONResponse(
+        content=jwks,
+        headers={"Cache-Control": f"public, max-age={settings.JWT_JWKS_MAX_AGE_SECONDS}"}
+    )
+
+# Metrics endpoint, for admins like the /admin routes
+@app.get("/metrics", dependencies=[Depends(require_scope("admin")), Depends(require_admin)])
+async def get_metrics():
+    """
+    Process-local counters (transaction retries, cache hit ratios, ...)
+    """
+    return metrics.snapshot()
+
 if __name__ == "__main__":
     import uvicorn
     
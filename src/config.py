@@ -18,8 +18,114 @@ class Settings(BaseSettings):
     
     # JWT Settings
     JWT_SECRET_KEY: str = os.getenv("JWT_SECRET_KEY", "secret_key_for_development_only")
-    JWT_ALGORITHM: str = os.getenv("JWT_ALGORITHM", "HS256")
+    JWT_ALGORITHM: str = os.getenv("JWT_ALGORITHM", "HS256")  # HS256, or RS256/ES256 with JWT_KEYS_DIR
+    JWT_KEYS_DIR: str = os.getenv("JWT_KEYS_DIR", "keys/jwt")
+    JWT_ACTIVE_KID: str = os.getenv("JWT_ACTIVE_KID", "")
+    JWT_KEYS_RELOAD_SECONDS: int = int(os.getenv("JWT_KEYS_RELOAD_SECONDS", "60"))
+    JWT_JWKS_MAX_AGE_SECONDS: int = int(os.getenv("JWT_JWKS_MAX_AGE_SECONDS", "300"))
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
+    AUTH_TOKEN_CACHE_SIZE: int = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000"))
+    AUTH_USER_CACHE_SIZE: int = int(os.getenv("AUTH_USER_CACHE_SIZE", "10000"))
+    AUTH_CACHE_TTL_SECONDS: int = int(os.getenv("AUTH_CACHE_TTL_SECONDS", "60"))
+    AUTH_TRUST_TOKEN_CLAIMS: bool = os.getenv("AUTH_TRUST_TOKEN_CLAIMS", "False").lower() in ("true", "1", "t")
+    REFRESH_TOKEN_EXPIRE_DAYS: int = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "14"))
+    REVOCATION_SYNC_INTERVAL_SECONDS: float = float(os.getenv("REVOCATION_SYNC_INTERVAL_SECONDS", "5"))
+    
+    # Stock Reservation Settings
+    RESERVATION_TTL_SECONDS: int = int(os.getenv("RESERVATION_TTL_SECONDS", "900"))
+    RESERVATION_SWEEP_INTERVAL_SECONDS: int = int(os.getenv("RESERVATION_SWEEP_INTERVAL_SECONDS", "30"))
+    RESERVATION_PURGE_AFTER_SECONDS: int = int(os.getenv("RESERVATION_PURGE_AFTER_SECONDS", "86400"))
+    
+    # Idempotency Settings
+    IDEMPOTENCY_TTL_SECONDS: int = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+    IDEMPOTENCY_CACHE_SIZE: int = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000"))
+    IDEMPOTENCY_WAIT_SECONDS: int = int(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "30"))
+    # A request that holds a key longer than this is presumed dead and its key can be taken over
+    IDEMPOTENCY_LEASE_SECONDS: int = int(os.getenv("IDEMPOTENCY_LEASE_SECONDS", "60"))
+    
+    # Transaction Retry Settings
+    TRANSACTION_MAX_ATTEMPTS: int = int(os.getenv("TRANSACTION_MAX_ATTEMPTS", "5"))
+    TRANSACTION_MAX_COMMIT_ATTEMPTS: int = int(os.getenv("TRANSACTION_MAX_COMMIT_ATTEMPTS", "3"))
+    TRANSACTION_BACKOFF_BASE_MS: int = int(os.getenv("TRANSACTION_BACKOFF_BASE_MS", "10"))
+    TRANSACTION_BACKOFF_MAX_MS: int = int(os.getenv("TRANSACTION_BACKOFF_MAX_MS", "500"))
+    # Attempts at inserting an order before giving up on order ID collisions
+    ORDER_ID_MAX_ATTEMPTS: int = int(os.getenv("ORDER_ID_MAX_ATTEMPTS", "5"))
+    
+    # Order Intake Queue Settings
+    ORDER_INTAKE_ENABLED: bool = os.getenv("ORDER_INTAKE_ENABLED", "False").lower() in ("true", "1", "t")
+    ORDER_INTAKE_WORKERS: int = int(os.getenv("ORDER_INTAKE_WORKERS", "4"))
+    ORDER_INTAKE_MAX_PENDING: int = int(os.getenv("ORDER_INTAKE_MAX_PENDING", "10000"))
+    ORDER_INTAKE_MAX_ATTEMPTS: int = int(os.getenv("ORDER_INTAKE_MAX_ATTEMPTS", "3"))
+    ORDER_INTAKE_LEASE_SECONDS: int = int(os.getenv("ORDER_INTAKE_LEASE_SECONDS", "60"))
+    ORDER_INTAKE_RETRY_DELAY_SECONDS: int = int(os.getenv("ORDER_INTAKE_RETRY_DELAY_SECONDS", "1"))
+    ORDER_INTAKE_POLL_INTERVAL_SECONDS: float = float(os.getenv("ORDER_INTAKE_POLL_INTERVAL_SECONDS", "0.2"))
+    
+    # Order History Settings
+    ORDER_HISTORY_MAX_PAGE_SIZE: int = int(os.getenv("ORDER_HISTORY_MAX_PAGE_SIZE", "100"))
+    ORDER_HISTORY_COUNT_CAP: int = int(os.getenv("ORDER_HISTORY_COUNT_CAP", "1000"))
+    
+    # Order Event Settings
+    ORDER_EVENTS_BATCH_SIZE: int = int(os.getenv("ORDER_EVENTS_BATCH_SIZE", "100"))
+    ORDER_EVENTS_POLL_INTERVAL_SECONDS: float = float(os.getenv("ORDER_EVENTS_POLL_INTERVAL_SECONDS", "1.0"))
+    ORDER_EVENTS_RETENTION_DAYS: int = int(os.getenv("ORDER_EVENTS_RETENTION_DAYS", "30"))
+    ORDER_EVENTS_DISPATCHER_ENABLED: bool = os.getenv("ORDER_EVENTS_DISPATCHER_ENABLED", "False").lower() in ("true", "1", "t")
+    
+    # Catalog Price Settings
+    CATALOG_PRICE_CACHE_SIZE: int = int(os.getenv("CATALOG_PRICE_CACHE_SIZE", "10000"))
+    CATALOG_PRICE_CACHE_TTL_SECONDS: int = int(os.getenv("CATALOG_PRICE_CACHE_TTL_SECONDS", "60"))
+    
+    # Sharded Stock Settings
+    STOCK_SHARDS_DEFAULT: int = int(os.getenv("STOCK_SHARDS_DEFAULT", "8"))
+    STOCK_SHARDS_MAX: int = int(os.getenv("STOCK_SHARDS_MAX", "64"))
+    
+    # Flash Sale Settings
+    # How often every process re-reads flash-sale items and their stock
+    FLASH_SALE_SYNC_INTERVAL_SECONDS: int = int(os.getenv("FLASH_SALE_SYNC_INTERVAL_SECONDS", "5"))
+    
+    # Order Cache Settings
+    ORDER_CACHE_SIZE: int = int(os.getenv("ORDER_CACHE_SIZE", "10000"))
+    ORDER_HISTORY_CACHE_USERS: int = int(os.getenv("ORDER_HISTORY_CACHE_USERS", "2000"))
+    ORDER_CACHE_TTL_SECONDS: int = int(os.getenv("ORDER_CACHE_TTL_SECONDS", "30"))
+    
+    # Logging Settings
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_LEVELS: str = os.getenv("LOG_LEVELS", "")  # per module, e.g. "src.utils.auth=DEBUG,pymongo=WARNING"
+    LOG_DEBUG_SAMPLE_RATE: float = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "1.0"))
+    LOG_QUEUE_SIZE: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    
+    # Password Hashing Settings
+    PASSWORD_SCRYPT_N: int = int(os.getenv("PASSWORD_SCRYPT_N", "16384"))
+    PASSWORD_SCRYPT_R: int = int(os.getenv("PASSWORD_SCRYPT_R", "8"))
+    PASSWORD_SCRYPT_P: int = int(os.getenv("PASSWORD_SCRYPT_P", "1"))
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+    PASSWORD_HASH_CONCURRENCY: int = int(os.getenv("PASSWORD_HASH_CONCURRENCY", "8"))
+    PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS: float = float(os.getenv("PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS", "2.0"))
+    
+    # Rate Limit Settings
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "True").lower() in ("true", "1", "t")
+    RATE_LIMIT_BACKEND: str = os.getenv("RATE_LIMIT_BACKEND", "memory")  # memory or mongo
+    # route.key=requests/seconds, keys are ip, username and user
+    RATE_LIMITS: str = os.getenv(
+        "RATE_LIMITS",
+        "login.ip=20/60,login.username=10/300,register.ip=5/3600,orders.user=30/60,orders.ip=120/60"
+    )
+    RATE_LIMIT_MAX_KEYS: int = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+    RATE_LIMIT_TRUST_PROXY: bool = os.getenv("RATE_LIMIT_TRUST_PROXY", "False").lower() in ("true", "1", "t")
+    
+    # API Key Settings
+    API_KEY_CACHE_SIZE: int = int(os.getenv("API_KEY_CACHE_SIZE", "1000"))
+    API_KEY_CACHE_TTL_SECONDS: int = int(os.getenv("API_KEY_CACHE_TTL_SECONDS", "60"))
+    
+    # Sales Rollup Settings
+    SALES_DAILY_SHARDS: int = int(os.getenv("SALES_DAILY_SHARDS", "4"))
+    
+    # Low Stock Settings
+    LOW_STOCK_THRESHOLD: int = int(os.getenv("LOW_STOCK_THRESHOLD", "5"))
+    # Upper bound of the partial quantity index; higher report thresholds scan the collections
+    LOW_STOCK_INDEX_THRESHOLD: int = int(os.getenv("LOW_STOCK_INDEX_THRESHOLD", "20"))
+    
+    # Inventory Summary Settings
+    INVENTORY_SUMMARY_TTL_SECONDS: int = int(os.getenv("INVENTORY_SUMMARY_TTL_SECONDS", "15"))
     
     # API Settings
     API_PREFIX: str = "/api/v1"
@@ -100,8 +206,8 @@ class BaseConfig:
 
     def show(self) -> None:
         for key, value in self.config.items():
-            print(f"[Base Config] {key}")
+            logging.info(f"[Base Config] {key}")
             for k, v in value.items():
-                print(f'\t{k}: {v}')
+                logging.info(f'\t{k}: {v}')
     
 
@@ -1,7 +1,51 @@
 from fastapi import HTTPException
-from datetime import datetime, timedelta
+from fastapi.encoders import jsonable_encoder
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from src.config import settings
 from src.database.database import Database
-from typing import List, Dict, Any
+from src.services.api_key_service import ApiKeyService
+from src.services.inventory_summary_service import InventorySummaryService
+from src.services.sales_rollup_service import EXCLUDED_STATUSES, SalesRollupService, day_range
+from src.services.stock_shard_service import StockShardService
+from src.services.flash_sale_service import FlashSaleService, flash_sale_gate
+from src.services.inventory import UNSHARDED
+from src.utils.pagination import decode_cursor, keyset_filter, page_cursor
+from typing import List, Dict, Any, AsyncIterator, Optional
+from bisect import bisect_right
+import csv
+import io
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Admin order search sort: newest first, order_id breaks ties between equal dates
+ORDER_SEARCH_SORT = [("order_date", -1), ("order_id", -1)]
+
+# Hardware collections with their category labels
+HARDWARE_CATEGORIES = [
+    {"collection_name": "CPUs", "category": "CPU", "id_field": "cpu_id"},
+    {"collection_name": "Rams", "category": "RAM", "id_field": "ram_id"},
+    {"collection_name": "Mainboards", "category": "Mainboard", "id_field": "mainboard_id"},
+    {"collection_name": "GPUs", "category": "GPU", "id_field": "gpu_id"},
+    {"collection_name": "Cases", "category": "Case", "id_field": "case_id"},
+    {"collection_name": "PSUs", "category": "PSU", "id_field": "psu_id"},
+    {"collection_name": "SSDs", "category": "SSD", "id_field": "ssd_id"},
+    {"collection_name": "M2s", "category": "M2", "id_field": "m2_id"}
+]
+
+# Bucket sizes of the sales time series, and the most buckets one request may span
+SALES_GRANULARITIES = ("hour", "day", "week", "month")
+SALES_SERIES_MAX_BUCKETS = 2000
+
+# Columns of the CSV order export
+ORDER_EXPORT_COLUMNS = [
+    "order_id", "user_id", "order_date", "status", "total_price",
+    "shipping_status", "name", "email", "phone", "shipping_address",
+    "cpu_id", "ram_id", "mainboard_id", "gpu_id", "case_id", "psu_id", "ssd_id", "m2_id",
+    "quantity", "additional_builds"
+]
 
 class AdminController:
     def __init__(self):
@@ -24,112 +68,202 @@ class AdminController:
 
     async def get_sales_last_five_days(self):
         """
-        Get sales data for the last 5 days
+        Get sales data for the last 5 days (UTC), newest first
+        """
+        today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        series = await self.get_sales_series(today - timedelta(days=4), today + timedelta(days=1), "day", "UTC")
+        return [
+            {
+                "date": bucket["start"][:10],
+                "total_sales": bucket["total_sales"],
+                "order_count": bucket["order_count"]
+            }
+            for bucket in reversed(series["buckets"])
+        ]
+
+    async def get_sales_series(self, date_from: Optional[datetime] = None, date_to: Optional[datetime] = None,
+                               granularity: str = "day", tz: str = "UTC") -> Dict[str, Any]:
+        """
+        Order totals per hour, day, week (from Monday) or month in the time zone `tz`,
+        over [date_from, date_to). Naive bounds are read as local time in `tz`.
+        Buckets without orders are included with zero totals; cancelled orders
+        are not counted. In UTC, days and longer come from the sales_daily
+        rollup and the range is widened to whole days.
         """
         if self.orders_collection is None:
             await self._init_collections()
         
-        today = datetime.now()
-        results = []
+        if granularity not in SALES_GRANULARITIES:
+            raise HTTPException(status_code=400, detail=f"Granularity must be one of: {', '.join(SALES_GRANULARITIES)}")
+        try:
+            zone = ZoneInfo(tz)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise HTTPException(status_code=400, detail=f"Unknown time zone: '{tz}'")
+        
+        date_to = self._localize(date_to, zone) if date_to else datetime.now(zone)
+        date_from = self._localize(date_from, zone) if date_from else date_to - timedelta(days=30)
+        if date_from >= date_to:
+            raise HTTPException(status_code=400, detail="'from' must be before 'to'")
+        
+        # UTC days and longer are served from the daily rollup, over whole days
+        use_rollup = tz == "UTC" and granularity != "hour"
+        if use_rollup:
+            date_from, date_to = day_range(date_from, date_to)
         
-        for i in range(5):
-            target_date = today - timedelta(days=i)
-            start_of_day = datetime(target_date.year, target_date.month, target_date.day, 0, 0, 0)
-            end_of_day = datetime(target_date.year, target_date.month, target_date.day, 23, 59, 59)
+        buckets = self._sales_buckets(date_from, date_to, granularity, zone)
+        if len(buckets) > SALES_SERIES_MAX_BUCKETS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Range spans more than {SALES_SERIES_MAX_BUCKETS} buckets, use a coarser granularity"
+            )
+        
+        if use_rollup:
+            totals = await self._rollup_totals(buckets, date_from, date_to)
+        else:
+            truncate = {"date": "$order_date", "unit": granularity, "timezone": tz}
+            if granularity == "week":
+                truncate["startOfWeek"] = "monday"
             
+            # One pass over the order_date index range
             pipeline = [
-                {
-                    "$match": {
-                        "order_date": {
-                            "$gte": start_of_day,
-                            "$lte": end_of_day
-                        }
-                        # "status": {"$in": ["Confirmed", "Delivered"]}
-                    }
-                },
-                {
-                    "$group": {
-                        "_id": None,
-                        "total_sales": {"$sum": "$total_price"},
-                        "order_count": {"$sum": 1}
-                    }
-                }
+                {"$match": {"order_date": {"$gte": date_from, "$lt": date_to}, "status": {"$nin": EXCLUDED_STATUSES}}},
+                {"$group": {
+                    "_id": {"$dateTrunc": truncate},
+                    "total_sales": {"$sum": "$total_price"},
+                    "order_count": {"$sum": 1}
+                }}
             ]
-            
-            cursor = self.orders_collection.aggregate(pipeline)
-            sales_data = await cursor.to_list(length=1)
-            
-            date_str = target_date.strftime("%Y-%m-%d")
-            if sales_data and len(sales_data) > 0:
-                results.append({
-                    "date": date_str,
-                    "total_sales": sales_data[0].get("total_sales", 0),
-                    "order_count": sales_data[0].get("order_count", 0)
-                })
-            else:
-                results.append({
-                    "date": date_str,
-                    "total_sales": 0,
-                    "order_count": 0
-                })
+            totals = {
+                self._utc(row["_id"]): row
+                async for row in self.orders_collection.aggregate(pipeline)
+            }
         
-        return results
+        series = []
+        for bucket in buckets:
+            row = totals.get(self._utc(bucket), {})
+            series.append({
+                "start": bucket.isoformat(),
+                "total_sales": row.get("total_sales", 0),
+                "order_count": row.get("order_count", 0)
+            })
+        
+        return {
+            "from": date_from.isoformat(),
+            "to": date_to.isoformat(),
+            "granularity": granularity,
+            "tz": tz,
+            "total_sales": sum(bucket["total_sales"] for bucket in series),
+            "order_count": sum(bucket["order_count"] for bucket in series),
+            "buckets": series
+        }
 
-    async def get_low_stock_products(self, limit: int = 5):
+    async def _rollup_totals(self, buckets: List[datetime], date_from: datetime, date_to: datetime) -> Dict[datetime, Dict[str, int]]:
+        """Sum rollup days into the buckets they fall in, keyed by UTC bucket start"""
+        starts = [self._utc(bucket) for bucket in buckets]
+        totals = {start: {"total_sales": 0, "order_count": 0} for start in starts}
+        for day in await SalesRollupService(Database.get_instance()).read(date_from, date_to):
+            start = starts[bisect_right(starts, day["day"]) - 1]
+            totals[start]["total_sales"] += day["revenue"]
+            totals[start]["order_count"] += day["order_count"]
+        return totals
+
+    async def get_sales_daily(self, date_from: Optional[datetime] = None, date_to: Optional[datetime] = None) -> List[Dict[str, Any]]:
         """
-        Get top 5 products with the lowest stock quantity
+        Daily rollup rows (UTC days) with revenue, order count and units, overall and per category
         """
-        # Make sure collections are initialized
-        if self.orders_collection is None:
-            await self._init_collections()
+        date_to = self._utc(date_to) if date_to else datetime.now(timezone.utc)
+        date_from = self._utc(date_from) if date_from else date_to - timedelta(days=30)
+        if date_from >= date_to:
+            raise HTTPException(status_code=400, detail="'from' must be before 'to'")
         
-        # Define hardware collections mapping
-        hardware_mapping = [
-            {"collection_name": "CPUs", "category": "CPU", "id_field": "cpu_id"},
-            {"collection_name": "Rams", "category": "RAM", "id_field": "ram_id"},
-            {"collection_name": "Mainboards", "category": "Mainboard", "id_field": "mainboard_id"},
-            {"collection_name": "GPUs", "category": "GPU", "id_field": "gpu_id"},
-            {"collection_name": "Cases", "category": "Case", "id_field": "case_id"},
-            {"collection_name": "PSUs", "category": "PSU", "id_field": "psu_id"},
-            {"collection_name": "SSDs", "category": "SSD", "id_field": "ssd_id"},
-            {"collection_name": "M2s", "category": "M2", "id_field": "m2_id"}
-        ]
+        date_from, date_to = day_range(date_from, date_to)
+        days = await SalesRollupService(Database.get_instance()).read(date_from, date_to)
+        return [{**day, "day": day["day"].strftime("%Y-%m-%d")} for day in days]
+
+    @staticmethod
+    def _localize(value: datetime, zone: ZoneInfo) -> datetime:
+        return value.replace(tzinfo=zone) if value.tzinfo is None else value.astimezone(zone)
+
+    @staticmethod
+    def _utc(value: datetime) -> datetime:
+        return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+    @staticmethod
+    def _sales_buckets(date_from: datetime, date_to: datetime, granularity: str, zone: ZoneInfo) -> List[datetime]:
+        """Start of every bucket overlapping [date_from, date_to), in local time"""
+        local = date_from.astimezone(zone)
+        if granularity == "hour":
+            # Hours are stepped in UTC so DST changes neither skip nor repeat one
+            start = local.replace(minute=0, second=0, microsecond=0).astimezone(timezone.utc)
+            buckets = []
+            while start < date_to and len(buckets) <= SALES_SERIES_MAX_BUCKETS:
+                buckets.append(start.astimezone(zone))
+                start += timedelta(hours=1)
+            return buckets
         
-        # List to store products from all collections
-        all_low_stock = []
+        day = local.date()
+        if granularity == "week":
+            day -= timedelta(days=day.weekday())
+        elif granularity == "month":
+            day = day.replace(day=1)
         
-        # Fetch low stock products from each collection
-        for hw in hardware_mapping:
-            try:
-                # Get the collection directly each time instead of storing in a dict
-                collection = await Database.get_collection(hw["collection_name"])
-                
-                category = hw["category"]
-                id_field = hw["id_field"]
-                
-                # Find products with low stock
-                cursor = collection.find(
-                    {"quantity": {"$lt": 5}},
-                    {"_id": 0}  # Exclude only _id, include all other fields
-                ).sort("quantity", 1)
-                
-                results = await cursor.to_list()
-                
-                # Add category field for standardization
-                for product in results:
-                    product["category"] = category
-                
-                all_low_stock.extend(results)
-            except Exception as e:
-                print(f"Error fetching low stock products for {hw['category']}: {e}")
-                # Continue to next collection if there's an error
-                continue
+        buckets = []
+        while len(buckets) <= SALES_SERIES_MAX_BUCKETS:
+            start = datetime(day.year, day.month, day.day, tzinfo=zone)
+            if start >= date_to:
+                break
+            buckets.append(start)
+            if granularity == "day":
+                day += timedelta(days=1)
+            elif granularity == "week":
+                day += timedelta(days=7)
+            else:
+                day = (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+        return buckets
+
+    async def get_low_stock_products(self, limit: int = 5, threshold: Optional[int] = None, category: Optional[str] = None):
+        """
+        Get the products with the lowest stock quantity below `threshold`,
+        across all hardware collections or one category, in one aggregation
+        """
+        threshold = threshold or settings.LOW_STOCK_THRESHOLD
+        categories = HARDWARE_CATEGORIES
+        if category:
+            categories = [hw for hw in HARDWARE_CATEGORIES if hw["category"].lower() == category.lower()]
+            if not categories:
+                names = ", ".join(hw["category"] for hw in HARDWARE_CATEGORIES)
+                raise HTTPException(status_code=400, detail=f"Unknown category '{category}'. Must be one of: {names}")
         
-        # Sort combined results by stock quantity
-        all_low_stock.sort(key=lambda x: x.get("quantity", 999999))
+        def branch(hw: Dict[str, str]) -> List[Dict[str, Any]]:
+            # Served from the partial index on low quantities; each collection contributes at most `limit` items
+            return [
+                {"$match": {"quantity": {"$lt": threshold}, **UNSHARDED}},
+                {"$sort": {"quantity": 1}},
+                {"$limit": limit},
+                {"$set": {"category": hw["category"]}}
+            ]
         
-        # Return only the top N results
-        return all_low_stock[:limit]
+        first, *others = categories
+        pipeline = [
+            *branch(first),
+            *({"$unionWith": {"coll": hw["collection_name"], "pipeline": branch(hw)}} for hw in others),
+            {"$sort": {"quantity": 1, "category": 1}},
+            {"$limit": limit},
+            {"$project": {"_id": 0}}
+        ]
+        collection = await Database.get_collection(first["collection_name"])
+        products = await collection.aggregate(pipeline).to_list(length=limit)
+        
+        # Sharded items keep their stock in stock_shards, so their own quantity is not checked above
+        sharded = await StockShardService(Database.get_instance()).sharded_items(
+            [hw["collection_name"] for hw in categories]
+        )
+        for hw in categories:
+            for item in sharded[hw["collection_name"]]:
+                if item["quantity"] < threshold:
+                    products.append({**item, "category": hw["category"]})
+        products.sort(key=lambda item: (item["quantity"], item["category"]))
+        return products[:limit]
 
     async def get_recent_orders(self, limit: int = 5):
         """
@@ -178,83 +312,28 @@ class AdminController:
 
     async def get_inventory_summary(self):
         """
-        Get inventory summary by category
+        Get inventory summary by category, with the time each category was computed
         """
-        # Make sure collections are initialized
-        if self.orders_collection is None:
-            await self._init_collections()
-            
-        hardware_types = [
-            {"name": "CPUs", "category": "CPU"},
-            {"name": "Rams", "category": "RAM"},
-            {"name": "Mainboards", "category": "Mainboard"},
-            {"name": "GPUs", "category": "GPU"},
-            {"name": "Cases", "category": "Case"},
-            {"name": "PSUs", "category": "PSU"},
-            {"name": "SSDs", "category": "SSD"},
-            {"name": "M2s", "category": "M2"}
-        ]
+        summaries = await InventorySummaryService(Database.get_instance()).summarize(
+            [hw["collection_name"] for hw in HARDWARE_CATEGORIES]
+        )
         
         category_summary = []
-        total_items = 0
-        total_stock = 0
-        total_value = 0
-        
-        for hw in hardware_types:
-            try:
-                # Get the collection directly each time
-                collection = await Database.get_collection(hw["name"])
-                
-                # Get summary for this category
-                pipeline = [
-                    {
-                        "$group": {
-                            "_id": None,
-                            "total_items": {"$sum": 1},
-                            "total_stock": {"$sum": "$quantity"},
-                            "total_value": {"$sum": {"$multiply": ["$price", "$quantity"]}}
-                        }
-                    }
-                ]
-                
-                cursor = collection.aggregate(pipeline)
-                result = await cursor.to_list(length=1)
-                
-                if result and len(result) > 0:
-                    category_data = {
-                        "category": hw["category"],
-                        "total_items": result[0].get("total_items", 0),
-                        "total_stock": result[0].get("total_stock", 0),
-                        "total_value": result[0].get("total_value", 0)
-                    }
-                    category_summary.append(category_data)
-                    
-                    # Add to totals
-                    total_items += category_data["total_items"]
-                    total_stock += category_data["total_stock"]
-                    total_value += category_data["total_value"]
-                else:
-                    category_summary.append({
-                        "category": hw["category"],
-                        "total_items": 0,
-                        "total_stock": 0,
-                        "total_value": 0
-                    })
-            except Exception as e:
-                print(f"Error getting inventory summary for {hw['category']}: {e}")
-                category_summary.append({
-                    "category": hw["category"],
-                    "total_items": 0,
-                    "total_stock": 0,
-                    "total_value": 0
-                })
+        for hw in HARDWARE_CATEGORIES:
+            summary = summaries.get(hw["collection_name"])
+            category_summary.append({
+                "category": hw["category"],
+                "total_items": summary["total_items"] if summary else 0,
+                "total_stock": summary["total_stock"] if summary else 0,
+                "total_value": summary["total_value"] if summary else 0,
+                "computed_at": summary["computed_at"] if summary else None
+            })
         
         return {
             "categories": category_summary,
             "total": {
-                "total_items": total_items,
-                "total_stock": total_stock,
-                "total_value": total_value
+                field: sum(category[field] for category in category_summary)
+                for field in ("total_items", "total_stock", "total_value")
             }
         }
 
@@ -308,8 +387,8 @@ class AdminController:
         try:
             cursor = self.orders_collection.aggregate(pipeline)
             return await cursor.to_list(length=limit)
-        except Exception as e:
-            print(f"Error getting top customers: {e}")
+        except Exception:
+            logger.exception("Error getting top customers")
             return []
 
     async def get_top_selling_products(self, limit: int = 5):
@@ -325,7 +404,7 @@ class AdminController:
         })
         
         if count == 0:
-            print("No orders with order_details found")
+            logger.debug("No orders with order_details found")
             return []
         
         # Check data structure of order_details in the first document
@@ -379,19 +458,36 @@ class AdminController:
                 
                 # Pipeline for this hardware type
                 type_pipeline = [
-                    # Match orders that have this hardware type in order_details
+                    # Match orders that have this hardware type in any of their builds
                     {
                         "$match": {
-                            f"order_details.{field}": { "$exists": True }
+                            "$or": [
+                                { f"order_details.{field}": { "$exists": True } },
+                                { f"builds.{field}": { "$exists": True } }
+                            ]
                         }
                     },
-                    # Group by hardware ID and count occurrences
+                    # One document per build: order_details plus the additional builds
+                    {
+                        "$project": {
+                            "computer_set": {
+                                "$concatArrays": [["$order_details"], { "$ifNull": ["$builds", []] }]
+                            }
+                        }
+                    },
+                    { "$unwind": "$computer_set" },
+                    {
+                        "$match": {
+                            f"computer_set.{field}": { "$exists": True, "$ne": None }
+                        }
+                    },
+                    # Group by hardware ID, weighting each build by its quantity
                     {
                         "$group": {
-                            "_id": f"$order_details.{field}",
-                            "sold_quantity": { "$sum": 1 },
+                            "_id": f"$computer_set.{field}",
+                            "sold_quantity": { "$sum": { "$ifNull": ["$computer_set.quantity", 1] } },
                             "count": { "$sum": 1 },
-                            "product_title": { "$first": "$order_details.title" }
+                            "product_title": { "$first": "$computer_set.title" }
                         }
                     },
                     # Add category information
@@ -435,8 +531,8 @@ class AdminController:
                                         item["quantity"] = product.get("quantity", 0)
                         
                     all_results.extend(results)
-                except Exception as e:
-                    print(f"Error processing {category}: {e}")
+                except Exception:
+                    logger.exception("Error processing category", extra={"category": category})
                     continue
             
             # Sort the combined results by sold quantity
@@ -471,11 +567,11 @@ class AdminController:
                 results = await cursor.to_list(length=limit)
                 if results:
                     return results
-            except Exception as e:
-                print(f"Error getting top selling products: {e}")
+            except Exception:
+                logger.exception("Error getting top selling products")
         
         # Return empty list instead of sample data
-        print("No top selling products found, returning empty list")
+        logger.debug("No top selling products found, returning empty list")
         return []
 
     async def get_compatible_mainboards(self, cpu_id: str):
@@ -518,13 +614,13 @@ class AdminController:
             
             # If no compatible mainboards found, return empty list
             if not results:
-                print(f"No compatible mainboards found for socket {socket}")
+                logger.debug("No compatible mainboards found", extra={"socket": socket})
                 return []
                 
             return results
             
-        except Exception as e:
-            print(f"Error finding compatible mainboards: {e}")
+        except Exception:
+            logger.exception("Error finding compatible mainboards")
             return []
 
     async def get_products_by_price_range(self, category: str, min_price: float, max_price: float, limit: int = 10):
@@ -600,7 +696,7 @@ class AdminController:
         })
         
         if count == 0:
-            print("No orders with order_details found")
+            logger.debug("No orders with order_details found")
             return []
         
         # Check data structure of order_details in the first document
@@ -609,16 +705,16 @@ class AdminController:
         
         # If order_details is an array, use the existing implementation
         if is_array:
-            print("Using array implementation for order_details")
+            logger.debug("Using array implementation for order_details")
             return await self._get_frequently_bought_together_array(limit)
         
         # Otherwise, create a custom implementation for object structure
-        print("Using object implementation for order_details")
+        logger.debug("Using object implementation for order_details")
         
         # First, get a list of all orders that have order_details as an object
         orders = await self.orders_collection.find(
             {"order_details": {"$exists": True, "$type": "object"}},
-            {"_id": 0, "order_id": 1, "order_details": 1}
+            {"_id": 0, "order_id": 1, "order_details": 1, "builds": 1}
         ).to_list(length=100)
         
         if not orders:
@@ -634,12 +730,12 @@ class AdminController:
                 # Get a reference to the collection for this hardware type
                 collection_name = hw["collection"]
                 if collection_name not in self.hardware_collections:
-                    print(f"Collection {collection_name} not found in hardware_collections")
+                    logger.warning("Collection not found in hardware_collections", extra={"collection": collection_name})
                     continue
                 
                 collection = self.hardware_collections[collection_name]
                 if collection is None:
-                    print(f"Collection {collection_name} is None")
+                    logger.warning("Collection is not initialized", extra={"collection": collection_name})
                     continue
                 
                 # Get the field name that contains the product ID
@@ -668,18 +764,24 @@ class AdminController:
                         }
                         
 
-            except Exception as e:
-                print(f"Error retrieving products for {hw['category']}: {e}")
+            except Exception:
+                logger.exception("Error retrieving products", extra={"category": hw["category"]})
                 continue
         
-        # Process each order to find product pairs
-        for order in orders:
-            order_details = order.get("order_details", {})
+        # Process each build of each order to find product pairs
+        computer_sets = [
+            computer_set
+            for order in orders
+            for computer_set in [order.get("order_details", {}), *(order.get("builds") or [])]
+        ]
+        for computer_set in computer_sets:
+            # A build ordered N times counts as N purchases of each pair in it
+            build_quantity = computer_set.get("quantity") or 1
             
-            # Build a list of products in this order
+            # Build a list of products in this build
             products_in_order = []
             for hw in hw_types:
-                product_id = order_details.get(hw["field"])
+                product_id = computer_set.get(hw["field"])
                 if product_id:
                     products_in_order.append({
                         "hw_field": hw["field"],
@@ -687,7 +789,7 @@ class AdminController:
                         "category": hw["category"]
                     })
             
-            # Create pairs from products in the order
+            # Create pairs from products in the build
             for i in range(len(products_in_order)):
                 for j in range(i + 1, len(products_in_order)):
                     # Create a sorted pair key to avoid counting A-B and B-A separately
@@ -702,7 +804,7 @@ class AdminController:
                     
                     # Increment the pair count
                     if pair_key in product_pairs:
-                        product_pairs[pair_key]["frequency"] += 1
+                        product_pairs[pair_key]["frequency"] += build_quantity
                     else:
                         product_pairs[pair_key] = {
                             "product_pair": {
@@ -717,7 +819,7 @@ class AdminController:
                                     "category": product2["category"]
                                 })
                             },
-                            "frequency": 1
+                            "frequency": build_quantity
                         }
         
         # Convert to list and sort by frequency
@@ -726,7 +828,7 @@ class AdminController:
         
         # If no real data was processed, return empty list
         if not result:
-            print("No product pairs found, returning empty list")
+            logger.debug("No product pairs found, returning empty list")
             return []
         
         # Take only the top N results
@@ -743,7 +845,7 @@ class AdminController:
         })
         
         if count == 0:
-            print("No orders with multiple items found, returning empty list")
+            logger.debug("No orders with multiple items found, returning empty list")
             return []
         
         # Use aggregation pipeline to find product pairs frequently purchased together
@@ -844,12 +946,12 @@ class AdminController:
             
             # If no results found, return empty list
             if not results:
-                print("No product pairs found via aggregation, returning empty list")
+                logger.debug("No product pairs found via aggregation, returning empty list")
                 return []
             
             return results
-        except Exception as e:
-            print(f"Error getting frequently bought together products: {e}")
+        except Exception:
+            logger.exception("Error getting frequently bought together products")
             # Return empty list if there's an error
             return []
 
@@ -885,19 +987,19 @@ class AdminController:
             try:
                 # Make sure collection exists in hardware_collections
                 if hw["collection_name"] not in self.hardware_collections:
-                    print(f"Collection {hw['collection_name']} not found in hardware_collections")
+                    logger.warning("Collection not found in hardware_collections", extra={"collection": hw["collection_name"]})
                     continue
                 
                 # Get the collection reference
                 collection = self.hardware_collections.get(hw["collection_name"])
                 if collection is None:
-                    print(f"Collection {hw['collection_name']} is None")
+                    logger.warning("Collection is not initialized", extra={"collection": hw["collection_name"]})
                     continue
                 
                 # Check if collection has any data
                 count = await collection.count_documents({})
                 if count == 0:
-                    print(f"No products found for category {hw['category']}")
+                    logger.debug("No products found", extra={"category": hw["category"]})
                     continue
                 
                 # Find products with prices and sort by price
@@ -914,8 +1016,8 @@ class AdminController:
                 
                 all_products.extend(results)
                 
-            except Exception as e:
-                print(f"Error processing {hw['category']}: {e}")
+            except Exception:
+                logger.exception("Error processing category", extra={"category": hw["category"]})
                 continue
         
         # Sort by price ascending
@@ -927,3 +1029,138 @@ class AdminController:
         
         # Limit to requested number of results
         return all_products[:limit]
+
+    @staticmethod
+    def _order_search_query(status: Optional[str] = None, shipping_status: Optional[str] = None,
+                            date_from: Optional[datetime] = None, date_to: Optional[datetime] = None,
+                            min_total: Optional[int] = None, max_total: Optional[int] = None,
+                            email: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Build the orders query for the admin search filters
+        """
+        query = {}
+        if status:
+            query["status"] = status
+        if shipping_status:
+            query["shipping_details.shipping_status"] = shipping_status
+        if email:
+            query["shipping_details.email"] = email
+        if date_from or date_to:
+            query["order_date"] = {}
+            if date_from:
+                query["order_date"]["$gte"] = date_from
+            if date_to:
+                query["order_date"]["$lt"] = date_to
+        if min_total is not None or max_total is not None:
+            query["total_price"] = {}
+            if min_total is not None:
+                query["total_price"]["$gte"] = min_total
+            if max_total is not None:
+                query["total_price"]["$lte"] = max_total
+        return query
+
+    async def search_orders(self, filters: Dict[str, Any], limit: int = 50, cursor: Optional[str] = None):
+        """
+        Search orders by status, shipping status, date range, total and customer email.
+        Results are newest first and keyset paginated.
+        """
+        if self.orders_collection is None:
+            await self._init_collections()
+
+        query = self._order_search_query(**filters)
+        if cursor:
+            query = {"$and": [query, keyset_filter(ORDER_SEARCH_SORT, decode_cursor(cursor))]}
+
+        # Fetch one extra order to know whether another page exists
+        cursor_obj = self.orders_collection.find(query, {"_id": 0}).sort(ORDER_SEARCH_SORT).limit(limit + 1)
+        orders = await cursor_obj.to_list(length=limit + 1)
+        has_more = len(orders) > limit
+        orders = orders[:limit]
+
+        return {
+            "items": orders,
+            "next_cursor": page_cursor(orders[-1], ORDER_SEARCH_SORT) if has_more else None
+        }
+
+    async def export_orders(self, filters: Dict[str, Any], export_format: str = "csv") -> AsyncIterator[str]:
+        """
+        Stream matching orders as CSV or NDJSON, one row at a time,
+        so large exports never sit in memory.
+        """
+        if self.orders_collection is None:
+            await self._init_collections()
+
+        query = self._order_search_query(**filters)
+        cursor = self.orders_collection.find(query, {"_id": 0}).sort(ORDER_SEARCH_SORT).batch_size(500)
+
+        if export_format == "ndjson":
+            async for order in cursor:
+                yield json.dumps(jsonable_encoder(order)) + "\n"
+            return
+
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=ORDER_EXPORT_COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+        async for order in cursor:
+            writer.writerow(self._order_export_row(order))
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+        # Header only when nothing matched
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    @staticmethod
+    def _order_export_row(order: Dict[str, Any]) -> Dict[str, Any]:
+        shipping = order.get("shipping_details") or {}
+        details = order.get("order_details") or {}
+        order_date = order.get("order_date")
+        return {
+            "order_id": order.get("order_id"),
+            "user_id": order.get("user_id"),
+            "order_date": order_date.isoformat() if isinstance(order_date, datetime) else order_date,
+            "status": order.get("status"),
+            "total_price": order.get("total_price"),
+            "shipping_status": shipping.get("shipping_status"),
+            "name": shipping.get("name"),
+            "email": shipping.get("email"),
+            "phone": shipping.get("phone"),
+            "shipping_address": shipping.get("shipping_address"),
+            **{field: details.get(field) for field in
+               ["cpu_id", "ram_id", "mainboard_id", "gpu_id", "case_id", "psu_id", "ssd_id", "m2_id"]},
+            "quantity": details.get("quantity", 1),
+            "additional_builds": len(order.get("builds") or [])
+        }
+
+    async def get_sharded_items(self) -> List[Dict[str, Any]]:
+        """
+        Hot SKUs whose stock is split across shard counters
+        """
+        return await StockShardService(Database.get_instance()).list_sharded()
+
+    async def enable_stock_shards(self, id_field: str, item_id: int, shards: Optional[int] = None) -> Dict[str, Any]:
+        return await StockShardService(Database.get_instance()).enable(id_field, item_id, shards)
+
+    async def disable_stock_shards(self, id_field: str, item_id: int) -> Dict[str, Any]:
+        return await StockShardService(Database.get_instance()).disable(id_field, item_id)
+
+    async def get_flash_sales(self) -> List[Dict[str, Any]]:
+        """
+        Flash-sale SKUs with the admission tokens left in this process
+        """
+        return flash_sale_gate.snapshot()
+
+    async def enable_flash_sale(self, id_field: str, item_id: int) -> Dict[str, Any]:
+        return await FlashSaleService(Database.get_instance()).enable(id_field, item_id)
+
+    async def disable_flash_sale(self, id_field: str, item_id: int) -> Dict[str, Any]:
+        return await FlashSaleService(Database.get_instance()).disable(id_field, item_id)
+
+    async def create_api_key(self, name: str, user_id: int, role: str, scopes: List[str]) -> Dict[str, Any]:
+        return await ApiKeyService(Database.get_instance()).create(name, user_id, role, scopes)
+
+    async def get_api_keys(self) -> List[Dict[str, Any]]:
+        return await ApiKeyService(Database.get_instance()).list_keys()
+
+    async def revoke_api_key(self, key_id: str) -> Dict[str, Any]:
+        return await ApiKeyService(Database.get_instance()).revoke(key_id)
@@ -2,6 +2,10 @@ from fastapi import HTTPException
 from src.database.database import Database
 from src.models.hardware_models import Case, UpdateCase
 from src.services.hardware_service import HardwareService
+from src.services.catalog_service import invalidate_price
+from src.services.stock_shard_service import StockShardService
+from src.services.flash_sale_service import FlashSaleService
+from src.services.inventory_summary_service import invalidate_inventory_summary
 
 class CaseController:
     def __init__(self):
@@ -18,7 +22,10 @@ class CaseController:
         if self.collection is None:
             await self._init_collection()
         cursor = self.collection.find({}, {"_id": 0})
-        return await cursor.to_list(length=None)
+        # Sharded items keep their stock in stock_shards
+        return await StockShardService(Database.get_instance()).with_shard_quantities(
+            "Cases", "case_id", await cursor.to_list(length=None)
+        )
 
     async def get_by_id(self, case_id: int):
         """Get a Case by its ID"""
@@ -27,6 +34,7 @@ class CaseController:
         case = await self.collection.find_one({"case_id": case_id}, {"_id": 0})
         if not case:
             raise ValueError(f"Case with id {case_id} not found")
+        await StockShardService(Database.get_instance()).with_shard_quantities("Cases", "case_id", [case])
         return case
 
     async def create(self, case: Case):
@@ -37,6 +45,7 @@ class CaseController:
         result = await self.collection.insert_one(case_dict)
         if not result.inserted_id:
             raise ValueError("Failed to insert Case")
+        invalidate_inventory_summary("Cases")
         return {"message": "Case added successfully", "id": str(result.inserted_id)}
 
     async def update(self, case_id: int, case: UpdateCase):
@@ -47,13 +56,15 @@ class CaseController:
         if not update_data:
             raise ValueError("No valid update data provided")
         
-        result = await self.collection.update_one(
-            {"case_id": case_id},
-            {"$set": update_data}
-        )
-        
-        if result.matched_count == 0:
+        # A quantity edit on a sharded item is written to its shards
+        found = await StockShardService(Database.get_instance()).update_item("Cases", "case_id", case_id, update_data)
+        if not found:
             raise ValueError(f"Case with id {case_id} not found")
+        invalidate_price("Cases", "case_id", case_id)
+        invalidate_inventory_summary("Cases")
+        if "quantity" in update_data:
+            # A restock reopens a sold-out flash sale in this process straight away
+            await FlashSaleService(Database.get_instance()).refresh([("Cases", "case_id", case_id)])
         return {"message": "Case updated successfully"}
 
     async def delete(self, case_id: int):
@@ -63,4 +74,6 @@ class CaseController:
         result = await self.collection.delete_one({"case_id": case_id})
         if result.deleted_count == 0:
             raise ValueError(f"Case with id {case_id} not found")
+        invalidate_price("Cases", "case_id", case_id)
+        invalidate_inventory_summary("Cases")
         return {"message": "Case deleted successfully", "case_id": case_id}
@@ -2,6 +2,10 @@ from fastapi import HTTPException
 from src.database.database import Database
 from src.models.hardware_models import CPU, UpdateCPU
 from src.services.hardware_service import HardwareService
+from src.services.catalog_service import invalidate_price
+from src.services.stock_shard_service import StockShardService
+from src.services.flash_sale_service import FlashSaleService
+from src.services.inventory_summary_service import invalidate_inventory_summary
 
 class CPUController:
     def __init__(self):
@@ -18,7 +22,10 @@ class CPUController:
         if self.collection is None:
             await self._init_collection()
         cursor = self.collection.find({}, {"_id": 0})
-        return await cursor.to_list(length=None)
+        # Sharded items keep their stock in stock_shards
+        return await StockShardService(Database.get_instance()).with_shard_quantities(
+            "CPUs", "cpu_id", await cursor.to_list(length=None)
+        )
 
     async def get_by_id(self, cpu_id: int):
         """Get a CPU by its ID"""
@@ -27,6 +34,7 @@ class CPUController:
         cpu = await self.collection.find_one({"cpu_id": cpu_id}, {"_id": 0})
         if not cpu:
             raise ValueError(f"CPU with id {cpu_id} not found")
+        await StockShardService(Database.get_instance()).with_shard_quantities("CPUs", "cpu_id", [cpu])
         return cpu
 
     async def create(self, cpu: CPU):
@@ -37,6 +45,7 @@ class CPUController:
         result = await self.collection.insert_one(cpu_dict)
         if not result.inserted_id:
             raise ValueError("Failed to insert CPU")
+        invalidate_inventory_summary("CPUs")
         return {"message": "CPU added successfully", "id": str(result.inserted_id)}
 
     async def update(self, cpu_id: int, cpu: UpdateCPU):
@@ -47,13 +56,15 @@ class CPUController:
         if not update_data:
             raise ValueError("No valid update data provided")
         
-        result = await self.collection.update_one(
-            {"cpu_id": cpu_id},
-            {"$set": update_data}
-        )
-        
-        if result.matched_count == 0:
+        # A quantity edit on a sharded item is written to its shards
+        found = await StockShardService(Database.get_instance()).update_item("CPUs", "cpu_id", cpu_id, update_data)
+        if not found:
             raise ValueError(f"CPU with id {cpu_id} not found")
+        invalidate_price("CPUs", "cpu_id", cpu_id)
+        invalidate_inventory_summary("CPUs")
+        if "quantity" in update_data:
+            # A restock reopens a sold-out flash sale in this process straight away
+            await FlashSaleService(Database.get_instance()).refresh([("CPUs", "cpu_id", cpu_id)])
         return {"message": "CPU updated successfully"}
 
     async def delete(self, cpu_id: int):
@@ -63,4 +74,6 @@ class CPUController:
         result = await self.collection.delete_one({"cpu_id": cpu_id})
         if result.deleted_count == 0:
             raise ValueError(f"CPU with id {cpu_id} not found")
+        invalidate_price("CPUs", "cpu_id", cpu_id)
+        invalidate_inventory_summary("CPUs")
         return {"message": "CPU deleted successfully", "cpu_id": cpu_id} 
\ No newline at end of file
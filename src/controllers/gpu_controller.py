@@ -2,6 +2,10 @@ from fastapi import HTTPException
 from src.database.database import Database
 from src.models.hardware_models import GPU, UpdateGPU
 from src.services.hardware_service import HardwareService
+from src.services.catalog_service import invalidate_price
+from src.services.stock_shard_service import StockShardService
+from src.services.flash_sale_service import FlashSaleService
+from src.services.inventory_summary_service import invalidate_inventory_summary
 
 class GPUController:
     def __init__(self):
@@ -18,7 +22,10 @@ class GPUController:
         if self.collection is None:
             await self._init_collection()
         cursor = self.collection.find({}, {"_id": 0})
-        return await cursor.to_list(length=None)
+        # Sharded items keep their stock in stock_shards
+        return await StockShardService(Database.get_instance()).with_shard_quantities(
+            "GPUs", "gpu_id", await cursor.to_list(length=None)
+        )
 
     async def get_by_id(self, gpu_id: int):
         """Get a GPU by its ID"""
@@ -27,6 +34,7 @@ class GPUController:
         gpu = await self.collection.find_one({"gpu_id": gpu_id}, {"_id": 0})
         if not gpu:
             raise ValueError(f"GPU with id {gpu_id} not found")
+        await StockShardService(Database.get_instance()).with_shard_quantities("GPUs", "gpu_id", [gpu])
         return gpu
 
     async def create(self, gpu: GPU):
@@ -37,6 +45,7 @@ class GPUController:
         result = await self.collection.insert_one(gpu_dict)
         if not result.inserted_id:
             raise ValueError("Failed to insert GPU")
+        invalidate_inventory_summary("GPUs")
         return {"message": "GPU added successfully", "id": str(result.inserted_id)}
 
     async def update(self, gpu_id: int, gpu: UpdateGPU):
@@ -47,13 +56,15 @@ class GPUController:
         if not update_data:
             raise ValueError("No valid update data provided")
         
-        result = await self.collection.update_one(
-            {"gpu_id": gpu_id},
-            {"$set": update_data}
-        )
-        
-        if result.matched_count == 0:
+        # A quantity edit on a sharded item is written to its shards
+        found = await StockShardService(Database.get_instance()).update_item("GPUs", "gpu_id", gpu_id, update_data)
+        if not found:
             raise ValueError(f"GPU with id {gpu_id} not found")
+        invalidate_price("GPUs", "gpu_id", gpu_id)
+        invalidate_inventory_summary("GPUs")
+        if "quantity" in update_data:
+            # A restock reopens a sold-out flash sale in this process straight away
+            await FlashSaleService(Database.get_instance()).refresh([("GPUs", "gpu_id", gpu_id)])
         return {"message": "GPU updated successfully"}
 
     async def delete(self, gpu_id: int):
@@ -63,4 +74,6 @@ class GPUController:
         result = await self.collection.delete_one({"gpu_id": gpu_id})
         if result.deleted_count == 0:
             raise ValueError(f"GPU with id {gpu_id} not found")
+        invalidate_price("GPUs", "gpu_id", gpu_id)
+        invalidate_inventory_summary("GPUs")
         return {"message": "GPU deleted successfully", "gpu_id": gpu_id}
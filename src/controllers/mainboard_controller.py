@@ -2,6 +2,10 @@ from fastapi import HTTPException
 from src.database.database import Database
 from src.models.hardware_models import Mainboard, UpdateMainboard
 from src.services.hardware_service import HardwareService
+from src.services.catalog_service import invalidate_price
+from src.services.stock_shard_service import StockShardService
+from src.services.flash_sale_service import FlashSaleService
+from src.services.inventory_summary_service import invalidate_inventory_summary
 
 class MainboardController:
     def __init__(self):
@@ -18,7 +22,10 @@ class MainboardController:
         if self.collection is None:
             await self._init_collection()
         cursor = self.collection.find({}, {"_id": 0})
-        return await cursor.to_list(length=None)
+        # Sharded items keep their stock in stock_shards
+        return await StockShardService(Database.get_instance()).with_shard_quantities(
+            "Mainboards", "mainboard_id", await cursor.to_list(length=None)
+        )
 
     async def get_by_id(self, mainboard_id: int):
         """Get a Mainboard by its ID"""
@@ -27,6 +34,7 @@ class MainboardController:
         mainboard = await self.collection.find_one({"mainboard_id": mainboard_id}, {"_id": 0})
         if not mainboard:
             raise ValueError(f"Mainboard with id {mainboard_id} not found")
+        await StockShardService(Database.get_instance()).with_shard_quantities("Mainboards", "mainboard_id", [mainboard])
         return mainboard
 
     async def create(self, mainboard: Mainboard):
@@ -37,6 +45,7 @@ class MainboardController:
         result = await self.collection.insert_one(mainboard_dict)
         if not result.inserted_id:
             raise ValueError("Failed to insert Mainboard")
+        invalidate_inventory_summary("Mainboards")
         return {"message": "Mainboard added successfully", "id": str(result.inserted_id)}
 
     async def update(self, mainboard_id: int, mainboard: UpdateMainboard):
@@ -47,13 +56,15 @@ class MainboardController:
         if not update_data:
             raise ValueError("No valid update data provided")
         
-        result = await self.collection.update_one(
-            {"mainboard_id": mainboard_id},
-            {"$set": update_data}
-        )
-        
-        if result.matched_count == 0:
+        # A quantity edit on a sharded item is written to its shards
+        found = await StockShardService(Database.get_instance()).update_item("Mainboards", "mainboard_id", mainboard_id, update_data)
+        if not found:
             raise ValueError(f"Mainboard with id {mainboard_id} not found")
+        invalidate_price("Mainboards", "mainboard_id", mainboard_id)
+        invalidate_inventory_summary("Mainboards")
+        if "quantity" in update_data:
+            # A restock reopens a sold-out flash sale in this process straight away
+            await FlashSaleService(Database.get_instance()).refresh([("Mainboards", "mainboard_id", mainboard_id)])
         return {"message": "Mainboard updated successfully"}
 
     async def delete(self, mainboard_id: int):
@@ -63,4 +74,6 @@ class MainboardController:
         result = await self.collection.delete_one({"mainboard_id": mainboard_id})
         if result.deleted_count == 0:
             raise ValueError(f"Mainboard with id {mainboard_id} not found")
+        invalidate_price("Mainboards", "mainboard_id", mainboard_id)
+        invalidate_inventory_summary("Mainboards")
         return {"message": "Mainboard deleted successfully", "mainboard_id": mainboard_id}
@@ -1,36 +1,99 @@
 from fastapi import HTTPException
 from src.database.database import Database
-from src.models.order_models import ComputerSet, ShippingDetails, Order
+from src.models.order_models import ComputerSet, ShippingDetails, Order, OrderPage
 from src.services.order_service import OrderService
-from typing import List, Dict, Any
+from src.services.idempotency_service import IdempotencyService, request_fingerprint
+from src.services.order_intake_service import OrderIntakeService
+from src.services.order_event_service import OrderEventService
+from typing import List, Dict, Any, Optional
 
 class OrderController:
     def __init__(self, database: Database):
         self.order_service = OrderService(database)
+        self.idempotency_service = IdempotencyService(database)
+        self.intake_service = OrderIntakeService(database)
+        self.event_service = OrderEventService(database)
     
-    async def create_order(self, order_data: Dict[str, Any]) -> Order:
-        try:
+    async def _create_once(self, order_data: Dict[str, Any], idempotency_key: Optional[str]):
+        """Create the order, or replay the stored result if the key was seen before"""
+        if not idempotency_key:
             return await self.order_service.create_order(order_data)
+        
+        return await self.idempotency_service.run(
+            idempotency_key,
+            order_data["user_id"],
+            request_fingerprint(order_data),
+            lambda: self.order_service.create_order(order_data)
+        )
+    
+    async def create_order(self, order_data: Dict[str, Any], idempotency_key: Optional[str] = None) -> Order:
+        try:
+            return await self._create_once(order_data, idempotency_key)
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
     
+    @staticmethod
+    def build_order_data(user_id: int, computer_set: ComputerSet, shipping_details: ShippingDetails,
+                         total_price: int, builds: Optional[List[ComputerSet]] = None,
+                         reservation_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Create order data in the format required by the service
+        """
+        return {
+            "user_id": user_id,
+            "order_details": computer_set.model_dump(),
+            "builds": [build.model_dump() for build in builds or []],
+            "shipping_details": shipping_details.model_dump(),
+            "total_price": total_price,
+            "reservation_id": reservation_id
+        }
+    
     async def create_order_with_details(self, user_id: int, computer_set: ComputerSet, 
-                                      shipping_details: ShippingDetails, total_price: int) -> Order:
+                                      shipping_details: ShippingDetails, total_price: int,
+                                      builds: Optional[List[ComputerSet]] = None,
+                                      reservation_id: Optional[str] = None,
+                                      idempotency_key: Optional[str] = None) -> Order:
         """
         Create a new order from separate ComputerSet and ShippingDetails
         """
         try:
-            # Create order data in the format required by the service
-            order_data = {
-                "user_id": user_id,
-                "order_details": computer_set.model_dump(),
-                "shipping_details": shipping_details.model_dump(),
-                "total_price": total_price
-            }
-            return await self.order_service.create_order(order_data)
+            order_data = self.build_order_data(
+                user_id, computer_set, shipping_details, total_price, builds, reservation_id
+            )
+            return await self._create_once(order_data, idempotency_key)
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
     
+    async def enqueue_order(self, order_data: Dict[str, Any], idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Queue an order request for the intake workers and return its receipt
+        """
+        try:
+            if not idempotency_key:
+                return await self.intake_service.enqueue(order_data)
+            return await self.idempotency_service.run(
+                idempotency_key,
+                order_data["user_id"],
+                request_fingerprint(order_data),
+                lambda: self.intake_service.enqueue(order_data)
+            )
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+    
+    async def get_intake_status(self, intake_id: str) -> Dict[str, Any]:
+        try:
+            return await self.intake_service.get_status(intake_id)
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+    
     async def get_order(self, order_id: int) -> Order:
         try:
             return await self.order_service.get_order(order_id)
@@ -39,9 +102,12 @@ class OrderController:
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
     
-    async def get_user_orders(self, user_id: int) -> List[Order]:
+    async def get_user_orders(self, user_id: int, limit: int = 20, cursor: Optional[str] = None,
+                              include_total: bool = False) -> OrderPage:
         try:
-            return await self.order_service.get_user_orders(user_id)
+            return await self.order_service.get_user_orders(user_id, limit, cursor, include_total)
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
     
@@ -61,6 +127,30 @@ class OrderController:
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
     
+    async def bulk_update_order_status(self, order_ids: List[int], status: str) -> Dict[str, Any]:
+        try:
+            return await self.order_service.bulk_update_order_status(order_ids, status)
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+    
+    async def bulk_update_shipping_status(self, updates: Dict[int, str]) -> Dict[str, Any]:
+        try:
+            return await self.order_service.bulk_update_shipping_status(updates)
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+    
+    async def get_order_events(self, after: Optional[str] = None, limit: int = 100) -> Dict[str, Any]:
+        try:
+            return await self.event_service.read(after, limit)
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+    
     async def delete_order(self, order_id: int) -> bool:
         try:
             return await self.order_service.delete_order(order_id)
@@ -2,6 +2,10 @@ from fastapi import HTTPException
 from src.database.database import Database
 from src.models.hardware_models import PSU, UpdatePSU
 from src.services.hardware_service import HardwareService
+from src.services.catalog_service import invalidate_price
+from src.services.stock_shard_service import StockShardService
+from src.services.flash_sale_service import FlashSaleService
+from src.services.inventory_summary_service import invalidate_inventory_summary
 
 class PSUController:
     def __init__(self):
@@ -18,7 +22,10 @@ class PSUController:
         if self.collection is None:
             await self._init_collection()
         cursor = self.collection.find({}, {"_id": 0})
-        return await cursor.to_list(length=None)
+        # Sharded items keep their stock in stock_shards
+        return await StockShardService(Database.get_instance()).with_shard_quantities(
+            "PSUs", "psu_id", await cursor.to_list(length=None)
+        )
 
     async def get_by_id(self, psu_id: int):
         """Get a PSU by its ID"""
@@ -27,6 +34,7 @@ class PSUController:
         psu = await self.collection.find_one({"psu_id": psu_id}, {"_id": 0})
         if not psu:
             raise ValueError(f"PSU with id {psu_id} not found")
+        await StockShardService(Database.get_instance()).with_shard_quantities("PSUs", "psu_id", [psu])
         return psu
 
     async def create(self, psu: PSU):
@@ -37,6 +45,7 @@ class PSUController:
         result = await self.collection.insert_one(psu_dict)
         if not result.inserted_id:
             raise ValueError("Failed to insert PSU")
+        invalidate_inventory_summary("PSUs")
         return {"message": "PSU added successfully", "id": str(result.inserted_id)}
 
     async def update(self, psu_id: int, psu: UpdatePSU):
@@ -47,13 +56,15 @@ class PSUController:
         if not update_data:
             raise ValueError("No valid update data provided")
         
-        result = await self.collection.update_one(
-            {"psu_id": psu_id},
-            {"$set": update_data}
-        )
-        
-        if result.matched_count == 0:
+        # A quantity edit on a sharded item is written to its shards
+        found = await StockShardService(Database.get_instance()).update_item("PSUs", "psu_id", psu_id, update_data)
+        if not found:
             raise ValueError(f"PSU with id {psu_id} not found")
+        invalidate_price("PSUs", "psu_id", psu_id)
+        invalidate_inventory_summary("PSUs")
+        if "quantity" in update_data:
+            # A restock reopens a sold-out flash sale in this process straight away
+            await FlashSaleService(Database.get_instance()).refresh([("PSUs", "psu_id", psu_id)])
         return {"message": "PSU updated successfully"}
 
     async def delete(self, psu_id: int):
@@ -63,4 +74,6 @@ class PSUController:
         result = await self.collection.delete_one({"psu_id": psu_id})
         if result.deleted_count == 0:
             raise ValueError(f"PSU with id {psu_id} not found")
+        invalidate_price("PSUs", "psu_id", psu_id)
+        invalidate_inventory_summary("PSUs")
         return {"message": "PSU deleted successfully", "psu_id": psu_id} 
\ No newline at end of file
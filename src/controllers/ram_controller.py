@@ -2,6 +2,10 @@ from fastapi import HTTPException
 from src.database.database import Database
 from src.models.hardware_models import Ram, UpdateRam
 from src.services.hardware_service import HardwareService
+from src.services.catalog_service import invalidate_price
+from src.services.stock_shard_service import StockShardService
+from src.services.flash_sale_service import FlashSaleService
+from src.services.inventory_summary_service import invalidate_inventory_summary
 
 class RamController:
     def __init__(self):
@@ -18,7 +22,10 @@ class RamController:
         if self.collection is None:
             await self._init_collection()
         cursor = self.collection.find({}, {"_id": 0})
-        return await cursor.to_list(length=None)
+        # Sharded items keep their stock in stock_shards
+        return await StockShardService(Database.get_instance()).with_shard_quantities(
+            "Rams", "ram_id", await cursor.to_list(length=None)
+        )
 
     async def get_by_id(self, ram_id: int):
         """Get a RAM by its ID"""
@@ -27,6 +34,7 @@ class RamController:
         ram = await self.collection.find_one({"ram_id": ram_id}, {"_id": 0})
         if not ram:
             raise ValueError(f"RAM with id {ram_id} not found")
+        await StockShardService(Database.get_instance()).with_shard_quantities("Rams", "ram_id", [ram])
         return ram
 
     async def create(self, ram: Ram):
@@ -37,6 +45,7 @@ class RamController:
         result = await self.collection.insert_one(ram_dict)
         if not result.inserted_id:
             raise ValueError("Failed to insert RAM")
+        invalidate_inventory_summary("Rams")
         return {"message": "RAM added successfully", "id": str(result.inserted_id)}
 
     async def update(self, ram_id: int, ram: UpdateRam):
@@ -47,13 +56,15 @@ class RamController:
         if not update_data:
             raise ValueError("No valid update data provided")
         
-        result = await self.collection.update_one(
-            {"ram_id": ram_id},
-            {"$set": update_data}
-        )
-        
-        if result.matched_count == 0:
+        # A quantity edit on a sharded item is written to its shards
+        found = await StockShardService(Database.get_instance()).update_item("Rams", "ram_id", ram_id, update_data)
+        if not found:
             raise ValueError(f"RAM with id {ram_id} not found")
+        invalidate_price("Rams", "ram_id", ram_id)
+        invalidate_inventory_summary("Rams")
+        if "quantity" in update_data:
+            # A restock reopens a sold-out flash sale in this process straight away
+            await FlashSaleService(Database.get_instance()).refresh([("Rams", "ram_id", ram_id)])
         return {"message": "RAM updated successfully"}
 
     async def delete(self, ram_id: int):
@@ -63,4 +74,6 @@ class RamController:
         result = await self.collection.delete_one({"ram_id": ram_id})
         if result.deleted_count == 0:
             raise ValueError(f"RAM with id {ram_id} not found")
+        invalidate_price("Rams", "ram_id", ram_id)
+        invalidate_inventory_summary("Rams")
         return {"message": "RAM deleted successfully", "ram_id": ram_id}
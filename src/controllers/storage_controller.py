@@ -2,6 +2,10 @@ from fastapi import HTTPException
 from src.database.database import Database
 from src.models.hardware_models import SSD, M2, UpdateSSD, UpdateM2
 from src.services.hardware_service import HardwareService
+from src.services.catalog_service import invalidate_price
+from src.services.stock_shard_service import StockShardService
+from src.services.flash_sale_service import FlashSaleService
+from src.services.inventory_summary_service import invalidate_inventory_summary
 
 class StorageController:
     def __init__(self):
@@ -21,7 +25,10 @@ class StorageController:
         if self.ssd_collection is None:
             await self._init_collections()
         cursor = self.ssd_collection.find({}, {"_id": 0})
-        return await cursor.to_list(length=None)
+        # Sharded items keep their stock in stock_shards
+        return await StockShardService(Database.get_instance()).with_shard_quantities(
+            "SSDs", "ssd_id", await cursor.to_list(length=None)
+        )
 
     async def get_ssd_by_id(self, ssd_id: int):
         """Get an SSD by its ID"""
@@ -30,6 +37,7 @@ class StorageController:
         ssd = await self.ssd_collection.find_one({"ssd_id": ssd_id}, {"_id": 0})
         if not ssd:
             raise ValueError(f"SSD with id {ssd_id} not found")
+        await StockShardService(Database.get_instance()).with_shard_quantities("SSDs", "ssd_id", [ssd])
         return ssd
 
     async def create_ssd(self, ssd: SSD):
@@ -40,6 +48,7 @@ class StorageController:
         result = await self.ssd_collection.insert_one(ssd_dict)
         if not result.inserted_id:
             raise ValueError("Failed to insert SSD")
+        invalidate_inventory_summary("SSDs")
         return {"message": "SSD added successfully", "id": str(result.inserted_id)}
 
     async def update_ssd(self, ssd_id: int, ssd: UpdateSSD):
@@ -50,13 +59,15 @@ class StorageController:
         if not update_data:
             raise ValueError("No valid update data provided")
         
-        result = await self.ssd_collection.update_one(
-            {"ssd_id": ssd_id},
-            {"$set": update_data}
-        )
-        
-        if result.matched_count == 0:
+        # A quantity edit on a sharded item is written to its shards
+        found = await StockShardService(Database.get_instance()).update_item("SSDs", "ssd_id", ssd_id, update_data)
+        if not found:
             raise ValueError(f"SSD with id {ssd_id} not found")
+        invalidate_price("SSDs", "ssd_id", ssd_id)
+        invalidate_inventory_summary("SSDs")
+        if "quantity" in update_data:
+            # A restock reopens a sold-out flash sale in this process straight away
+            await FlashSaleService(Database.get_instance()).refresh([("SSDs", "ssd_id", ssd_id)])
         return {"message": "SSD updated successfully"}
 
     async def delete_ssd(self, ssd_id: int):
@@ -66,6 +77,8 @@ class StorageController:
         result = await self.ssd_collection.delete_one({"ssd_id": ssd_id})
         if result.deleted_count == 0:
             raise ValueError(f"SSD with id {ssd_id} not found")
+        invalidate_price("SSDs", "ssd_id", ssd_id)
+        invalidate_inventory_summary("SSDs")
         return {"message": "SSD deleted successfully", "ssd_id": ssd_id}
 
     # M.2 Methods
@@ -74,7 +87,10 @@ class StorageController:
         if self.m2_collection is None:
             await self._init_collections()
         cursor = self.m2_collection.find({}, {"_id": 0})
-        return await cursor.to_list(length=None)
+        # Sharded items keep their stock in stock_shards
+        return await StockShardService(Database.get_instance()).with_shard_quantities(
+            "M2s", "m2_id", await cursor.to_list(length=None)
+        )
 
     async def get_m2_by_id(self, m2_id: int):
         """Get an M.2 drive by its ID"""
@@ -83,6 +99,7 @@ class StorageController:
         m2 = await self.m2_collection.find_one({"m2_id": m2_id}, {"_id": 0})
         if not m2:
             raise ValueError(f"M.2 drive with id {m2_id} not found")
+        await StockShardService(Database.get_instance()).with_shard_quantities("M2s", "m2_id", [m2])
         return m2
 
     async def create_m2(self, m2: M2):
@@ -93,6 +110,7 @@ class StorageController:
         result = await self.m2_collection.insert_one(m2_dict)
         if not result.inserted_id:
             raise ValueError("Failed to insert M.2 drive")
+        invalidate_inventory_summary("M2s")
         return {"message": "M.2 drive added successfully", "id": str(result.inserted_id)}
 
     async def update_m2(self, m2_id: int, m2: UpdateM2):
@@ -103,13 +121,15 @@ class StorageController:
         if not update_data:
             raise ValueError("No valid update data provided")
         
-        result = await self.m2_collection.update_one(
-            {"m2_id": m2_id},
-            {"$set": update_data}
-        )
-        
-        if result.matched_count == 0:
+        # A quantity edit on a sharded item is written to its shards
+        found = await StockShardService(Database.get_instance()).update_item("M2s", "m2_id", m2_id, update_data)
+        if not found:
             raise ValueError(f"M.2 drive with id {m2_id} not found")
+        invalidate_price("M2s", "m2_id", m2_id)
+        invalidate_inventory_summary("M2s")
+        if "quantity" in update_data:
+            # A restock reopens a sold-out flash sale in this process straight away
+            await FlashSaleService(Database.get_instance()).refresh([("M2s", "m2_id", m2_id)])
         return {"message": "M.2 drive updated successfully"}
 
     async def delete_m2(self, m2_id: int):
@@ -119,4 +139,6 @@ class StorageController:
         result = await self.m2_collection.delete_one({"m2_id": m2_id})
         if result.deleted_count == 0:
             raise ValueError(f"M.2 drive with id {m2_id} not found")
+        invalidate_price("M2s", "m2_id", m2_id)
+        invalidate_inventory_summary("M2s")
         return {"message": "M.2 drive deleted successfully", "m2_id": m2_id}
@@ -0,0 +1,27 @@
+"""
+Rebuild the sales_daily rollup from the orders collection.
+
+Usage: python -m src.database.backfill_sales_daily
+"""
+import asyncio
+import logging
+from src.database.database import Database
+from src.services.sales_rollup_service import SalesRollupService
+from src.utils.log import setup_logging, shutdown_logging
+
+logger = logging.getLogger(__name__)
+
+async def main() -> None:
+    database = Database.get_instance()
+    try:
+        days = await SalesRollupService(database).backfill()
+        logger.info("Rebuilt sales_daily", extra={"days": days})
+    finally:
+        Database.close_connection()
+
+if __name__ == "__main__":
+    setup_logging()
+    try:
+        asyncio.run(main())
+    finally:
+        shutdown_logging()
@@ -0,0 +1,105 @@
+"""
+Measure access token verification cost for HS256, RS256 and ES256: a bare
+jwt.decode with the key already in hand, and the full path of reading the
+token's `kid` header and looking its key up in the signing key ring (the
+keys published in the JWKS) before decoding.
+
+Keys are generated into a temporary directory for the run; needs no
+database.
+
+Usage: python -m src.database.benchmark_jwt_decode [--iterations 2000] [--rsa-bits 2048]
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+from typing import Callable, Dict
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from jose import jwt
+from src.config import settings
+from src.utils.log import setup_logging, shutdown_logging
+from src.utils.signing_keys import SigningKeys, uses_signing_keys
+
+logger = logging.getLogger(__name__)
+
+KID = "benchmark"
+CLAIMS = {"sub": "10001", "role": "user", "exp": 4102444800}
+
+def write_private_key(keys_dir: str, algorithm: str, rsa_bits: int) -> None:
+    if algorithm == "RS256":
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=rsa_bits)
+    else:
+        private_key = ec.generate_private_key(ec.SECP256R1())
+    pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption()
+    )
+    with open(os.path.join(keys_dir, f"{KID}.pem"), "wb") as f:
+        f.write(pem)
+
+def time_per_call(call: Callable[[], object], iterations: int) -> float:
+    """Seconds per call, after a short warm-up"""
+    for _ in range(min(iterations, 50)):
+        call()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        call()
+    return (time.perf_counter() - started) / iterations
+
+def decodes(algorithm: str, iterations: int, rsa_bits: int) -> Dict:
+    settings.JWT_ALGORITHM = algorithm
+    with tempfile.TemporaryDirectory() as keys_dir:
+        if uses_signing_keys():
+            settings.JWT_KEYS_DIR, settings.JWT_ACTIVE_KID = keys_dir, ""
+            write_private_key(keys_dir, algorithm, rsa_bits)
+            key_ring = SigningKeys()
+            kid, signing_key = key_ring.signing_key()
+            token = jwt.encode(CLAIMS, signing_key, algorithm=algorithm, headers={"kid": kid})
+            key = key_ring.verification_key(kid)
+
+            def lookup_and_decode():
+                verification_key = key_ring.verification_key(jwt.get_unverified_header(token).get("kid"))
+                return jwt.decode(token, verification_key, algorithms=[algorithm])
+        else:
+            key = settings.JWT_SECRET_KEY
+            token = jwt.encode(CLAIMS, key, algorithm=algorithm)
+
+            def lookup_and_decode():
+                return jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[algorithm])
+
+        decode_only = time_per_call(lambda: jwt.decode(token, key, algorithms=[algorithm]), iterations)
+        with_lookup = time_per_call(lookup_and_decode, iterations)
+
+    return {
+        "algorithm": algorithm,
+        "token_bytes": len(token),
+        "decode_us": decode_only * 1e6,
+        "decode_per_second": 1 / decode_only,
+        "lookup_decode_us": with_lookup * 1e6,
+        "lookup_decode_per_second": 1 / with_lookup
+    }
+
+def main(iterations: int, rsa_bits: int) -> None:
+    results = [decodes(algorithm, iterations, rsa_bits) for algorithm in ("HS256", "RS256", "ES256")]
+
+    print(f"{'algorithm':<10}{'token bytes':>12}{'decode us':>11}{'decodes/s':>11}{'lookup+decode us':>18}{'decodes/s':>11}")
+    for result in results:
+        print(
+            f"{result['algorithm']:<10}{result['token_bytes']:>12}{result['decode_us']:>11.1f}"
+            f"{result['decode_per_second']:>11.0f}{result['lookup_decode_us']:>18.1f}{result['lookup_decode_per_second']:>11.0f}"
+        )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="JWT verification cost per signing algorithm, with and without the key lookup")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--rsa-bits", type=int, default=2048)
+    args = parser.parse_args()
+
+    setup_logging()
+    try:
+        main(args.iterations, args.rsa_bits)
+    finally:
+        shutdown_logging()
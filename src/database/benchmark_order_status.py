@@ -0,0 +1,185 @@
+"""
+Compare order status updates on the old read-then-write path (find_one,
+then update_one, then reading the order again after commit) with the
+current single find_one_and_update(ReturnDocument.BEFORE) path, and count
+how often each one refreshes the stock caches (inventory totals and
+flash-sale tokens).
+
+Every order goes through rounds of Confirmed, Delivered, Cancelled and
+Pending, so half of the updates move stock. The old path refreshed the
+caches after every update, the current one only after those.
+
+Needs MongoDB running as a replica set (for transactions). Scratch orders
+99900-99999 and parts with IDs ending in 998 are created for the run and
+deleted afterwards, together with their order events.
+
+Usage: python -m src.database.benchmark_order_status [--orders 50] [--rounds 5] [--concurrency 20]
+"""
+import argparse
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict
+from motor.motor_asyncio import AsyncIOMotorClientSession
+from src.database.database import Database
+from src.models.order_models import Order
+from src.services.inventory_summary_service import invalidate_inventory_summary
+from src.services.order_event_service import order_event
+from src.services.order_service import OrderService
+from src.utils.log import setup_logging, shutdown_logging
+from src.utils.metrics import metrics
+from src.utils.transactions import run_in_transaction
+
+logger = logging.getLogger(__name__)
+
+FIRST_ORDER_ID = 99900
+MAX_ORDERS = 100
+STATUS_ROUND = ["Confirmed", "Delivered", "Cancelled", "Pending"]
+PARTS = {
+    "CPUs": ("cpu_id", 19998),
+    "Rams": ("ram_id", 29998),
+    "Mainboards": ("mainboard_id", 39998),
+    "GPUs": ("gpu_id", 59998),
+    "Cases": ("case_id", 69998),
+    "PSUs": ("psu_id", 79998),
+}
+
+def scratch_order(order_id: int) -> Dict:
+    return Order(
+        order_id=order_id,
+        user_id=19998,
+        order_date=datetime.now(timezone.utc),
+        total_price=6,
+        status="Pending",
+        order_details={id_field: item_id for id_field, item_id in PARTS.values()},
+        shipping_details={
+            "user_id": 19998, "name": "Benchmark", "phone": "0000000000", "email": "bench@example.com",
+            "shipping_address": "-", "shipping_status": "Pending", "note": None
+        }
+    ).model_dump()
+
+async def read_then_write(order_service: OrderService, order_id: int, status: str) -> Order:
+    """update_order_status as it was before it returned the order from its write"""
+    collection = await order_service.db.get_collection(order_service.collection)
+
+    async def update(session: AsyncIOMotorClientSession) -> None:
+        current_order = Order(**await collection.find_one({"order_id": order_id}, session=session))
+        computer_sets = [build.model_dump() for build in current_order.all_builds()]
+
+        if status == "Cancelled" and current_order.status != "Cancelled":
+            await order_service.restore_inventory(computer_sets, session)
+            await order_service.sales_rollup_service.record([current_order], -1, session)
+        if current_order.status == "Cancelled" and status != "Cancelled":
+            await order_service.check_and_update_inventory(computer_sets, session)
+            await order_service.sales_rollup_service.record([current_order], 1, session)
+
+        await collection.update_one({"order_id": order_id}, {"$set": {"status": status}}, session=session)
+
+        if current_order.status != status:
+            await order_service.event_service.append([order_event(
+                "order.status_changed", order_id, current_order.user_id,
+                {"from": current_order.status, "to": status}
+            )], session)
+
+    await run_in_transaction(order_service.db._client, update, name="benchmark_read_then_write")
+    metrics.increment("benchmark.stock_refreshes")
+    invalidate_inventory_summary()
+    await order_service.flash_sale_service.refresh()
+    return await order_service.get_order(order_id)
+
+async def run_updates(
+    name: str,
+    update_status: Callable[[int, str], Awaitable[Order]],
+    orders: int,
+    rounds: int,
+    concurrency: int
+) -> Dict:
+    """Take every order through `rounds` status rounds, `concurrency` orders at a time"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def cycle(order_id: int) -> None:
+        async with semaphore:
+            for status in STATUS_ROUND * rounds:
+                started = time.perf_counter()
+                await update_status(order_id, status)
+                latencies.append(time.perf_counter() - started)
+
+    metrics.reset()
+    started = time.perf_counter()
+    await asyncio.gather(*(cycle(FIRST_ORDER_ID + offset) for offset in range(orders)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "run": name,
+        "updates": len(latencies),
+        "updates_per_second": len(latencies) / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)] * 1000,
+        "stock_refreshes": metrics.get("benchmark.stock_refreshes")
+    }
+
+async def main(orders: int, rounds: int, concurrency: int) -> None:
+    database = Database.get_instance()
+    order_service = OrderService(database)
+    orders_collection = await Database.get_collection(order_service.collection)
+    order_ids = list(range(FIRST_ORDER_ID, FIRST_ORDER_ID + orders))
+
+    stock_changed = order_service._stock_changed
+
+    async def counted_stock_changed(computer_sets) -> None:
+        metrics.increment("benchmark.stock_refreshes")
+        await stock_changed(computer_sets)
+
+    order_service._stock_changed = counted_stock_changed
+
+    if await orders_collection.count_documents({"order_id": {"$in": order_ids}}):
+        Database.close_connection()
+        raise SystemExit(f"Orders {FIRST_ORDER_ID}-{FIRST_ORDER_ID + orders - 1} already exist; not overwriting them")
+    try:
+        for collection_name, (id_field, item_id) in PARTS.items():
+            collection = await Database.get_collection(collection_name)
+            await collection.delete_one({id_field: item_id})
+            await collection.insert_one({id_field: item_id, "title": "Benchmark part", "price": 1, "quantity": orders})
+        await orders_collection.insert_many([scratch_order(order_id) for order_id in order_ids])
+
+        results = [
+            await run_updates(
+                "read_then_write",
+                lambda order_id, status: read_then_write(order_service, order_id, status),
+                orders, rounds, concurrency
+            ),
+            await run_updates("find_one_and_update", order_service.update_order_status, orders, rounds, concurrency),
+        ]
+
+        print(f"{'run':<22}{'updates':>9}{'updates/s':>11}{'p50 ms':>9}{'p99 ms':>9}{'stock refreshes':>17}")
+        for result in results:
+            print(
+                f"{result['run']:<22}{result['updates']:>9}{result['updates_per_second']:>11.1f}"
+                f"{result['p50_ms']:>9.1f}{result['p99_ms']:>9.1f}{result['stock_refreshes']:>17}"
+            )
+    finally:
+        await orders_collection.delete_many({"order_id": {"$in": order_ids}, "user_id": 19998})
+        order_events = await Database.get_collection("order_events")
+        await order_events.delete_many({"order_id": {"$in": order_ids}, "user_id": 19998})
+        for collection_name, (id_field, item_id) in PARTS.items():
+            collection = await Database.get_collection(collection_name)
+            await collection.delete_one({id_field: item_id})
+        Database.close_connection()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Order status update throughput and stock cache refreshes, old and new path")
+    parser.add_argument("--orders", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    if not 1 <= args.orders <= MAX_ORDERS:
+        parser.error(f"--orders must be between 1 and {MAX_ORDERS}")
+
+    setup_logging()
+    try:
+        asyncio.run(main(args.orders, args.rounds, args.concurrency))
+    finally:
+        shutdown_logging()
@@ -0,0 +1,85 @@
+"""
+Measure password verification throughput and latency for combinations of
+scrypt cost (PASSWORD_SCRYPT_N/R/P) and hashing threads
+(PASSWORD_HASH_WORKERS), with many logins verifying at once.
+
+Latency includes the wait for a hashing slot; verifies that wait longer
+than PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS are shed with a 503 and counted.
+Runs PasswordService on its own and needs no database.
+
+Usage: python -m src.database.benchmark_password_hashing [--n 16384 32768] [--r 8] [--p 1] [--workers 1 2 4] [--verifies 200] [--concurrency 32]
+"""
+import argparse
+import asyncio
+import itertools
+import logging
+import time
+from typing import Dict, List
+from fastapi import HTTPException
+from src.config import settings
+from src.services.password_service import PasswordService
+from src.utils.log import setup_logging, shutdown_logging
+
+logger = logging.getLogger(__name__)
+
+PASSWORD = "benchmark-password"
+
+async def verifies(n: int, r: int, p: int, workers: int, total: int, concurrency: int) -> Dict:
+    """Verify one stored hash `total` times, `concurrency` logins at a time"""
+    settings.PASSWORD_SCRYPT_N, settings.PASSWORD_SCRYPT_R, settings.PASSWORD_SCRYPT_P = n, r, p
+    settings.PASSWORD_HASH_WORKERS = workers
+    password_service = PasswordService()
+    stored = await password_service.hash(PASSWORD)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    shed = 0
+
+    async def login() -> None:
+        nonlocal shed
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await password_service.verify(PASSWORD, stored)
+                latencies.append(time.perf_counter() - started)
+            except HTTPException:
+                shed += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(total)))
+    elapsed = time.perf_counter() - started
+    password_service._executor.shutdown()
+
+    latencies.sort()
+    return {
+        "n": n, "r": r, "p": p, "workers": workers,
+        "verified": len(latencies),
+        "shed": shed,
+        "hashes_per_second": len(latencies) / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000 if latencies else 0.0,
+        "p99_ms": latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)] * 1000 if latencies else 0.0
+    }
+
+async def main(ns: List[int], rs: List[int], ps: List[int], workers: List[int], total: int, concurrency: int) -> None:
+    print(f"{'N':>7}{'r':>4}{'p':>4}{'workers':>9}{'verified':>10}{'shed':>6}{'hashes/s':>10}{'p50 ms':>9}{'p99 ms':>9}")
+    for n, r, p, worker_count in itertools.product(ns, rs, ps, workers):
+        result = await verifies(n, r, p, worker_count, total, concurrency)
+        print(
+            f"{result['n']:>7}{result['r']:>4}{result['p']:>4}{result['workers']:>9}{result['verified']:>10}"
+            f"{result['shed']:>6}{result['hashes_per_second']:>10.1f}{result['p50_ms']:>9.1f}{result['p99_ms']:>9.1f}"
+        )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Password verification throughput and latency per scrypt cost and worker count")
+    parser.add_argument("--n", type=int, nargs="+", default=[settings.PASSWORD_SCRYPT_N])
+    parser.add_argument("--r", type=int, nargs="+", default=[settings.PASSWORD_SCRYPT_R])
+    parser.add_argument("--p", type=int, nargs="+", default=[settings.PASSWORD_SCRYPT_P])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--verifies", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    setup_logging()
+    try:
+        asyncio.run(main(args.n, args.r, args.p, args.workers, args.verifies, args.concurrency))
+    finally:
+        shutdown_logging()
@@ -0,0 +1,96 @@
+"""
+Measure write conflicts of concurrent checkouts of one hot item, first with
+its stock in `quantity` and then split across stock shards.
+
+Needs MongoDB running as a replica set (for transactions). A scratch GPU
+with ID 59999 is created for the run and deleted afterwards.
+
+Usage: python -m src.database.benchmark_stock_shards [--orders 500] [--concurrency 50] [--shards 8]
+"""
+import argparse
+import asyncio
+import logging
+import time
+from typing import Dict
+from fastapi import HTTPException
+from src.database.database import Database
+from src.services.order_service import OrderService
+from src.services.stock_shard_service import StockShardService
+from src.utils.log import setup_logging, shutdown_logging
+from src.utils.metrics import metrics
+from src.utils.transactions import run_in_transaction
+
+logger = logging.getLogger(__name__)
+
+COLLECTION, ID_FIELD, ITEM_ID = "GPUs", "gpu_id", 59999
+
+async def checkouts(database: Database, orders: int, concurrency: int, name: str) -> Dict:
+    """Take one unit per order, `concurrency` transactions at a time"""
+    order_service = OrderService(database)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def checkout() -> bool:
+        async with semaphore:
+            try:
+                await run_in_transaction(
+                    database._client,
+                    lambda session: order_service.check_and_update_inventory({ID_FIELD: ITEM_ID}, session),
+                    name=name
+                )
+                return True
+            except HTTPException:
+                return False
+
+    started = time.perf_counter()
+    committed = sum(await asyncio.gather(*(checkout() for _ in range(orders))))
+    elapsed = time.perf_counter() - started
+
+    conflicts = metrics.get(f"transactions.{name}.retries") + metrics.get(f"transactions.{name}.exhausted")
+    attempts = orders + metrics.get(f"transactions.{name}.retries")
+    return {
+        "run": name,
+        "orders": orders,
+        "committed": committed,
+        "conflicts": conflicts,
+        "conflict_rate": conflicts / attempts,
+        "orders_per_second": committed / elapsed
+    }
+
+async def main(orders: int, concurrency: int, shards: int) -> None:
+    database = Database.get_instance()
+    collection = await Database.get_collection(COLLECTION)
+    stock_shard_service = StockShardService(database)
+    try:
+        await collection.delete_one({ID_FIELD: ITEM_ID})
+        # Enough stock for every order, so only conflicts can fail a checkout
+        await collection.insert_one({ID_FIELD: ITEM_ID, "title": "Benchmark GPU", "price": 1, "quantity": orders})
+        results = [await checkouts(database, orders, concurrency, "benchmark_unsharded")]
+
+        await collection.update_one({ID_FIELD: ITEM_ID}, {"$set": {"quantity": orders}})
+        await stock_shard_service.enable(ID_FIELD, ITEM_ID, shards)
+        results.append(await checkouts(database, orders, concurrency, f"benchmark_{shards}_shards"))
+
+        print(f"{'run':<24}{'committed':>10}{'conflicts':>11}{'conflict rate':>15}{'orders/s':>10}")
+        for result in results:
+            print(
+                f"{result['run']:<24}{result['committed']:>10}{result['conflicts']:>11}"
+                f"{result['conflict_rate']:>15.1%}{result['orders_per_second']:>10.1f}"
+            )
+    finally:
+        shards_collection = await Database.get_collection(stock_shard_service.collection)
+        await shards_collection.delete_many({"collection": COLLECTION, "id_field": ID_FIELD, "item_id": ITEM_ID})
+        await collection.delete_one({ID_FIELD: ITEM_ID})
+        Database.close_connection()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Checkout conflict rate with and without stock shards")
+    parser.add_argument("--orders", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--shards", type=int, default=8)
+    args = parser.parse_args()
+
+    setup_logging()
+    try:
+        asyncio.run(main(args.orders, args.concurrency, args.shards))
+    finally:
+        shutdown_logging()
@@ -3,10 +3,13 @@ from typing import Optional
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase, AsyncIOMotorCollection
 from dotenv import load_dotenv
 import atexit
+import logging
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 class Database:
     _instance = None
     _client: Optional[AsyncIOMotorClient] = None
@@ -38,10 +41,10 @@ class Database:
             self._client = AsyncIOMotorClient(mongo_uri)
             self._db = self._client['mydatabase']
 
-            print("Successfully connected to MongoDB")
+            logger.info("Successfully connected to MongoDB")
 
-        except Exception as e:
-            print(f"Failed to connect to MongoDB: {e}")
+        except Exception:
+            logger.exception("Failed to connect to MongoDB")
             raise
 
     @classmethod
@@ -67,7 +70,7 @@ class Database:
             instance._client.close()
             instance._client = None
             instance._db = None
-            print("MongoDB connection closed")
+            logger.info("MongoDB connection closed")
 
     @classmethod
     async def is_connected(cls) -> bool:
@@ -96,13 +99,15 @@ class Database:
 if __name__ == "__main__":
     import asyncio
     
+    logging.basicConfig(level=logging.INFO)
+    
     async def main():
         db_instance = Database.get_instance()
         if await db_instance.is_connected():
             db = db_instance.get_database()
             collections = await db.list_collection_names()
-            print("Collections in the database:", collections)
+            logger.info("Collections in the database: %s", collections)
         else:
-            print("Database is not connected")
+            logger.warning("Database is not connected")
     
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,95 @@
+from pymongo import ASCENDING, DESCENDING
+from src.config import settings
+from src.database.database import Database
+from src.services.inventory import PART_COLLECTIONS
+
+async def ensure_indexes() -> None:
+    """
+    Create the indexes the services rely on. Safe to run on every startup,
+    MongoDB skips indexes that already exist.
+    """
+    orders = await Database.get_collection("orders")
+    # Order IDs are allocated from the latest one; the index turns a collision into a DuplicateKeyError
+    await orders.create_index("order_id", unique=True)
+    # Order history: one user's orders, newest first
+    await orders.create_index([("user_id", ASCENDING), ("order_date", DESCENDING), ("order_id", DESCENDING)])
+    # Admin order search: each equality filter followed by the newest-first sort
+    await orders.create_index([("order_date", DESCENDING), ("order_id", DESCENDING)])
+    await orders.create_index([("status", ASCENDING), ("order_date", DESCENDING), ("order_id", DESCENDING)])
+    await orders.create_index([("shipping_details.shipping_status", ASCENDING), ("order_date", DESCENDING), ("order_id", DESCENDING)])
+    await orders.create_index([("shipping_details.email", ASCENDING), ("order_date", DESCENDING), ("order_id", DESCENDING)])
+    await orders.create_index("total_price")
+
+    reservations = await Database.get_collection("reservations")
+    await reservations.create_index("reservation_id", unique=True)
+    await reservations.create_index([("status", ASCENDING), ("expires_at", ASCENDING)])
+    # Purge finished holds some time after they lapse; stock is returned by the sweeper
+    await reservations.create_index(
+        "expires_at",
+        name="expires_at_ttl",
+        expireAfterSeconds=settings.RESERVATION_PURGE_AFTER_SECONDS
+    )
+
+    idempotency_keys = await Database.get_collection("idempotency_keys")
+    await idempotency_keys.create_index([("user_id", ASCENDING), ("key", ASCENDING)], unique=True)
+    await idempotency_keys.create_index(
+        "created_at",
+        name="created_at_ttl",
+        expireAfterSeconds=settings.IDEMPOTENCY_TTL_SECONDS
+    )
+
+    order_intake = await Database.get_collection("order_intake")
+    await order_intake.create_index("intake_id", unique=True)
+    await order_intake.create_index([("status", ASCENDING), ("created_at", ASCENDING)])
+
+    order_events = await Database.get_collection("order_events")
+    await order_events.create_index([("order_id", ASCENDING), ("_id", ASCENDING)])
+    await order_events.create_index("seq", unique=True)
+    await order_events.create_index(
+        "created_at",
+        name="created_at_ttl",
+        expireAfterSeconds=settings.ORDER_EVENTS_RETENTION_DAYS * 24 * 60 * 60
+    )
+
+    order_event_checkpoints = await Database.get_collection("order_event_checkpoints")
+    await order_event_checkpoints.create_index("consumer", unique=True)
+
+    refresh_tokens = await Database.get_collection("refresh_tokens")
+    await refresh_tokens.create_index("token_hash", unique=True)
+    await refresh_tokens.create_index("family_id")
+    await refresh_tokens.create_index("user_id")
+    await refresh_tokens.create_index("expires_at", name="expires_at_ttl", expireAfterSeconds=0)
+
+    # Revoked access token IDs, and per-user revocation cut-offs
+    revoked_tokens = await Database.get_collection("revoked_tokens")
+    await revoked_tokens.create_index("jti", unique=True, partialFilterExpression={"jti": {"$exists": True}})
+    await revoked_tokens.create_index("user_id", unique=True, partialFilterExpression={"user_id": {"$exists": True}})
+    await revoked_tokens.create_index("expires_at", name="expires_at_ttl", expireAfterSeconds=0)
+
+    sales_daily = await Database.get_collection("sales_daily")
+    await sales_daily.create_index("day")
+
+    api_keys = await Database.get_collection("api_keys")
+    await api_keys.create_index("key_id", unique=True)
+    await api_keys.create_index("key_hash", unique=True)
+
+    # Shared rate limit windows (RATE_LIMIT_BACKEND=mongo)
+    rate_limits = await Database.get_collection("rate_limits")
+    await rate_limits.create_index("expires_at", name="expires_at_ttl", expireAfterSeconds=0)
+
+    # Low-stock report: only items running low are indexed
+    for collection_name in PART_COLLECTIONS.values():
+        parts = await Database.get_collection(collection_name)
+        await parts.create_index(
+            "quantity",
+            name="quantity_low_stock",
+            partialFilterExpression={"quantity": {"$lt": settings.LOW_STOCK_INDEX_THRESHOLD}}
+        )
+        # Flash-sale items, re-read by every process every FLASH_SALE_SYNC_INTERVAL_SECONDS
+        await parts.create_index("flash_sale", partialFilterExpression={"flash_sale": True})
+
+    stock_shards = await Database.get_collection("stock_shards")
+    await stock_shards.create_index(
+        [("collection", ASCENDING), ("id_field", ASCENDING), ("item_id", ASCENDING), ("shard", ASCENDING)],
+        unique=True
+    )
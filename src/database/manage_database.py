@@ -2,6 +2,7 @@
 #. Read json Data from file and then add to database
 import os
 import json
+import logging
 import pandas as pd
 from pathlib import Path
 from typing import List, Union, Dict
@@ -10,6 +11,8 @@ from src.models.hardware_models import CPU, Ram, Mainboard, SSD, M2, GPU, Case,
 from config import BaseConfig
 from database import Database
 
+logger = logging.getLogger(__name__)
+
 class HardwareManager:
     def __init__(self):
         self.CPU_collection = Database.get_collection('CPUs')
@@ -25,8 +28,8 @@ class HardwareManager:
         try:
             with open(cpu_file_path, "r", encoding="utf-8") as file:
                 cpu_data = json.load(file)
-        except Exception as e:
-            print(f"Error reading file {cpu_file_path}: {e}")
+        except Exception:
+            logger.exception("Error reading file %s", cpu_file_path)
             return
 
         valid_cpus = []
@@ -38,18 +41,18 @@ class HardwareManager:
                 validated_cpu = CPU(**cpu)
                 valid_cpus.append(validated_cpu.model_dump())
             except Exception as e:
-                print(f"Invalid data: {cpu} - Error: {e}")
+                logger.warning("Invalid data: %s - Error: %s", cpu, e)
 
         if valid_cpus:
             self.CPU_collection.insert_many(valid_cpus)
-            print(f"Inserted {len(valid_cpus)} cpus into MongoDB.")
+            logger.info("Inserted %d cpus into MongoDB", len(valid_cpus))
     
     def add_ram(self, ram_file_path):
         try:
             with open(ram_file_path, "r", encoding="utf-8") as file:
                 ram_data =json.load(file)
-        except Exception as e:
-            print(f"Error reading file {ram_file_path}: {e}")
+        except Exception:
+            logger.exception("Error reading file %s", ram_file_path)
 
         valid_rams = []
 
@@ -66,11 +69,11 @@ class HardwareManager:
                 validated_ram = Ram(**ram)
                 valid_rams.append(validated_ram.model_dump())
             except Exception as e:
-                print(f"Invalid data: {ram} - Error: {e}")
+                logger.warning("Invalid data: %s - Error: %s", ram, e)
 
         if valid_rams:
             self.Ram_collection.insert_many(valid_rams)
-            print(f"Inserted {len(valid_rams)} rams into MongoDB.")
+            logger.info("Inserted %d rams into MongoDB", len(valid_rams))
 
 class HardwareManager:
     def __init__(self):
@@ -87,8 +90,8 @@ class HardwareManager:
         try:
             with open(cpu_file_path, "r", encoding="utf-8") as file:
                 cpu_data = json.load(file)
-        except Exception as e:
-            print(f"Error reading file {cpu_file_path}: {e}")
+        except Exception:
+            logger.exception("Error reading file %s", cpu_file_path)
             return
 
         valid_cpus = []
@@ -100,18 +103,18 @@ class HardwareManager:
                 validated_cpu = CPU(**cpu)
                 valid_cpus.append(validated_cpu.model_dump())
             except Exception as e:
-                print(f"Invalid data: {cpu} - Error: {e}")
+                logger.warning("Invalid data: %s - Error: %s", cpu, e)
 
         if valid_cpus:
             self.CPU_collection.insert_many(valid_cpus)
-            print(f"Inserted {len(valid_cpus)} cpus into MongoDatabase.get_collection(")
+            logger.info("Inserted %d cpus into MongoDB", len(valid_cpus))
     
     def add_ram(self, ram_file_path):
         try:
             with open(ram_file_path, "r", encoding="utf-8") as file:
                 ram_data =json.load(file)
-        except Exception as e:
-            print(f"Error reading file {ram_file_path}: {e}")
+        except Exception:
+            logger.exception("Error reading file %s", ram_file_path)
 
         valid_rams = []
 
@@ -128,18 +131,18 @@ class HardwareManager:
                 validated_ram = Ram(**ram)
                 valid_rams.append(validated_ram.model_dump())
             except Exception as e:
-                print(f"Invalid data: {ram} - Error: {e}")
+                logger.warning("Invalid data: %s - Error: %s", ram, e)
 
         if valid_rams:
             self.Ram_collection.insert_many(valid_rams)
-            print(f"Inserted {len(valid_rams)} rams into MongoDatabase.get_collection(")
+            logger.info("Inserted %d rams into MongoDB", len(valid_rams))
     
     def add_mainboard(self, mainboard_file_path):
         try:
             with open(mainboard_file_path, "r", encoding="utf-8") as file:
                 mainboard_data = json.load(file)
-        except Exception as e:
-            print(f"Error reading file {mainboard_file_path}: {e}")
+        except Exception:
+            logger.exception("Error reading file %s", mainboard_file_path)
 
         valid_mbs = []
 
@@ -150,18 +153,18 @@ class HardwareManager:
                 validated_mb = Mainboard(**mb)
                 valid_mbs.append(validated_mb.model_dump())
             except Exception as e:
-                print(f"Invalid data: {mb} - Error: {e}")
+                logger.warning("Invalid data: %s - Error: %s", mb, e)
 
         if valid_mbs:
             self.Mainboard_collection.insert_many(valid_mbs)
-            print(f"Inserted {len(valid_mbs)} Mainboard into MongoDatabase.get_collection(")
+            logger.info("Inserted %d Mainboard into MongoDB", len(valid_mbs))
 
     def add_ssd(self, ssd_file_path):
         try:
             with open(ssd_file_path, 'r', encoding="utf-8") as file:
                 ssd_data = json.load(file)
-        except Exception as e:
-            print(f"Error reading file {ssd_file_path}: {e}")
+        except Exception:
+            logger.exception("Error reading file %s", ssd_file_path)
 
         
         valid_ssds = []
@@ -174,18 +177,18 @@ class HardwareManager:
                 validated_ssd = SSD(**ssd)
                 valid_ssds.append(validated_ssd.model_dump())
             except Exception as e:
-                print(f"Invalid data: {ssd} - Error: {e}")
+                logger.warning("Invalid data: %s - Error: %s", ssd, e)
 
         if valid_ssds:
             self.SSD_collection.insert_many(valid_ssds)
-            print(f"Inserted {len(valid_ssds)} SSD into MongoDatabase.get_collection(")
+            logger.info("Inserted %d SSD into MongoDB", len(valid_ssds))
 
     def add_m2(self, m2_file_path):
             try:
                 with open(m2_file_path, 'r', encoding="utf-8") as file:
                     m2_data = json.load(file)
-            except Exception as e:
-                print(f"Error reading file {m2_file_path}: {e}")
+            except Exception:
+                logger.exception("Error reading file %s", m2_file_path)
 
             
             valid_m2s = []
@@ -198,18 +201,18 @@ class HardwareManager:
                     validated_m2 = M2(**m2)
                     valid_m2s.append(validated_m2.model_dump())
                 except Exception as e:
-                    print(f"Invalid data: {m2} - Error: {e}")
+                    logger.warning("Invalid data: %s - Error: %s", m2, e)
 
             if valid_m2s:
                 self.M2_collection.insert_many(valid_m2s)
-                print(f"Inserted {len(valid_m2s)} M2 into MongoDatabase.get_collection(")
+                logger.info("Inserted %d M2 into MongoDB", len(valid_m2s))
 
     def add_gpu(self, gpu_file_path):
             try:
                 with open(gpu_file_path, 'r', encoding="utf-8") as file:
                     gpu_data = json.load(file)
-            except Exception as e:
-                print(f"Error reading file {gpu_file_path}: {e}")
+            except Exception:
+                logger.exception("Error reading file %s", gpu_file_path)
 
             
             valid_gpus = []
@@ -221,18 +224,18 @@ class HardwareManager:
                     validated_gpu = GPU(**gpu)
                     valid_gpus.append(validated_gpu.model_dump())
                 except Exception as e:
-                    print(f"Invalid data: {gpu} - Error: {e}")
+                    logger.warning("Invalid data: %s - Error: %s", gpu, e)
 
             if valid_gpus:
                 self.GPU_collection.insert_many(valid_gpus)
-                print(f"Inserted {len(valid_gpus)} GPU into MongoDatabase.get_collection(")
+                logger.info("Inserted %d GPU into MongoDB", len(valid_gpus))
 
     def add_case(self, case_file_path):
         try:
             with open(case_file_path, 'r', encoding="utf-8") as file:
                 case_data = json.load(file)
-        except Exception as e:
-            print(f"Error reading file {case_file_path}: {e}")
+        except Exception:
+            logger.exception("Error reading file %s", case_file_path)
 
         
         valid_cases = []
@@ -243,23 +246,23 @@ class HardwareManager:
             try:
                 case['support_mb'] = case['support_mb'].split(' , ')
             except Exception as e:
-                print(f"Unexpected error: {e} - case: {case}")
+                logger.warning("Unexpected error: %s - case: %s", e, case)
             try:
                 validated_case = Case(**case)
                 valid_cases.append(validated_case.model_dump())
             except Exception as e:
-                print(f"Invalid data: {case} - Error: {e}")
+                logger.warning("Invalid data: %s - Error: %s", case, e)
 
         if valid_cases:
             self.Case_collection.insert_many(valid_cases)
-            print(f"Inserted {len(valid_cases)} case into MongoDatabase.get_collection(")
+            logger.info("Inserted %d case into MongoDB", len(valid_cases))
 
     def add_psu(self, psu_file_path):
         try:
             with open(psu_file_path, 'r', encoding="utf-8") as file:
                 psu_data = json.load(file)
-        except Exception as e:
-            print(f"Error reading file {psu_file_path}: {e}")
+        except Exception:
+            logger.exception("Error reading file %s", psu_file_path)
 
         
         valid_psus = []
@@ -272,8 +275,8 @@ class HardwareManager:
                 validated_psu = PSU(**psu)
                 valid_psus.append(validated_psu.model_dump())
             except Exception as e:
-                print(f"Invalid data: {psu} - Error: {e}")
+                logger.warning("Invalid data: %s - Error: %s", psu, e)
 
         if valid_psus:
             self.PSU_collection.insert_many(valid_psus)
-            print(f"Inserted {len(valid_psus)} Psu into MongoDatabase.get_collection(")
+            logger.info("Inserted %d Psu into MongoDB", len(valid_psus))
@@ -10,7 +10,12 @@ from .hardware_models import (
 )
 
 from .order_models import (
-    ComputerSet, ShippingDetails, Order
+    ComputerSet, OrderItemPrice, ShippingDetails, Order, OrderPage,
+    BulkStatusUpdate, BulkShippingUpdate
+)
+
+from .reservation_models import (
+    ReservationItem, ReservationRequest, Reservation
 )
 
 __all__ = [
@@ -22,5 +27,7 @@ __all__ = [
     'GPU', 'UpdateGPU',
     'Case', 'UpdateCase',
     'PSU', 'UpdatePSU',
-    'ComputerSet', 'ShippingDetails', 'Order'
+    'ComputerSet', 'OrderItemPrice', 'ShippingDetails', 'Order', 'OrderPage',
+    'BulkStatusUpdate', 'BulkShippingUpdate',
+    'ReservationItem', 'ReservationRequest', 'Reservation'
 ] 
\ No newline at end of file
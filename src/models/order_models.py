@@ -11,6 +11,13 @@ class ComputerSet(BaseModel):
     psu_id: int = Field(..., description="PSU ID must start with 7 and have 5 digits")
     ssd_id: Optional[int] = None
     m2_id: Optional[int] = None
+    quantity: int = Field(1, ge=1, description="Number of identical builds of this computer set")
+
+class OrderItemPrice(BaseModel):
+    id_field: str = Field(..., description="part field of the item, e.g. cpu_id")
+    item_id: int = Field(..., description="item ID")
+    quantity: int = Field(..., ge=1, description="units of the item across all builds")
+    unit_price: int = Field(..., ge=0, description="catalog price of one unit when the order was placed")
 
 class ShippingDetails(BaseModel):
     user_id: int = Field(..., description="User ID must start with 1 and have 5 digits")
@@ -28,7 +35,10 @@ class Order(BaseModel):
     total_price: int = Field(..., ge=0, description="Total price must be non-negative")
     status: str = Field(..., description="Order status must be either 'Pending', 'Confirmed', 'Delivered', or 'Cancelled'")
     order_details: ComputerSet = Field(..., description="computer sets in the order")
+    builds: List[ComputerSet] = Field(default_factory=list, description="additional computer sets in the order")
     shipping_details: ShippingDetails = Field(..., description="shipping details of the order")
+    reservation_id: Optional[str] = Field(None, description="stock reservation confirmed by this order")
+    item_prices: List[OrderItemPrice] = Field(default_factory=list, description="unit prices the order was charged at")
 
     @field_validator('order_id')
     def check_order_id(cls, value):
@@ -41,4 +51,21 @@ class Order(BaseModel):
         if not (10000 <= value <= 19999):
             raise ValueError('User ID must start with 1 and have 5 digits')
         return value
-    
+
+    def all_builds(self) -> List[ComputerSet]:
+        """Return every computer set in the order, starting with order_details"""
+        return [self.order_details, *self.builds]
+
+class OrderPage(BaseModel):
+    items: List[Order] = Field(..., description="orders on this page, newest first")
+    next_cursor: Optional[str] = Field(None, description="cursor for the next page, null on the last page")
+    total: Optional[int] = Field(None, description="number of matching orders, when requested")
+    total_is_estimate: bool = Field(False, description="true when total was capped and is a lower bound")
+
+class BulkStatusUpdate(BaseModel):
+    order_ids: List[int] = Field(..., min_length=1, max_length=1000, description="orders to update")
+    status: str = Field(..., description="new order status for every listed order")
+
+class BulkShippingUpdate(BaseModel):
+    order_ids: List[int] = Field(..., min_length=1, max_length=1000, description="orders to update")
+    shipping_status: str = Field(..., description="new shipping status for every listed order")
@@ -0,0 +1,23 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import datetime
+from src.models.order_models import ComputerSet
+
+class ReservationItem(BaseModel):
+    collection: str = Field(..., description="Inventory collection holding the item")
+    id_field: str = Field(..., description="ID field of the item, e.g. 'gpu_id'")
+    item_id: int = Field(..., description="ID of the reserved item")
+    quantity: int = Field(..., ge=1, description="Number of units held")
+
+class ReservationRequest(BaseModel):
+    computer_set: ComputerSet = Field(..., description="Computer set to hold stock for")
+    builds: List[ComputerSet] = Field(default_factory=list, description="Additional computer sets to hold stock for")
+
+class Reservation(BaseModel):
+    reservation_id: str = Field(..., description="Reservation identifier")
+    user_id: int = Field(..., description="User who holds the reservation")
+    items: List[ReservationItem] = Field(..., description="Units held per SKU")
+    status: str = Field(..., description="Reservation status must be either 'Held', 'Confirmed' or 'Released'")
+    created_at: datetime = Field(..., description="Creation time in UTC timezone")
+    expires_at: datetime = Field(..., description="Time the hold lapses in UTC timezone")
+    order_id: Optional[int] = Field(None, description="Order that confirmed the reservation")
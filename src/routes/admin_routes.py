@@ -1,6 +1,9 @@
-from fastapi import APIRouter, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Body
+from fastapi.responses import StreamingResponse
+from datetime import datetime
 from src.controllers.admin_controller import AdminController
-from typing import List, Dict, Any
+from src.utils.auth import get_current_client, require_scope
+from typing import List, Dict, Any, Optional
 
 router = APIRouter(
     prefix="/admin",
@@ -17,11 +20,39 @@ router = APIRouter(
         status.HTTP_500_INTERNAL_SERVER_ERROR: {
             "description": "Internal server error",
         }
-    }
+    },
+    dependencies=[Depends(require_scope("admin"))],
 )
 
 controller = AdminController()
 
+async def require_admin(current_user: Dict = Depends(get_current_client)) -> Dict:
+    """
+    Dependency for admin routes that expose customer data
+    """
+    if current_user.get("role") != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return current_user
+
+def order_search_filters(
+    order_status: Optional[str] = Query(None, alias="status", description="Order status"),
+    shipping_status: Optional[str] = Query(None, description="Shipping status"),
+    date_from: Optional[datetime] = Query(None, description="Orders placed at or after this time (ISO 8601)"),
+    date_to: Optional[datetime] = Query(None, description="Orders placed before this time (ISO 8601)"),
+    min_total: Optional[int] = Query(None, ge=0, description="Minimum order total"),
+    max_total: Optional[int] = Query(None, ge=0, description="Maximum order total"),
+    email: Optional[str] = Query(None, description="Customer email (exact match)")
+) -> Dict[str, Any]:
+    return {
+        "status": order_status,
+        "shipping_status": shipping_status,
+        "date_from": date_from,
+        "date_to": date_to,
+        "min_total": min_total,
+        "max_total": max_total,
+        "email": email
+    }
+
 @router.get(
     "/sales/last-five-days",
     response_model=List[Dict[str, Any]],
@@ -46,18 +77,68 @@ async def get_sales_last_five_days():
             detail=f"Error retrieving sales data: {str(e)}"
         )
 
+@router.get(
+    "/sales/series",
+    response_model=Dict[str, Any],
+    summary="Sales time series",
+    description="Order totals per hour, day, week or month over any period, in a chosen time zone"
+)
+async def get_sales_series(
+    date_from: Optional[datetime] = Query(None, alias="from", description="Start, inclusive (ISO 8601; default 30 days before 'to')"),
+    date_to: Optional[datetime] = Query(None, alias="to", description="End, exclusive (ISO 8601; default now)"),
+    granularity: str = Query("day", description="hour, day, week or month"),
+    tz: str = Query("UTC", description="IANA time zone for bucket boundaries and naive bounds, e.g. Asia/Bangkok")
+):
+    """
+    Retrieve sales totals per time bucket
+    
+    Returns:
+        Dict: from, to, granularity, tz, total_sales, order_count and buckets:
+        - start: Bucket start in the requested time zone
+        - total_sales: Total sales amount in the bucket
+        - order_count: Number of orders in the bucket
+    """
+    return await controller.get_sales_series(date_from, date_to, granularity, tz)
+
+@router.get(
+    "/sales/daily",
+    response_model=List[Dict[str, Any]],
+    summary="Daily sales rollup",
+    description="Revenue, order count and units per UTC day, overall and per hardware category"
+)
+async def get_sales_daily(
+    date_from: Optional[datetime] = Query(None, alias="from", description="First day (ISO 8601; default 30 days before 'to')"),
+    date_to: Optional[datetime] = Query(None, alias="to", description="End, exclusive (ISO 8601; default now)")
+):
+    """
+    Retrieve the daily sales rollup
+    
+    Returns:
+        List[Dict]: Days with sales, oldest first:
+        - day: Date (YYYY-MM-DD, UTC)
+        - order_count, revenue, units: Totals for the day
+        - categories: The same totals per hardware category
+    """
+    return await controller.get_sales_daily(date_from, date_to)
+
 @router.get(
     "/inventory/low-stock",
     response_model=List[Dict[str, Any]],
     summary="Products with lowest stock",
-    description="Shows the top 5 products with the lowest stock quantity"
+    description="Shows the products with the lowest stock quantity below a threshold, optionally in one category"
 )
-async def get_low_stock_products(limit: int = Query(5, ge=1, le=20)):
+async def get_low_stock_products(
+    limit: int = Query(5, ge=1, le=20),
+    threshold: Optional[int] = Query(None, ge=1, description="Only items with fewer units (default LOW_STOCK_THRESHOLD)"),
+    category: Optional[str] = Query(None, description="CPU, RAM, Mainboard, GPU, Case, PSU, SSD or M2")
+):
     """
     Retrieve products with the lowest stock quantity
     
     Parameters:
         limit (int): Number of items to display (default: 5, max: 20)
+        threshold (int): Stock level below which an item counts as low
+        category (str): Restrict the report to one hardware category
         
     Returns:
         List[Dict]: A list of products with the lowest stock:
@@ -68,7 +149,9 @@ async def get_low_stock_products(limit: int = Query(5, ge=1, le=20)):
         - category: Product category
     """
     try:
-        return await controller.get_low_stock_products(limit)
+        return await controller.get_low_stock_products(limit, threshold, category)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -121,6 +204,7 @@ async def get_inventory_summary():
           - total_items: Number of product items
           - total_stock: Total stock quantity
           - total_value: Total value
+          - computed_at: When the category's figures were computed (cached briefly)
         - total: Overall summary
           - total_items: Total number of product items
           - total_stock: Total stock quantity
@@ -316,4 +400,222 @@ async def get_recommended_products(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error retrieving recommended products: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+@router.get(
+    "/orders/search",
+    response_model=Dict[str, Any],
+    summary="Search orders",
+    description="Find orders by status, shipping status, date range, total and customer email"
+)
+async def search_orders(
+    filters: Dict[str, Any] = Depends(order_search_filters),
+    limit: int = Query(50, ge=1, le=200, description="Orders per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    current_user: Dict = Depends(require_admin)
+):
+    """
+    Search orders, newest first
+    
+    Parameters:
+        status, shipping_status, date_from, date_to, min_total, max_total, email: Filters (all optional)
+        limit (int): Orders per page (default: 50, max: 200)
+        cursor (str): Pass next_cursor of the previous page to get the next one
+        
+    Returns:
+        Dict: A page of orders:
+        - items: Matching orders
+        - next_cursor: Cursor for the next page, null on the last page
+    """
+    try:
+        return await controller.search_orders(filters, limit, cursor)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error searching orders: {str(e)}"
+        )
+
+@router.get(
+    "/orders/export",
+    summary="Export orders",
+    description="Stream matching orders as CSV or NDJSON"
+)
+async def export_orders(
+    filters: Dict[str, Any] = Depends(order_search_filters),
+    export_format: str = Query("csv", alias="format", pattern="^(csv|ndjson)$", description="csv or ndjson"),
+    current_user: Dict = Depends(require_admin)
+):
+    """
+    Export orders matching the search filters
+    
+    Rows are written while the database cursor is read, so exports of any
+    size run in constant memory.
+    
+    Parameters:
+        status, shipping_status, date_from, date_to, min_total, max_total, email: Filters (all optional)
+        format (str): csv (default) or ndjson
+    """
+    media_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    filename = f"orders-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{export_format}"
+    return StreamingResponse(
+        controller.export_orders(filters, export_format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.get(
+    "/inventory/hot-skus",
+    response_model=List[Dict[str, Any]],
+    summary="Sharded hot SKUs",
+    description="Items whose stock is split across shard counters, with merged available stock"
+)
+async def get_sharded_items(current_user: Dict = Depends(require_admin)):
+    """
+    List hot SKUs with sharded stock counters
+    
+    Returns:
+        List[Dict]: collection, id_field, item_id, shards and available units
+    """
+    try:
+        return await controller.get_sharded_items()
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error retrieving sharded items: {str(e)}"
+        )
+
+@router.post(
+    "/inventory/hot-skus/{id_field}/{item_id}",
+    response_model=Dict[str, Any],
+    summary="Shard the stock of a hot SKU",
+    description="Split the available stock of an item across shard counters to spread checkout writes"
+)
+async def enable_stock_shards(
+    id_field: str,
+    item_id: int,
+    shards: Optional[int] = Query(None, ge=2, description="Number of shards (default: STOCK_SHARDS_DEFAULT)"),
+    current_user: Dict = Depends(require_admin)
+):
+    """
+    Flag an item as hot and move its available stock into shard counters
+    
+    Parameters:
+        id_field (str): Part field, e.g. gpu_id
+        item_id (int): Item ID
+        shards (int): Number of shards
+    """
+    return await controller.enable_stock_shards(id_field, item_id, shards)
+
+@router.delete(
+    "/inventory/hot-skus/{id_field}/{item_id}",
+    response_model=Dict[str, Any],
+    summary="Merge the stock shards of a SKU",
+    description="Fold shard counters back into the item's quantity"
+)
+async def disable_stock_shards(id_field: str, item_id: int, current_user: Dict = Depends(require_admin)):
+    """
+    Turn stock sharding off for an item
+    
+    Parameters:
+        id_field (str): Part field, e.g. gpu_id
+        item_id (int): Item ID
+    """
+    return await controller.disable_stock_shards(id_field, item_id)
+
+@router.get(
+    "/inventory/flash-sales",
+    response_model=List[Dict[str, Any]],
+    summary="Flash-sale SKUs",
+    description="Items in a flash sale with the admission tokens left in this process"
+)
+async def get_flash_sales(current_user: Dict = Depends(require_admin)):
+    """
+    List flash-sale SKUs
+    
+    Returns:
+        List[Dict]: id_field, item_id, tokens left and tokens held by checkouts in flight
+    """
+    return await controller.get_flash_sales()
+
+@router.post(
+    "/inventory/flash-sales/{id_field}/{item_id}",
+    response_model=Dict[str, Any],
+    summary="Start a flash sale for a SKU",
+    description="Gate checkouts of an item with in-memory tokens preloaded from its available stock"
+)
+async def enable_flash_sale(id_field: str, item_id: int, current_user: Dict = Depends(require_admin)):
+    """
+    Put an item into flash-sale mode
+    
+    Parameters:
+        id_field (str): Part field, e.g. gpu_id
+        item_id (int): Item ID
+    """
+    return await controller.enable_flash_sale(id_field, item_id)
+
+@router.delete(
+    "/inventory/flash-sales/{id_field}/{item_id}",
+    response_model=Dict[str, Any],
+    summary="End a flash sale for a SKU",
+    description="Stop gating checkouts of an item"
+)
+async def disable_flash_sale(id_field: str, item_id: int, current_user: Dict = Depends(require_admin)):
+    """
+    Take an item out of flash-sale mode
+    
+    Parameters:
+        id_field (str): Part field, e.g. gpu_id
+        item_id (int): Item ID
+    """
+    return await controller.disable_flash_sale(id_field, item_id)
+
+@router.get(
+    "/api-keys",
+    response_model=List[Dict[str, Any]],
+    summary="API keys",
+    description="API keys of service clients, without the keys themselves"
+)
+async def get_api_keys(current_user: Dict = Depends(require_admin)):
+    """
+    List API keys
+    
+    Returns:
+        List[Dict]: key_id, name, user_id, role, scopes, revoked, created_at and last_used_at
+    """
+    return await controller.get_api_keys()
+
+@router.post(
+    "/api-keys",
+    response_model=Dict[str, Any],
+    status_code=status.HTTP_201_CREATED,
+    summary="Create an API key",
+    description="Issue a scoped API key for a service client. The key is only shown in this response."
+)
+async def create_api_key(
+    name: str = Body(..., description="Client name, e.g. warehouse"),
+    user_id: int = Body(..., description="User the client acts as"),
+    role: str = Body("user", description="user or admin"),
+    scopes: List[str] = Body(..., description="orders:read, orders:write, admin:read and/or admin:write"),
+    current_user: Dict = Depends(require_admin)
+):
+    """
+    Create an API key, sent by the client in the X-API-Key header
+    """
+    return await controller.create_api_key(name, user_id, role, scopes)
+
+@router.delete(
+    "/api-keys/{key_id}",
+    response_model=Dict[str, Any],
+    summary="Revoke an API key",
+    description="Stop accepting an API key"
+)
+async def revoke_api_key(key_id: str, current_user: Dict = Depends(require_admin)):
+    """
+    Revoke an API key
+    
+    Parameters:
+        key_id (str): Key ID
+    """
+    return await controller.revoke_api_key(key_id)
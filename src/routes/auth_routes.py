@@ -1,12 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Body
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Body
 from fastapi.security import OAuth2PasswordRequestForm
 from datetime import timedelta
 from pydantic import BaseModel
 from typing import Dict, Optional
 from src.database.database import Database
-from src.utils.auth import create_access_token, get_current_user
+from src.services.password_service import password_service
+from src.services.token_service import TokenService
+from src.utils.auth import create_access_token, get_current_user, invalidate_user, oauth2_scheme, verify_token
+from src.utils.rate_limit import client_ip, rate_limiter
 from src.config import settings
-import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(
     prefix="/auth",
@@ -20,6 +25,13 @@ class Token(BaseModel):
     user_id: int
     username: str
     role: str
+    refresh_token: Optional[str] = None
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+class LogoutRequest(BaseModel):
+    refresh_token: Optional[str] = None
 
 class UserLogin(BaseModel):
     username: str
@@ -38,62 +50,93 @@ class UserResponse(BaseModel):
     role: str
     is_active: bool
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verify password against hashed version
-    
-    In a real application, use a secure password hashing library like bcrypt or Argon2
     """
-    # This is a simple example - use a proper password hashing library in production
-    password_hash = hashlib.sha256(plain_password.encode()).hexdigest()
-    print(f"Comparing passwords: {password_hash} == {hashed_password}")
-    return password_hash == hashed_password
+    valid, _ = await password_service.verify(plain_password, hashed_password)
+    return valid
 
-def hash_password(password: str) -> str:
+async def hash_password(password: str) -> str:
     """
-    Hash a password using SHA-256
-    
-    In a real application, use a secure password hashing library like bcrypt or Argon2
+    Hash a password with scrypt, off the event loop
     """
-    return hashlib.sha256(password.encode()).hexdigest()
+    return await password_service.hash(password)
 
 async def authenticate_user(db: Database, username: str, password: str) -> Optional[Dict]:
     """
     Authenticate a user by username and password
     """
     try:
-        print(f"Authenticating user: {username}")
         # Get the users collection
         users_collection = await db.get_collection("users")
-        print(f"Got users collection")
         
         # Find user by username
         user = await users_collection.find_one({"username": username})
-        print(f"User lookup result: {user is not None}")
         
         if not user:
-            print(f"User {username} not found")
+            logger.info("Login failed: unknown user", extra={"username": username})
             return None
         
-        if not verify_password(password, user["password"]):
-            print(f"Password verification failed for {username}")
+        valid, needs_upgrade = await password_service.verify(password, user["password"])
+        if not valid:
+            logger.info("Login failed: wrong password", extra={"username": username})
             return None
         
-        print(f"Authentication successful for {username}")
+        # Re-hash legacy SHA-256 or outdated scrypt hashes now that we have the password
+        if needs_upgrade:
+            upgraded = await password_service.hash(password)
+            await users_collection.update_one(
+                {"_id": user["_id"], "password": user["password"]},
+                {"$set": {"password": upgraded}}
+            )
+            invalidate_user(user["user_id"])
+            logger.info("Password hash upgraded", extra={"username": username})
+        
+        logger.debug("Authentication successful", extra={"username": username})
         return user
-    except Exception as e:
-        print(f"Authentication error: {str(e)}")
+    except HTTPException:
+        raise
+    except Exception:
+        logger.exception("Authentication error", extra={"username": username})
         return None
 
+async def issue_tokens(user: Dict, refresh_token: Optional[str] = None) -> Dict:
+    """
+    Create an access token for a user, with a new refresh token unless one is given
+    """
+    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = await create_access_token(
+        data={
+            "sub": user["user_id"],
+            "role": user.get("role", "user")
+        },
+        expires_delta=access_token_expires
+    )
+    if refresh_token is None:
+        refresh_token = await TokenService(Database.get_instance()).issue_refresh_token(user["user_id"])
+    
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "user_id": user["user_id"],
+        "username": user["username"],
+        "role": user.get("role", "user"),
+        "refresh_token": refresh_token
+    }
+
 @router.post("/register", response_model=UserResponse)
 async def register_user(
-    user_data: UserCreate
+    user_data: UserCreate,
+    request: Request
 ):
     """
     Register a new user
     
     This is for testing purposes and should have more validation in production
     """
+    await rate_limiter.check("register", ip=client_ip(request))
+    
     try:
         db = Database.get_instance()
         users_collection = await db.get_collection("users")
@@ -121,13 +164,14 @@ async def register_user(
             "user_id": new_user_id,
             "username": user_data.username,
             "email": user_data.email,
-            "password": hash_password(user_data.password),
+            "password": await hash_password(user_data.password),
             "role": user_data.role,
             "is_active": True
         }
         
         # Insert into database
         await users_collection.insert_one(new_user)
+        invalidate_user(new_user_id)
         
         # Remove password from response
         new_user.pop("password")
@@ -136,7 +180,7 @@ async def register_user(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Registration error: {str(e)}")
+        logger.exception("Registration error", extra={"username": user_data.username})
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Registration failed: {str(e)}"
@@ -144,6 +188,7 @@ async def register_user(
 
 @router.post("/token", response_model=Token)
 async def login_for_access_token(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends()
 ):
     """
@@ -152,7 +197,8 @@ async def login_for_access_token(
     This endpoint is used for OAuth2 password flow authentication.
     It validates the username and password, then returns a JWT token.
     """
-    print(f"OAuth2 login attempt: {form_data.username}")
+    await rate_limiter.check("login", ip=client_ip(request), username=form_data.username)
+    
     db = Database.get_instance()
     user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
@@ -164,34 +210,19 @@ async def login_for_access_token(
     
     # Check if user is active
     if not user.get("is_active", True):
-        print(f"User account is disabled: {form_data.username}")
+        logger.info("Login refused: account disabled", extra={"username": form_data.username})
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User account is disabled",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Create access token with user data
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = await create_access_token(
-        data={
-            "sub": user["user_id"],
-            "role": user.get("role", "user")
-        },
-        expires_delta=access_token_expires
-    )
-    
-    return {
-        "access_token": access_token,
-        "token_type": "bearer",
-        "user_id": user["user_id"],
-        "username": user["username"],
-        "role": user.get("role", "user")
-    }
+    return await issue_tokens(user)
 
 @router.post("/login", response_model=Token)
 async def login(
-    user_data: UserLogin
+    user_data: UserLogin,
+    request: Request
 ):
     """
     Authenticate user with username and password
@@ -199,7 +230,8 @@ async def login(
     This endpoint provides a more standard login interface, accepting
     username and password in the request body.
     """
-    print(f"JSON login attempt: {user_data.username}")
+    await rate_limiter.check("login", ip=client_ip(request), username=user_data.username)
+    
     db = Database.get_instance()
     user = await authenticate_user(db, user_data.username, user_data.password)
     if not user:
@@ -210,27 +242,60 @@ async def login(
     
     # Check if user is active
     if not user.get("is_active", True):
-        print(f"User account is disabled: {user_data.username}")
+        logger.info("Login refused: account disabled", extra={"username": user_data.username})
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User account is disabled"
         )
     
-    # Create access token with user data
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = await create_access_token(
-        data={
-            "sub": user["user_id"],
-            "role": user.get("role", "user")
-        },
-        expires_delta=access_token_expires
-    )
+    logger.info("Login successful", extra={"username": user_data.username})
+    return await issue_tokens(user)
+
+@router.post("/refresh", response_model=Token)
+async def refresh_access_token(
+    request: RefreshRequest
+):
+    """
+    Exchange a refresh token for a new access token and refresh token
     
-    print(f"Login successful: {user_data.username}")
-    return {
-        "access_token": access_token,
-        "token_type": "bearer",
-        "user_id": user["user_id"],
-        "username": user["username"],
-        "role": user.get("role", "user")
-    }
\ No newline at end of file
+    Each refresh token works once. Reusing one revokes every token rotated from it.
+    """
+    db = Database.get_instance()
+    user_id, refresh_token = await TokenService(db).rotate(request.refresh_token)
+    
+    users_collection = await db.get_collection("users")
+    user = await users_collection.find_one({"user_id": user_id}, {"password": 0})
+    if not user or not user.get("is_active", True):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User account is disabled"
+        )
+    
+    return await issue_tokens(user, refresh_token)
+
+@router.post("/logout")
+async def logout(
+    request: LogoutRequest = Body(default=LogoutRequest()),
+    token: str = Depends(oauth2_scheme)
+):
+    """
+    Revoke the current access token, and the given refresh token if any
+    """
+    token_data = verify_token(token)
+    token_service = TokenService(Database.get_instance())
+    await token_service.revoke_access_token(token_data)
+    if request.refresh_token:
+        await token_service.revoke_refresh_token(request.refresh_token)
+    return {"message": "Logged out"}
+
+@router.post("/logout-all")
+async def logout_all(
+    current_user: Dict = Depends(get_current_user)
+):
+    """
+    Revoke every access and refresh token of the current user
+    """
+    await TokenService(Database.get_instance()).revoke_user(current_user["user_id"])
+    invalidate_user(current_user["user_id"])
+    logger.info("All sessions revoked", extra={"user_id": current_user["user_id"]})
+    return {"message": "Logged out of all sessions"}
@@ -1,64 +1,145 @@
-from fastapi import APIRouter, Depends, Path, Body, HTTPException, Query
+from fastapi import APIRouter, Depends, Path, Body, HTTPException, Query, Header, Request, UploadFile, File
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from typing import List, Dict, Any, Optional
 from src.controllers.order_controller import OrderController
-from src.models.order_models import Order, ComputerSet, ShippingDetails
+from src.models.order_models import Order, OrderPage, ComputerSet, ShippingDetails, BulkStatusUpdate, BulkShippingUpdate
 from src.database.database import Database
-from src.utils.auth import get_current_user
+from src.utils.auth import get_current_client, require_scope
+from src.utils.rate_limit import client_ip, rate_limiter
+from src.config import settings
+import csv
+import io
 
 router = APIRouter(
     prefix="/orders",
     tags=["Orders"],
     responses={404: {"description": "Not found"}},
+    dependencies=[Depends(require_scope("orders"))],
 )
 
-@router.post("/create-with-details", response_model=Order)
+def accepted(receipt: Dict[str, Any]) -> JSONResponse:
+    """202 response pointing the client at the intake status URL"""
+    return JSONResponse(
+        status_code=202,
+        content=jsonable_encoder(receipt),
+        headers={"Location": receipt["status_url"]}
+    )
+
+@router.post("/create-with-details", response_model=Order, responses={202: {"description": "Order request queued (intake mode)"}})
 async def create_order_with_details(
+    request: Request,
     computer_set: ComputerSet = Body(..., description="Computer set details"),
     shipping_details: ShippingDetails = Body(..., description="Shipping details"),
     total_price: int = Body(..., ge=0, description="Total price"),
-    current_user: Dict = Depends(get_current_user),
+    builds: List[ComputerSet] = Body([], description="Additional computer sets in the same order"),
+    reservation_id: Optional[str] = Body(None, description="Stock reservation to confirm"),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
+    current_user: Dict = Depends(get_current_client),
     order_controller: OrderController = Depends(lambda: OrderController(Database.get_instance()))
 ):
     """
     Create a new order with separate ComputerSet and ShippingDetails
-    - **computer_set**: Computer set details
+    - **computer_set**: Computer set details (set **quantity** to order several identical builds)
     - **shipping_details**: Shipping details
     - **total_price**: Total price
+    - **builds**: Additional computer sets, each with its own quantity
+    - **reservation_id**: Held stock reservation to confirm (optional)
+
+    Send an **Idempotency-Key** header to make retries safe: a repeated key
+    returns the original order instead of creating a new one.
     """
     # Check if the user_id in shipping details matches the current user's ID
     if shipping_details.user_id != current_user["user_id"]:
         raise HTTPException(status_code=403, detail="Cannot create an order for another user")
     
+    await rate_limiter.check("orders", user=current_user["user_id"], ip=client_ip(request))
+    
+    if settings.ORDER_INTAKE_ENABLED:
+        order_data = OrderController.build_order_data(
+            current_user["user_id"], computer_set, shipping_details, total_price, builds, reservation_id
+        )
+        return accepted(await order_controller.enqueue_order(order_data, idempotency_key))
+    
     return await order_controller.create_order_with_details(
         user_id=current_user["user_id"],
         computer_set=computer_set,
         shipping_details=shipping_details,
-        total_price=total_price
+        total_price=total_price,
+        builds=builds,
+        reservation_id=reservation_id,
+        idempotency_key=idempotency_key
     )
 
-@router.post("/", response_model=Order)
+@router.post("/", response_model=Order, responses={202: {"description": "Order request queued (intake mode)"}})
 async def create_order(
+    request: Request,
     order_data: Dict[str, Any] = Body(...),
-    current_user: Dict = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
+    current_user: Dict = Depends(get_current_client),
     order_controller: OrderController = Depends(lambda: OrderController(Database.get_instance()))
 ):
     """
     Create a new order
     - **user_id**: User ID
     - **order_details**: Computer set details
+    - **builds**: Additional computer sets (optional)
     - **shipping_details**: Shipping details
     - **total_price**: Total price
+
+    Send an **Idempotency-Key** header to make retries safe.
     """
     # Check if the user_id in the request matches the current user's ID
     if order_data.get("user_id") != current_user["user_id"]:
         raise HTTPException(status_code=403, detail="Cannot create an order for another user")
     
-    return await order_controller.create_order(order_data)
+    await rate_limiter.check("orders", user=current_user["user_id"], ip=client_ip(request))
+    
+    if settings.ORDER_INTAKE_ENABLED:
+        return accepted(await order_controller.enqueue_order(order_data, idempotency_key))
+    
+    return await order_controller.create_order(order_data, idempotency_key)
+
+@router.get("/intake/{intake_id}", response_model=Dict[str, Any])
+async def get_intake_status(
+    intake_id: str = Path(..., description="Intake ID returned when the order was accepted"),
+    current_user: Dict = Depends(get_current_client),
+    order_controller: OrderController = Depends(lambda: OrderController(Database.get_instance()))
+):
+    """
+    Poll the status of a queued order request
+    - **status**: Queued, Processing, Completed or Failed
+    - **order_id**: Set once the order is created
+    - **error**: Reason the request failed, if it did
+    """
+    receipt = await order_controller.get_intake_status(intake_id)
+    if receipt["user_id"] != current_user["user_id"] and current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="No permission to access this order request")
+    return receipt
+
+@router.get("/events", response_model=Dict[str, Any])
+async def get_order_events(
+    after: Optional[str] = Query(None, description="Resume token from the previous batch"),
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of events to return"),
+    current_user: Dict = Depends(get_current_client),
+    order_controller: OrderController = Depends(lambda: OrderController(Database.get_instance()))
+):
+    """
+    Read the order event log, oldest first (admin only)
+    - **after**: Pass the `resume_token` of the previous response to continue from there
+    - **limit**: Batch size
+    
+    Events: order.created, order.status_changed, order.shipping_changed, order.deleted
+    """
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Only admin users can read order events")
+    
+    return await order_controller.get_order_events(after, limit)
 
 @router.get("/{order_id}", response_model=Order)
 async def get_order(
     order_id: int = Path(..., description="Order ID to retrieve"),
-    #! current_user: Dict = Depends(get_current_user),
+    #! current_user: Dict = Depends(get_current_client),
     order_controller: OrderController = Depends(lambda: OrderController(Database.get_instance()))
 ):
     """
@@ -72,30 +153,101 @@ async def get_order(
     
     return order
 
-@router.get("/", response_model=List[Order])
+@router.get("/", response_model=OrderPage)
 async def get_user_orders(
-    user_id: Optional[int] = Query(None, description="Filter orders by user ID"),
-    #! current_user: Dict = Depends(get_current_user),
+    user_id: Optional[int] = Query(None, description="User whose orders to list (admin only for other users)"),
+    limit: int = Query(20, ge=1, le=100, description="Orders per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    include_total: bool = Query(False, description="Also return the number of orders"),
+    current_user: Dict = Depends(get_current_client),
+    order_controller: OrderController = Depends(lambda: OrderController(Database.get_instance()))
+):
+    """
+    Get a user's order history, newest first
+    - **limit**: Orders per page
+    - **cursor**: Pass **next_cursor** of the previous page to get the next one
+    - **include_total**: Count the user's orders (capped for very long histories)
+    """
+    # Check if the admin can see other users' orders
+    if user_id and user_id != current_user["user_id"] and current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="No permission to access other users' orders")
+    
+    # If user_id is not specified, use the current user's ID
+    query_user_id = user_id if user_id else current_user["user_id"]
+    
+    return await order_controller.get_user_orders(query_user_id, limit, cursor, include_total)
+
+@router.patch("/bulk/status", response_model=Dict[str, Any])
+async def bulk_update_order_status(
+    update: BulkStatusUpdate,
+    current_user: Dict = Depends(get_current_client),
+    order_controller: OrderController = Depends(lambda: OrderController(Database.get_instance()))
+):
+    """
+    Update the status of many orders at once (admin only)
+    - **order_ids**: Orders to update
+    - **status**: New status (Pending, Confirmed, Delivered, or Cancelled)
+    
+    Returns a per-order result: updated, unchanged or not_found
+    """
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Only admin users can update order status")
+    
+    return await order_controller.bulk_update_order_status(update.order_ids, update.status)
+
+@router.patch("/bulk/shipping", response_model=Dict[str, Any])
+async def bulk_update_shipping_status(
+    update: BulkShippingUpdate,
+    current_user: Dict = Depends(get_current_client),
+    order_controller: OrderController = Depends(lambda: OrderController(Database.get_instance()))
+):
+    """
+    Update the shipping status of many orders at once (admin only)
+    - **order_ids**: Orders to update
+    - **shipping_status**: New shipping status (Pending, Shipped, Delivered, or Cancelled)
+    """
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Only admin users can update shipping status")
+    
+    return await order_controller.bulk_update_shipping_status(
+        {order_id: update.shipping_status for order_id in update.order_ids}
+    )
+
+@router.post("/bulk/shipping/csv", response_model=Dict[str, Any])
+async def bulk_update_shipping_status_csv(
+    file: UploadFile = File(..., description="Carrier CSV with order_id and shipping_status columns"),
+    current_user: Dict = Depends(get_current_client),
     order_controller: OrderController = Depends(lambda: OrderController(Database.get_instance()))
 ):
     """
-    Get all orders for a user
+    Update shipping statuses from a carrier CSV upload (admin only)
+    
+    The CSV needs a header row with **order_id** and **shipping_status** columns.
+    When an order appears more than once, the last row wins.
     """
-    #! Check if the admin can see other users' orders
-    #! if user_id and user_id != current_user["user_id"] and current_user["role"] != "admin":
-    #!     raise HTTPException(status_code=403, detail="No permission to access other users' orders")
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Only admin users can update shipping status")
+    
+    try:
+        reader = csv.DictReader(io.StringIO((await file.read()).decode("utf-8-sig")))
+        if not reader.fieldnames or not {"order_id", "shipping_status"} <= set(reader.fieldnames):
+            raise ValueError("CSV must have order_id and shipping_status columns")
+        updates = {int(row["order_id"]): row["shipping_status"].strip() for row in reader}
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid CSV: {str(e)}")
     
-    #! If user_id is not specified, use the current user's ID
-    #! query_user_id = user_id if user_id else current_user["user_id"]
-    query_user_id = user_id
+    if not updates:
+        raise HTTPException(status_code=400, detail="CSV contains no rows")
+    if len(updates) > 1000:
+        raise HTTPException(status_code=400, detail="CSV may contain at most 1000 orders")
     
-    return await order_controller.get_user_orders(query_user_id)
+    return await order_controller.bulk_update_shipping_status(updates)
 
 @router.patch("/{order_id}/status", response_model=Order)
 async def update_order_status(
     order_id: int = Path(..., description="Order ID to update"),
     status: str = Body(..., embed=True),
-    current_user: Dict = Depends(get_current_user),
+    current_user: Dict = Depends(get_current_client),
     order_controller: OrderController = Depends(lambda: OrderController(Database.get_instance()))
 ):
     """
@@ -112,7 +264,7 @@ async def update_order_status(
 async def update_shipping_status(
     order_id: int = Path(..., description="Order ID to update"),
     shipping_status: str = Body(..., embed=True),
-    current_user: Dict = Depends(get_current_user),
+    current_user: Dict = Depends(get_current_client),
     order_controller: OrderController = Depends(lambda: OrderController(Database.get_instance()))
 ):
     """
@@ -128,7 +280,7 @@ async def update_shipping_status(
 @router.delete("/{order_id}", response_model=Dict[str, bool])
 async def delete_order(
     order_id: int = Path(..., description="Order ID to delete"),
-    current_user: Dict = Depends(get_current_user),
+    current_user: Dict = Depends(get_current_client),
     order_controller: OrderController = Depends(lambda: OrderController(Database.get_instance()))
 ):
     """
@@ -0,0 +1,68 @@
+from fastapi import APIRouter, Depends, Path, HTTPException
+from typing import Dict, Any
+from src.models.reservation_models import Reservation, ReservationRequest
+from src.services.reservation_service import ReservationService
+from src.database.database import Database
+from src.utils.auth import get_current_user
+
+router = APIRouter(
+    prefix="/reservations",
+    tags=["Reservations"],
+    responses={404: {"description": "Not found"}},
+)
+
+@router.post("/", response_model=Reservation, status_code=201)
+async def hold_stock(
+    request: ReservationRequest,
+    current_user: Dict = Depends(get_current_user),
+    reservation_service: ReservationService = Depends(lambda: ReservationService(Database.get_instance()))
+):
+    """
+    Hold stock for a checkout cart
+    - **computer_set**: Computer set to hold stock for
+    - **builds**: Additional computer sets (optional)
+
+    Pass the returned **reservation_id** when creating the order to confirm the hold.
+    """
+    computer_sets = [request.computer_set.model_dump(), *[build.model_dump() for build in request.builds]]
+    return await reservation_service.hold(current_user["user_id"], computer_sets)
+
+@router.get("/availability/{id_field}/{item_id}", response_model=Dict[str, Any])
+async def get_availability(
+    id_field: str = Path(..., description="Part field, e.g. gpu_id"),
+    item_id: int = Path(..., description="Item ID"),
+    reservation_service: ReservationService = Depends(lambda: ReservationService(Database.get_instance()))
+):
+    """
+    Get the available-to-promise quantity of an item
+    """
+    return await reservation_service.get_availability(id_field, item_id)
+
+@router.get("/{reservation_id}", response_model=Reservation)
+async def get_reservation(
+    reservation_id: str = Path(..., description="Reservation ID to retrieve"),
+    current_user: Dict = Depends(get_current_user),
+    reservation_service: ReservationService = Depends(lambda: ReservationService(Database.get_instance()))
+):
+    """
+    Get reservation details by ID
+    """
+    reservation = await reservation_service.get_reservation(reservation_id)
+    if reservation.user_id != current_user["user_id"] and current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="No permission to access this reservation")
+    return reservation
+
+@router.delete("/{reservation_id}", response_model=Dict[str, bool])
+async def release_stock(
+    reservation_id: str = Path(..., description="Reservation ID to release"),
+    current_user: Dict = Depends(get_current_user),
+    reservation_service: ReservationService = Depends(lambda: ReservationService(Database.get_instance()))
+):
+    """
+    Release a held reservation and return its stock
+    """
+    user_id = None if current_user["role"] == "admin" else current_user["user_id"]
+    success = await reservation_service.release(reservation_id, user_id)
+    if not success:
+        raise HTTPException(status_code=404, detail=f"No held reservation with ID {reservation_id}")
+    return {"success": success}
@@ -0,0 +1,63 @@
+from fastapi import HTTPException
+from datetime import datetime, timezone
+from typing import Dict, List
+from uuid import uuid4
+import secrets
+from src.database.database import Database
+from src.utils.auth import API_KEY_SCOPES, hash_api_key, invalidate_api_key
+
+class ApiKeyService:
+    """
+    API keys for service clients, stored in `api_keys`.
+
+    Only a SHA-256 hash of each key is stored; the key itself is returned
+    once, when it is created. Each key acts as a user, with that user's ID,
+    a role and a list of scopes.
+    """
+    def __init__(self, database: Database):
+        self.db = database
+        self.collection = "api_keys"
+
+    async def create(self, name: str, user_id: int, role: str, scopes: List[str]) -> Dict:
+        unknown = sorted(set(scopes) - API_KEY_SCOPES)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown scopes: {', '.join(unknown)}")
+        if role not in ("user", "admin"):
+            raise HTTPException(status_code=400, detail=f"Invalid role: '{role}'")
+
+        key_id = uuid4().hex[:12]
+        api_key = f"ak_{key_id}_{secrets.token_urlsafe(32)}"
+        record = {
+            "key_id": key_id,
+            "key_hash": hash_api_key(api_key),
+            "name": name,
+            "user_id": user_id,
+            "role": role,
+            "scopes": sorted(set(scopes)),
+            "revoked": False,
+            "created_at": datetime.now(timezone.utc),
+            "last_used_at": None
+        }
+        collection = await self.db.get_collection(self.collection)
+        await collection.insert_one(record)
+
+        record.pop("_id", None)
+        record.pop("key_hash")
+        return {**record, "api_key": api_key}
+
+    async def list_keys(self) -> List[Dict]:
+        collection = await self.db.get_collection(self.collection)
+        return await collection.find({}, {"_id": 0, "key_hash": 0}).sort("created_at", -1).to_list(length=None)
+
+    async def revoke(self, key_id: str) -> Dict:
+        collection = await self.db.get_collection(self.collection)
+        record = await collection.find_one_and_update(
+            {"key_id": key_id},
+            {"$set": {"revoked": True, "revoked_at": datetime.now(timezone.utc)}},
+            projection={"key_hash": 1}
+        )
+        if not record:
+            raise HTTPException(status_code=404, detail=f"API key {key_id} not found")
+        # Other processes stop accepting it once their cached entry expires
+        invalidate_api_key(record["key_hash"])
+        return {"key_id": key_id, "revoked": True}
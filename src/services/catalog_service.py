@@ -0,0 +1,81 @@
+from fastapi import HTTPException
+from collections import defaultdict
+from typing import Dict, Iterable, List, Tuple
+import asyncio
+from src.config import settings
+from src.database.database import Database
+from src.utils.cache import TTLCache
+from src.utils.metrics import metrics
+
+# Unit prices keyed by (collection_name, id_field, id_value), shared by the process
+_price_cache = TTLCache(maxsize=settings.CATALOG_PRICE_CACHE_SIZE, ttl=settings.CATALOG_PRICE_CACHE_TTL_SECONDS)
+metrics.register_gauge("catalog.price_cache", _price_cache.stats)
+
+SKU = Tuple[str, str, int]
+
+def invalidate_price(collection_name: str, id_field: str, id_value: int) -> None:
+    """Drop a cached price after the item was updated or deleted"""
+    _price_cache.pop((collection_name, id_field, id_value))
+
+class CatalogService:
+    """
+    Batched price lookups for order pricing.
+
+    Prices come from the in-process cache when warm; misses are fetched with
+    one `$in` query per collection, run concurrently.
+    """
+    def __init__(self, database: Database):
+        self.db = database
+
+    async def get_prices(self, skus: Iterable[SKU]) -> Dict[SKU, int]:
+        prices = {}
+        missing: Dict[Tuple[str, str], List[int]] = defaultdict(list)
+        for sku in set(skus):
+            price = _price_cache.get(sku)
+            if price is None:
+                collection_name, id_field, id_value = sku
+                missing[(collection_name, id_field)].append(id_value)
+            else:
+                prices[sku] = price
+
+        if missing:
+            fetched = await asyncio.gather(*[
+                self._fetch_prices(collection_name, id_field, id_values)
+                for (collection_name, id_field), id_values in missing.items()
+            ])
+            for batch in fetched:
+                for sku, price in batch.items():
+                    _price_cache.set(sku, price)
+                    prices[sku] = price
+        return prices
+
+    async def _fetch_prices(self, collection_name: str, id_field: str, id_values: List[int]) -> Dict[SKU, int]:
+        collection = await self.db.get_collection(collection_name)
+        cursor = collection.find({id_field: {"$in": id_values}}, {"_id": 0, id_field: 1, "price": 1})
+        return {
+            (collection_name, id_field, item[id_field]): item["price"]
+            async for item in cursor
+            if item.get("price") is not None
+        }
+
+    async def price_skus(self, sku_quantities: Dict[SKU, int]) -> Tuple[int, List[Dict]]:
+        """
+        Total price and per-item unit prices for the given unit counts.
+        Raises 404 if any item has no catalog price.
+        """
+        prices = await self.get_prices(sku_quantities)
+
+        unpriced = [
+            f"{id_field}={id_value}"
+            for collection_name, id_field, id_value in sku_quantities
+            if (collection_name, id_field, id_value) not in prices
+        ]
+        if unpriced:
+            raise HTTPException(status_code=404, detail=f"Items not found in catalog: {', '.join(unpriced)}")
+
+        items = [
+            {"id_field": id_field, "item_id": id_value, "quantity": quantity, "unit_price": prices[(collection_name, id_field, id_value)]}
+            for (collection_name, id_field, id_value), quantity in sku_quantities.items()
+        ]
+        total = sum(item["unit_price"] * item["quantity"] for item in items)
+        return total, items
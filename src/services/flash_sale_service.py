@@ -0,0 +1,199 @@
+from fastapi import HTTPException
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+import asyncio
+import logging
+from src.config import settings
+from src.database.database import Database
+from src.services.inventory import PART_COLLECTIONS
+from src.services.stock_shard_service import StockShardService
+from src.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+SKU = Tuple[str, str, int]
+
+class FlashSaleGate:
+    """
+    In-process admission tokens for flash-sale SKUs.
+
+    Each flash-sale SKU starts with one token per available unit. A checkout
+    takes its tokens before opening a transaction and is rejected straight
+    away when they have run out, so sold-out demand never reaches MongoDB.
+
+    Tokens taken by a checkout are "in flight" until it commits or aborts.
+    The token count is re-read from the database as available stock minus
+    what is in flight, and minus units committed while the stock was being
+    read, which the read may have missed. This keeps the gate from admitting
+    more checkouts than there are units. The database stays authoritative:
+    a checkout the gate lets through can still fail its stock check.
+    """
+    def __init__(self):
+        self._tokens: Dict[SKU, int] = {}
+        self._in_flight: Dict[SKU, int] = defaultdict(int)
+        self._committed: Dict[SKU, int] = defaultdict(int)
+
+    def __bool__(self) -> bool:
+        return bool(self._tokens)
+
+    def __contains__(self, sku: SKU) -> bool:
+        return sku in self._tokens
+
+    def skus(self) -> List[SKU]:
+        return list(self._tokens)
+
+    def tokens(self, sku: SKU) -> int:
+        return self._tokens.get(sku, 0)
+
+    def acquire(self, sku_quantities: Dict[SKU, int]) -> Dict[SKU, int]:
+        """
+        Take tokens for every flash-sale SKU in the request, or none at all.
+        Returns the tokens taken; raises 409 if any SKU is sold out.
+        """
+        wanted = {sku: quantity for sku, quantity in sku_quantities.items() if sku in self._tokens}
+        sold_out = [f"{sku[1]}={sku[2]}" for sku, quantity in wanted.items() if self._tokens[sku] < quantity]
+        if sold_out:
+            metrics.increment("flash_sale.rejected")
+            raise HTTPException(status_code=409, detail=f"Sold out: {', '.join(sold_out)}")
+
+        for sku, quantity in wanted.items():
+            self._tokens[sku] -= quantity
+            self._in_flight[sku] += quantity
+        if wanted:
+            metrics.increment("flash_sale.admitted")
+        return wanted
+
+    def settle(self, acquired: Dict[SKU, int], committed: bool) -> None:
+        """
+        Finish a checkout. Committed tokens stay spent; aborted ones go back.
+        """
+        for sku, quantity in acquired.items():
+            self._in_flight[sku] -= quantity
+            if committed:
+                self._committed[sku] += quantity
+            elif sku in self._tokens:
+                self._tokens[sku] += quantity
+
+    def mark(self, sku: SKU) -> int:
+        """Units committed so far; take this before reading stock for `load`"""
+        return self._committed[sku]
+
+    def load(self, sku: SKU, available: int, mark: Optional[int] = None) -> None:
+        """
+        Set tokens from `available` stock. Units committed since `mark` may
+        be missing from a read that was in progress, so they are left out.
+        """
+        committed_since = self._committed[sku] - mark if mark is not None else 0
+        self._tokens[sku] = max(available - self._in_flight[sku] - committed_since, 0)
+
+    def remove(self, sku: SKU) -> None:
+        self._tokens.pop(sku, None)
+
+    def snapshot(self) -> List[Dict]:
+        return [
+            {"id_field": id_field, "item_id": id_value, "tokens": tokens, "in_flight": self._in_flight[(collection_name, id_field, id_value)]}
+            for (collection_name, id_field, id_value), tokens in self._tokens.items()
+        ]
+
+# Shared by every request handled in this process
+flash_sale_gate = FlashSaleGate()
+metrics.register_gauge("flash_sale.gate", flash_sale_gate.snapshot)
+
+class FlashSaleService:
+    """
+    Manages flash-sale SKUs and keeps the admission gate in line with stock.
+    Items in a flash sale carry `flash_sale: true`, so every process loads
+    the same set at startup and re-reads it every FLASH_SALE_SYNC_INTERVAL_SECONDS,
+    which picks up restocks, cancellations and flash sales started or
+    stopped by other processes.
+    """
+    def __init__(self, database: Database):
+        self.db = database
+        self.gate = flash_sale_gate
+        self.stock_shard_service = StockShardService(database)
+
+    @staticmethod
+    def _sku(id_field: str, item_id: int) -> SKU:
+        collection_name = PART_COLLECTIONS.get(id_field)
+        if not collection_name:
+            raise HTTPException(status_code=400, detail=f"Invalid part field: '{id_field}'")
+        return (collection_name, id_field, item_id)
+
+    async def enable(self, id_field: str, item_id: int) -> Dict:
+        collection_name, _, _ = sku = self._sku(id_field, item_id)
+        collection = await self.db.get_collection(collection_name)
+        result = await collection.update_one({id_field: item_id}, {"$set": {"flash_sale": True}})
+        if result.matched_count == 0:
+            raise HTTPException(status_code=404, detail=f"Item with {id_field}={item_id} not found")
+        await self.refresh([sku], include_new=True)
+        return {id_field: item_id, "flash_sale": True, "tokens": self.gate.tokens(sku)}
+
+    async def disable(self, id_field: str, item_id: int) -> Dict:
+        collection_name, _, _ = sku = self._sku(id_field, item_id)
+        collection = await self.db.get_collection(collection_name)
+        result = await collection.update_one({id_field: item_id}, {"$unset": {"flash_sale": ""}})
+        if result.matched_count == 0:
+            raise HTTPException(status_code=404, detail=f"Item with {id_field}={item_id} not found")
+        self.gate.remove(sku)
+        return {id_field: item_id, "flash_sale": False}
+
+    async def load(self) -> int:
+        """
+        Load every item flagged for a flash sale into the gate, with its
+        current stock, and drop items that are no longer flagged
+        """
+        skus = []
+        for id_field, collection_name in PART_COLLECTIONS.items():
+            collection = await self.db.get_collection(collection_name)
+            async for item in collection.find({"flash_sale": True}, {"_id": 0, id_field: 1}):
+                skus.append((collection_name, id_field, item[id_field]))
+        for sku in set(self.gate.skus()) - set(skus):
+            self.gate.remove(sku)
+        await self.refresh(skus, include_new=True)
+        return len(skus)
+
+    async def refresh(self, skus: Optional[Iterable[SKU]] = None, include_new: bool = False) -> None:
+        """
+        Re-read available stock for flash-sale SKUs (all of them by default).
+        Does nothing when no flash sale is running.
+        """
+        skus = self.gate.skus() if skus is None else list(skus)
+        for sku in skus:
+            if sku not in self.gate and not include_new:
+                continue
+            mark = self.gate.mark(sku)
+            self.gate.load(sku, await self._available(*sku), mark)
+
+    async def _available(self, collection_name: str, id_field: str, item_id: int) -> int:
+        collection = await self.db.get_collection(collection_name)
+        item = await collection.find_one({id_field: item_id}, {"quantity": 1, "reserved": 1, "stock_shards": 1})
+        if not item:
+            return 0
+        if item.get("stock_shards"):
+            return await self.stock_shard_service.total(collection_name, id_field, item_id)
+        return max(item.get("quantity", 0) - item.get("reserved", 0), 0)
+
+    async def settle(self, acquired: Dict[SKU, int], committed: bool) -> None:
+        """
+        Finish a gated checkout. After an abort the stock is re-read, in case
+        the database turned the checkout down because other processes sold
+        the units first.
+        """
+        self.gate.settle(acquired, committed)
+        if acquired and not committed:
+            await self.refresh(acquired)
+
+async def run_flash_sale_sync(service: FlashSaleService, interval_seconds: Optional[int] = None) -> None:
+    """
+    Background loop that re-reads flash-sale items and their stock, so
+    tokens follow changes made outside this process
+    """
+    interval = interval_seconds or settings.FLASH_SALE_SYNC_INTERVAL_SECONDS
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await service.load()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Error syncing flash-sale items")
@@ -0,0 +1,170 @@
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional
+from uuid import uuid4
+from pymongo.errors import DuplicateKeyError
+import asyncio
+import hashlib
+import json
+from src.config import settings
+from src.database.database import Database
+from src.utils.cache import TTLCache
+
+# Completed results, shared by every request handled in this process
+_result_cache = TTLCache(maxsize=settings.IDEMPOTENCY_CACHE_SIZE, ttl=settings.IDEMPOTENCY_TTL_SECONDS)
+
+# Requests currently running in this process, keyed like the cache
+_in_flight: Dict[tuple, asyncio.Future] = {}
+
+def request_fingerprint(payload: Any) -> str:
+    """
+    Stable hash of a request body, used to detect a key reused for a different request
+    """
+    encoded = json.dumps(jsonable_encoder(payload), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+class IdempotencyService:
+    """
+    Runs a write at most once per Idempotency-Key.
+
+    Results are stored in the `idempotency_keys` collection (TTL indexed) with
+    an in-process cache in front of it. A duplicate that arrives while the
+    first request is still running waits for that request's result instead
+    of starting its own transaction.
+
+    A claim on a key is a lease of IDEMPOTENCY_LEASE_SECONDS. If the request
+    holding it dies, a duplicate waiting on the key takes it over once the
+    lease has run out and runs the write itself.
+    """
+    def __init__(self, database: Database):
+        self.db = database
+        self.collection = "idempotency_keys"
+
+    async def run(self, key: str, user_id: int, fingerprint: str, operation: Callable[[], Awaitable[Any]]) -> Any:
+        cache_key = (user_id, key)
+
+        cached = _result_cache.get(cache_key)
+        if cached is not None:
+            return self._check_replay(cached, fingerprint)
+
+        # Same process, same key: wait for the request that got here first
+        if cache_key in _in_flight:
+            result = await asyncio.shield(_in_flight[cache_key])
+            return self._check_replay(result, fingerprint)
+
+        future = asyncio.get_running_loop().create_future()
+        _in_flight[cache_key] = future
+        owner = uuid4().hex
+        try:
+            record = await self._claim(key, user_id, fingerprint, owner)
+            if record is not None:
+                # Another process (or an earlier request) owns the key
+                record = await self._wait_for_result(key, user_id, fingerprint, owner)
+            if record is None:
+                # This request owns the key
+                try:
+                    result = jsonable_encoder(await operation())
+                except Exception:
+                    await self._forget(key, user_id, owner)
+                    raise
+                await self._complete(key, user_id, owner, result)
+            else:
+                result = record["result"]
+
+            entry = {"fingerprint": fingerprint, "result": result}
+            _result_cache.set(cache_key, entry)
+            future.set_result(entry)
+            return result
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+                # Mark the exception as retrieved when nobody is waiting on it
+                future.exception()
+            raise
+        finally:
+            _in_flight.pop(cache_key, None)
+
+    def _check_replay(self, entry: Dict, fingerprint: str) -> Any:
+        if entry["fingerprint"] != fingerprint:
+            raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request")
+        return entry["result"]
+
+    async def _claim(self, key: str, user_id: int, fingerprint: str, owner: str) -> Optional[Dict]:
+        """
+        Insert an in-progress record for the key, or take over one whose lease
+        has run out. Returns None if this request now owns the key, otherwise
+        the existing record.
+        """
+        collection = await self.db.get_collection(self.collection)
+        while True:
+            now = datetime.now(timezone.utc)
+            lease_expires_at = now + timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS)
+            try:
+                await collection.insert_one({
+                    "key": key,
+                    "user_id": user_id,
+                    "fingerprint": fingerprint,
+                    "status": "InProgress",
+                    "owner": owner,
+                    "lease_expires_at": lease_expires_at,
+                    "created_at": now
+                })
+                return None
+            except DuplicateKeyError:
+                pass
+
+            # The request holding the key died; records from before leases existed count as expired
+            taken = await collection.find_one_and_update(
+                {
+                    "key": key,
+                    "user_id": user_id,
+                    "fingerprint": fingerprint,
+                    "status": "InProgress",
+                    "lease_expires_at": {"$not": {"$gte": now}}
+                },
+                {"$set": {"owner": owner, "lease_expires_at": lease_expires_at}}
+            )
+            if taken is not None:
+                return None
+
+            record = await collection.find_one({"key": key, "user_id": user_id})
+            if record is not None:
+                return record
+            # Deleted or expired since the insert failed: try inserting again
+
+    async def _complete(self, key: str, user_id: int, owner: str, result: Any) -> None:
+        collection = await self.db.get_collection(self.collection)
+        await collection.update_one(
+            {"key": key, "user_id": user_id, "owner": owner},
+            {"$set": {"status": "Completed", "result": result}, "$unset": {"lease_expires_at": ""}}
+        )
+
+    async def _forget(self, key: str, user_id: int, owner: str) -> None:
+        """Drop the record of a failed request so the client can retry with the same key"""
+        collection = await self.db.get_collection(self.collection)
+        await collection.delete_one({"key": key, "user_id": user_id, "owner": owner, "status": "InProgress"})
+
+    async def _wait_for_result(self, key: str, user_id: int, fingerprint: str, owner: str) -> Optional[Dict]:
+        """
+        Wait for the request holding the key to complete and return its record.
+        Returns None if this request took the key over instead, because the
+        holder failed or its lease ran out.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.IDEMPOTENCY_WAIT_SECONDS
+        while True:
+            record = await self._claim(key, user_id, fingerprint, owner)
+            if record is None:
+                return None
+            if record.get("fingerprint") != fingerprint:
+                raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request")
+            if record.get("status") == "Completed":
+                return record
+            if loop.time() >= deadline:
+                raise HTTPException(
+                    status_code=409,
+                    detail="A request with this Idempotency-Key is still in progress",
+                    headers={"Retry-After": "1"}
+                )
+            await asyncio.sleep(0.1)
@@ -0,0 +1,47 @@
+from typing import Dict, List, Tuple, Union
+
+# Inventory collection for each part field of a ComputerSet
+PART_COLLECTIONS = {
+    "cpu_id": "CPUs",
+    "ram_id": "Rams",
+    "mainboard_id": "Mainboards",
+    "ssd_id": "SSDs",
+    "m2_id": "M2s",
+    "gpu_id": "GPUs",
+    "case_id": "Cases",
+    "psu_id": "PSUs",
+}
+
+def aggregate_skus(computer_sets: Union[dict, List[dict]]) -> Dict[Tuple[str, str, int], int]:
+    """
+    Sum the number of units needed per SKU across one or more computer sets.
+    Keys are (collection_name, id_field, id_value), values are unit counts.
+    """
+    if isinstance(computer_sets, dict):
+        computer_sets = [computer_sets]
+
+    sku_quantities = {}
+    for computer_set in computer_sets:
+        build_quantity = computer_set.get("quantity") or 1
+        for id_field, collection_name in PART_COLLECTIONS.items():
+            if id_value := computer_set.get(id_field):
+                key = (collection_name, id_field, id_value)
+                sku_quantities[key] = sku_quantities.get(key, 0) + build_quantity
+    return sku_quantities
+
+# Query fragment matching items whose stock is kept in `quantity` rather than in shards
+UNSHARDED = {"stock_shards": {"$exists": False}}
+
+def available_filter(quantity: int) -> dict:
+    """
+    Query fragment matching items with at least `quantity` units that are
+    not held by an open reservation (available-to-promise).
+    """
+    return {
+        "$expr": {
+            "$gte": [
+                {"$subtract": ["$quantity", {"$ifNull": ["$reserved", 0]}]},
+                quantity
+            ]
+        }
+    }
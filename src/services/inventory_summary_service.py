@@ -0,0 +1,81 @@
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List
+import asyncio
+import logging
+from src.config import settings
+from src.database.database import Database
+from src.services.inventory import PART_COLLECTIONS, UNSHARDED
+from src.services.stock_shard_service import StockShardService
+from src.utils.cache import TTLCache
+from src.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Stock totals by collection name, each with the time it was computed
+_summary_cache = TTLCache(maxsize=len(PART_COLLECTIONS), ttl=settings.INVENTORY_SUMMARY_TTL_SECONDS)
+# Bumped on invalidation, so a summary computed before a change is not cached after it
+_generations: Dict[str, int] = defaultdict(int)
+metrics.register_gauge("inventory.summary_cache", _summary_cache.stats)
+
+def invalidate_inventory_summary(*collection_names: str) -> None:
+    """
+    Drop cached totals after stock or prices changed in the given
+    collections, or in every collection when none are given
+    """
+    for collection_name in collection_names or PART_COLLECTIONS.values():
+        _generations[collection_name] += 1
+        _summary_cache.pop(collection_name)
+
+class InventorySummaryService:
+    """
+    Item count, stock and stock value per hardware collection.
+
+    Totals are cached per collection for INVENTORY_SUMMARY_TTL_SECONDS and
+    dropped by this process when its own writes change stock or prices.
+    Collections without cached totals are aggregated concurrently. Sharded
+    items are counted with their units on hand from `stock_shards`.
+    """
+    def __init__(self, database: Database):
+        self.db = database
+        self.stock_shard_service = StockShardService(database)
+
+    async def _summarize(self, collection_name: str) -> Dict:
+        generation = _generations[collection_name]
+        collection = await self.db.get_collection(collection_name)
+        result = await collection.aggregate([
+            {"$match": UNSHARDED},
+            {"$group": {
+                "_id": None,
+                "total_items": {"$sum": 1},
+                "total_stock": {"$sum": "$quantity"},
+                "total_value": {"$sum": {"$multiply": ["$price", "$quantity"]}}
+            }}
+        ]).to_list(length=1)
+        totals = result[0] if result else {}
+        summary = {
+            "total_items": totals.get("total_items", 0),
+            "total_stock": totals.get("total_stock", 0),
+            "total_value": totals.get("total_value", 0),
+            "computed_at": datetime.now(timezone.utc)
+        }
+        for item in (await self.stock_shard_service.sharded_items([collection_name]))[collection_name]:
+            summary["total_items"] += 1
+            summary["total_stock"] += item["quantity"]
+            summary["total_value"] += item.get("price", 0) * item["quantity"]
+        if _generations[collection_name] == generation:
+            _summary_cache.set(collection_name, summary)
+        return summary
+
+    async def summarize(self, collection_names: List[str]) -> Dict[str, Dict]:
+        """Totals for each collection; a collection that fails is left out"""
+        summaries = {name: _summary_cache.get(name) for name in collection_names}
+        missing = [name for name, summary in summaries.items() if summary is None]
+        results = await asyncio.gather(*(self._summarize(name) for name in missing), return_exceptions=True)
+        for name, result in zip(missing, results):
+            if isinstance(result, Exception):
+                logger.error("Error getting inventory summary", exc_info=result, extra={"collection": name})
+                summaries.pop(name)
+            else:
+                summaries[name] = result
+        return summaries
@@ -0,0 +1,87 @@
+from typing import Dict, Iterable, Optional, Tuple
+from src.config import settings
+from src.models.order_models import Order, OrderPage
+from src.utils.cache import TTLCache
+from src.utils.metrics import metrics
+
+# Order history page key: (limit, cursor, include_total)
+PageKey = Tuple[int, Optional[str], bool]
+
+class OrderCache:
+    """
+    Bounded cache of validated orders, by order_id, and of order history
+    pages, by user_id.
+
+    OrderService fills it on reads and on create, and writes changes
+    through it, so a process serves its own writes from cache. Other
+    processes see a change once their entry expires.
+    """
+    def __init__(self):
+        self.orders = TTLCache(maxsize=settings.ORDER_CACHE_SIZE, ttl=settings.ORDER_CACHE_TTL_SECONDS)
+        self.histories = TTLCache(maxsize=settings.ORDER_HISTORY_CACHE_USERS, ttl=settings.ORDER_CACHE_TTL_SECONDS)
+        # Counted per page, since one history entry holds several pages
+        self.page_hits = 0
+        self.page_misses = 0
+
+    def get(self, order_id: int) -> Optional[Order]:
+        return self.orders.get(order_id)
+
+    def put(self, order: Order) -> None:
+        """Cache an order and update it on any cached history page that lists it"""
+        self.orders.set(order.order_id, order)
+        pages: Optional[Dict[PageKey, OrderPage]] = self.histories.peek(order.user_id)
+        if not pages:
+            return
+        for key, page in pages.items():
+            if any(item.order_id == order.order_id for item in page.items):
+                pages[key] = page.model_copy(update={
+                    "items": [order if item.order_id == order.order_id else item for item in page.items]
+                })
+
+    def added(self, order: Order) -> None:
+        """A new order: cache it and drop the user's history, whose pages all shift"""
+        self.orders.set(order.order_id, order)
+        self.histories.pop(order.user_id)
+
+    def remove(self, order_id: int, user_id: Optional[int] = None) -> None:
+        self.orders.pop(order_id)
+        if user_id is not None:
+            self.histories.pop(user_id)
+
+    def invalidate(self, order_ids: Iterable[int], user_ids: Iterable[int]) -> None:
+        for order_id in order_ids:
+            self.orders.pop(order_id)
+        for user_id in user_ids:
+            self.histories.pop(user_id)
+
+    def get_page(self, user_id: int, key: PageKey) -> Optional[OrderPage]:
+        pages = self.histories.peek(user_id)
+        page = pages.get(key) if pages else None
+        if page is None:
+            self.page_misses += 1
+            return None
+        self.page_hits += 1
+        self.histories.get(user_id)
+        return page
+
+    def put_page(self, user_id: int, key: PageKey, page: OrderPage) -> None:
+        pages = self.histories.peek(user_id)
+        if pages is None:
+            pages = {}
+            self.histories.set(user_id, pages)
+        pages[key] = page
+
+    def history_stats(self) -> Dict:
+        lookups = self.page_hits + self.page_misses
+        return {
+            "users": len(self.histories),
+            "maxsize": self.histories.maxsize,
+            "hits": self.page_hits,
+            "misses": self.page_misses,
+            "hit_ratio": round(self.page_hits / lookups, 4) if lookups else 0.0
+        }
+
+# Shared by every request handled in this process
+order_cache = OrderCache()
+metrics.register_gauge("orders.cache", order_cache.orders.stats)
+metrics.register_gauge("orders.history_cache", order_cache.history_stats)
@@ -0,0 +1,163 @@
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from bson import ObjectId
+from collections import defaultdict
+import asyncio
+import logging
+from pymongo import ReturnDocument
+from motor.motor_asyncio import AsyncIOMotorClientSession
+from src.config import settings
+from src.database.database import Database
+from src.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+ORDER_EVENT_TYPES = [
+    "order.created",
+    "order.status_changed",
+    "order.shipping_changed",
+    "order.deleted",
+]
+
+def order_event(event_type: str, order_id: int, user_id: Optional[int], data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Build an order event document"""
+    return {
+        "_id": ObjectId(),
+        "type": event_type,
+        "order_id": order_id,
+        "user_id": user_id,
+        "data": jsonable_encoder(data or {}),
+        "created_at": datetime.now(timezone.utc)
+    }
+
+class OrderEventService:
+    """
+    Transactional outbox for order changes.
+
+    OrderService appends events to `order_events` inside the same
+    transaction as the change itself, so an event exists exactly when the
+    change committed. Consumers tail the log with a resume token (the last
+    sequence number they saw) instead of polling `orders`.
+
+    Sequence numbers come from a counter document incremented in the same
+    transaction. Concurrent appends conflict on that document, so one
+    commits before the next can take a number and events become visible in
+    sequence order; a reader never skips an event that commits late.
+    """
+    def __init__(self, database: Database):
+        self.db = database
+        self.collection = "order_events"
+        self.sequence = "order_event_sequence"
+        self.checkpoints = "order_event_checkpoints"
+
+    async def append(self, events: List[Dict[str, Any]], session: AsyncIOMotorClientSession) -> None:
+        if not events:
+            return
+        sequence = await self.db.get_collection(self.sequence)
+        counter = await sequence.find_one_and_update(
+            {"_id": self.collection},
+            {"$inc": {"seq": len(events)}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+            session=session
+        )
+        first = counter["seq"] - len(events) + 1
+        for offset, event in enumerate(events):
+            event["seq"] = first + offset
+
+        collection = await self.db.get_collection(self.collection)
+        if len(events) == 1:
+            await collection.insert_one(events[0], session=session)
+        else:
+            await collection.insert_many(events, ordered=True, session=session)
+
+    async def read(self, after: Optional[str] = None, limit: int = 100) -> Dict[str, Any]:
+        """
+        Up to `limit` events following the resume token `after`, oldest first
+        """
+        try:
+            query = {"seq": {"$gt": int(after) if after else 0}}
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid resume token")
+
+        collection = await self.db.get_collection(self.collection)
+        events = await collection.find(query).sort("seq", 1).limit(limit).to_list(length=limit)
+
+        for event in events:
+            event["event_id"] = str(event.pop("_id"))
+
+        return {
+            "events": events,
+            "resume_token": str(events[-1]["seq"]) if events else after
+        }
+
+    async def get_checkpoint(self, consumer: str) -> Optional[str]:
+        collection = await self.db.get_collection(self.checkpoints)
+        checkpoint = await collection.find_one({"consumer": consumer})
+        return checkpoint.get("resume_token") if checkpoint else None
+
+    async def save_checkpoint(self, consumer: str, resume_token: str) -> None:
+        collection = await self.db.get_collection(self.checkpoints)
+        await collection.update_one(
+            {"consumer": consumer},
+            {"$set": {"resume_token": resume_token, "updated_at": datetime.now(timezone.utc)}},
+            upsert=True
+        )
+
+EventHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+class OrderEventDispatcher:
+    """
+    In-process consumer that tails the order event log and calls the
+    handlers subscribed to each event type. Progress is checkpointed after
+    every batch, so delivery is at-least-once across restarts.
+    """
+    def __init__(self, database: Database, consumer: str = "local-dispatcher"):
+        self.event_service = OrderEventService(database)
+        self.consumer = consumer
+        self._handlers: Dict[str, List[EventHandler]] = defaultdict(list)
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, event_type: str, handler: EventHandler) -> None:
+        """Register a handler for an event type, or "*" for every event"""
+        self._handlers[event_type].append(handler)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        resume_token = await self.event_service.get_checkpoint(self.consumer)
+        if resume_token is not None and not resume_token.isdigit():
+            # Checkpointed before events were numbered
+            resume_token = None
+        while True:
+            try:
+                batch = await self.event_service.read(resume_token, settings.ORDER_EVENTS_BATCH_SIZE)
+                for event in batch["events"]:
+                    await self._dispatch(event)
+                if batch["events"]:
+                    resume_token = batch["resume_token"]
+                    await self.event_service.save_checkpoint(self.consumer, resume_token)
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Error dispatching order events")
+            await asyncio.sleep(settings.ORDER_EVENTS_POLL_INTERVAL_SECONDS)
+
+    async def _dispatch(self, event: Dict[str, Any]) -> None:
+        for handler in [*self._handlers.get(event["type"], []), *self._handlers.get("*", [])]:
+            try:
+                await handler(event)
+                metrics.increment(f"order_events.dispatched.{event['type']}")
+            except Exception:
+                metrics.increment(f"order_events.handler_errors.{event['type']}")
+                logger.exception("Order event handler failed", extra={"event_id": event["event_id"], "event_type": event["type"]})
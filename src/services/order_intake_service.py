@@ -0,0 +1,205 @@
+from fastapi import HTTPException
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+from uuid import uuid4
+from collections import defaultdict
+from contextlib import AsyncExitStack
+import asyncio
+import logging
+from pymongo import ReturnDocument
+from src.config import settings
+from src.database.database import Database
+from src.models.order_models import Order
+from src.services.inventory import aggregate_skus
+from src.services.order_service import OrderService
+from src.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+class OrderIntakeService:
+    """
+    Durable queue of order requests waiting to be turned into orders.
+
+    Requests are validated and stored in the `order_intake` collection, and
+    the caller gets an intake ID to poll. OrderIntakeWorkerPool drains the
+    queue through OrderService.create_order.
+
+    Jobs are processed at least once: a job whose worker died is claimed
+    again when its lease runs out. create_order marks the job Completed in
+    the order's own transaction, so running a job twice creates one order.
+    """
+    def __init__(self, database: Database):
+        self.db = database
+        self.collection = "order_intake"
+
+    @staticmethod
+    def validate(order_data: dict) -> dict:
+        """
+        Run the same validation create_order will, before the request is queued
+        """
+        order_data = dict(order_data)
+        if "order_details" not in order_data and isinstance(order_data.get("computer_set"), dict):
+            order_data["order_details"] = order_data.pop("computer_set")
+        try:
+            Order(**{
+                **order_data,
+                "order_id": 10000,
+                "order_date": datetime.now(timezone.utc),
+                "status": "Pending"
+            })
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Invalid order data: {str(e)}")
+        return order_data
+
+    async def enqueue(self, order_data: dict) -> Dict:
+        order_data = self.validate(order_data)
+        collection = await self.db.get_collection(self.collection)
+
+        # Backpressure: refuse new work once the queue is full
+        pending = await collection.count_documents({"status": {"$in": ["Queued", "Processing"]}})
+        if pending >= settings.ORDER_INTAKE_MAX_PENDING:
+            metrics.increment("order_intake.rejected")
+            raise HTTPException(
+                status_code=503,
+                detail="Order queue is full, please retry shortly",
+                headers={"Retry-After": "5"}
+            )
+
+        builds = [order_data["order_details"], *order_data.get("builds", [])]
+        now = datetime.now(timezone.utc)
+        job = {
+            "intake_id": uuid4().hex,
+            "user_id": order_data["user_id"],
+            "order_data": order_data,
+            "skus": sorted(f"{collection_name}:{id_value}" for collection_name, _, id_value in aggregate_skus(builds)),
+            "status": "Queued",
+            "attempts": 0,
+            "order_id": None,
+            "error": None,
+            "created_at": now,
+            "available_at": now,
+            "updated_at": now
+        }
+        await collection.insert_one(job)
+        metrics.increment("order_intake.queued")
+        return self._receipt(job)
+
+    async def get_status(self, intake_id: str) -> Dict:
+        collection = await self.db.get_collection(self.collection)
+        job = await collection.find_one({"intake_id": intake_id})
+        if not job:
+            raise HTTPException(status_code=404, detail=f"Order request {intake_id} not found")
+        return self._receipt(job)
+
+    async def claim_next(self) -> Optional[Dict]:
+        """
+        Take the oldest runnable job. Jobs whose lease ran out (worker died)
+        become runnable again.
+        """
+        collection = await self.db.get_collection(self.collection)
+        now = datetime.now(timezone.utc)
+        return await collection.find_one_and_update(
+            {
+                "$or": [
+                    {"status": "Queued", "available_at": {"$lte": now}},
+                    {"status": "Processing", "lease_expires_at": {"$lt": now}}
+                ]
+            },
+            {
+                "$set": {
+                    "status": "Processing",
+                    "lease_expires_at": now + timedelta(seconds=settings.ORDER_INTAKE_LEASE_SECONDS),
+                    "updated_at": now
+                },
+                "$inc": {"attempts": 1}
+            },
+            sort=[("created_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def fail(self, intake_id: str, error: str, retry: bool) -> None:
+        collection = await self.db.get_collection(self.collection)
+        now = datetime.now(timezone.utc)
+        update = {"error": error, "updated_at": now}
+        if retry:
+            update["status"] = "Queued"
+            update["available_at"] = now + timedelta(seconds=settings.ORDER_INTAKE_RETRY_DELAY_SECONDS)
+        else:
+            update["status"] = "Failed"
+        # A job completed by its order transaction stays completed
+        await collection.update_one(
+            {"intake_id": intake_id, "status": {"$ne": "Completed"}},
+            {"$set": update, "$unset": {"lease_expires_at": ""}}
+        )
+
+    def _receipt(self, job: Dict) -> Dict:
+        return {
+            "intake_id": job["intake_id"],
+            "user_id": job["user_id"],
+            "status": job["status"],
+            "order_id": job.get("order_id"),
+            "error": job.get("error"),
+            "created_at": job["created_at"],
+            "updated_at": job.get("updated_at"),
+            "status_url": f"{settings.API_PREFIX}/orders/intake/{job['intake_id']}"
+        }
+
+class OrderIntakeWorkerPool:
+    """
+    Bounded pool of asyncio workers draining the order intake queue.
+
+    Workers lock every SKU of a job (in sorted order) before running it, so
+    jobs that touch the same SKU are processed in the order they were
+    claimed and never contend with each other inside this process.
+    """
+    def __init__(self, database: Database, workers: Optional[int] = None):
+        self.intake_service = OrderIntakeService(database)
+        self.order_service = OrderService(database)
+        self.workers = workers or settings.ORDER_INTAKE_WORKERS
+        self._sku_locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        for _ in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._run()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                job = await self.intake_service.claim_next()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Error claiming order request")
+                job = None
+
+            if job is None:
+                await asyncio.sleep(settings.ORDER_INTAKE_POLL_INTERVAL_SECONDS)
+                continue
+
+            await self._process(job)
+
+    async def _process(self, job: Dict) -> None:
+        async with AsyncExitStack() as stack:
+            for sku in job.get("skus", []):
+                await stack.enter_async_context(self._sku_locks[sku])
+
+            try:
+                # Completes the job as part of the order transaction
+                await self.order_service.create_order(dict(job["order_data"]), intake_id=job["intake_id"])
+                metrics.increment("order_intake.completed")
+            except HTTPException as e:
+                # Client errors (out of stock, invalid reservation) will not succeed on retry
+                retry = e.status_code >= 500 and job["attempts"] < settings.ORDER_INTAKE_MAX_ATTEMPTS
+                await self.intake_service.fail(job["intake_id"], str(e.detail), retry)
+                metrics.increment("order_intake.retried" if retry else "order_intake.failed")
+            except Exception as e:
+                retry = job["attempts"] < settings.ORDER_INTAKE_MAX_ATTEMPTS
+                await self.intake_service.fail(job["intake_id"], str(e), retry)
+                metrics.increment("order_intake.retried" if retry else "order_intake.failed")
@@ -1,25 +1,55 @@
 from fastapi import HTTPException
 from datetime import datetime, timezone
 from src.database.database import Database
-from src.models.order_models import Order, ComputerSet, ShippingDetails
+from src.models.order_models import Order, OrderPage, OrderItemPrice, ComputerSet, ShippingDetails
+from src.services.inventory import UNSHARDED, aggregate_skus, available_filter
+from src.services.reservation_service import ReservationService
+from src.services.catalog_service import CatalogService
+from src.services.stock_shard_service import StockShardService
+from src.services.flash_sale_service import FlashSaleService
+from src.services.order_cache import order_cache
+from src.services.inventory_summary_service import invalidate_inventory_summary
+from src.services.order_event_service import OrderEventService, order_event
+from src.services.sales_rollup_service import SalesRollupService
+from src.utils.transactions import run_in_transaction, is_transient
+from src.utils.metrics import metrics
+from src.utils.pagination import decode_cursor, keyset_filter, page_cursor
+from src.config import settings
+from typing import Dict, List, Optional, Union
 import asyncio
 from motor.motor_asyncio import AsyncIOMotorClientSession
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+# Order history sort: newest first, order_id breaks ties between equal dates
+ORDER_HISTORY_SORT = [("order_date", -1), ("order_id", -1)]
+
+ORDER_STATUSES = ["Pending", "Confirmed", "Delivered", "Cancelled"]
+SHIPPING_STATUSES = ["Pending", "Shipped", "Delivered", "Cancelled"]
 
 class OrderService:
     def __init__(self, database: Database):
         self.db = database
         self.collection = "orders"
+        self.reservation_service = ReservationService(database)
+        self.catalog_service = CatalogService(database)
+        self.stock_shard_service = StockShardService(database)
+        self.flash_sale_service = FlashSaleService(database)
+        self.event_service = OrderEventService(database)
+        self.sales_rollup_service = SalesRollupService(database)
 
-    async def create_order(self, order_data: dict) -> Order:
+    async def create_order(self, order_data: dict, intake_id: Optional[str] = None) -> Order:
+        """
+        Create an order. With `intake_id`, the order intake job is marked
+        Completed in the same transaction; if the job was already completed,
+        the order it created is returned instead of creating another one.
+        """
         # Get MongoDB client from database class
         client = self.db._client
         
-        # Generate order ID (in a real application, this should be more sophisticated)
+        # Generate order ID; the unique order_id index catches concurrent orders taking the same one
         collection = await self.db.get_collection(self.collection)
-        
-        # Find latest order
-        latest_order = await collection.find_one(sort=[("order_id", -1)])
-        new_order_id = 10000 if not latest_order else latest_order["order_id"] + 1
+        new_order_id = await self._next_order_id(collection)
         
         # Create order with current timestamp
         order_data["order_id"] = new_order_id
@@ -39,307 +69,524 @@ class OrderService:
             order = Order(**order_data)
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Invalid order data: {str(e)}")
-            
-        # Use a transaction to ensure all operations succeed or fail together
-        async with await client.start_session() as session:
-            try:
-                # Start a transaction (no await here, it's not a coroutine)
-                session.start_transaction()
-                
-                # Check and update inventory quantities
-                if "order_details" in order_data or "computer_set" in order_data:
-                    computer_set = order_data.get("order_details") or order_data.get("computer_set")
-                    await self.check_and_update_inventory(computer_set, session)
-                
-                # Insert into database
-                result = await collection.insert_one(order.model_dump(), session=session)
-                if not result:
-                    await session.abort_transaction()
-                    raise HTTPException(status_code=500, detail="Failed to create order")
-                
-                # Commit the transaction
-                await session.commit_transaction()
-                return order
-                
-            except Exception as e:
-                # Abort the transaction if any error occurs
-                try:
-                    await session.abort_transaction()
-                except:
-                    # If abort itself fails, just log it
-                    pass
-                
-                if isinstance(e, HTTPException):
-                    raise
-                raise HTTPException(status_code=500, detail=f"Transaction failed: {str(e)}")
-
-    async def check_and_update_inventory(self, computer_set: dict, session: AsyncIOMotorClientSession = None) -> None:
-        """
-        Check if all items in the computer set are available in sufficient quantity
-        and update the inventory by reducing the quantity for each item.
-        """
-        inventory_updates = []
         
-        # Check CPU if present
-        if cpu_id := computer_set.get("cpu_id"):
-            inventory_updates.append(self.check_and_prepare_update("CPUs", {"cpu_id": cpu_id}, session))
-            
-        # Check RAM if present
-        if ram_id := computer_set.get("ram_id"):
-            inventory_updates.append(self.check_and_prepare_update("Rams", {"ram_id": ram_id}, session))
-            
-        # Check Mainboard if present
-        if mb_id := computer_set.get("mainboard_id"):
-            inventory_updates.append(self.check_and_prepare_update("Mainboards", {"mainboard_id": mb_id}, session))
+        sku_quantities = aggregate_skus([build.model_dump() for build in order.all_builds()])
+        
+        # Price the order from the catalog, not from what the client sent
+        total_price, item_prices = await self.catalog_service.price_skus(sku_quantities)
+        if order.total_price != total_price:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Order total {order.total_price} does not match catalog prices (expected {total_price})"
+            )
+        order.item_prices = [OrderItemPrice(**item) for item in item_prices]
             
-        # Check SSD if present
-        if ssd_id := computer_set.get("ssd_id"):
-            inventory_updates.append(self.check_and_prepare_update("SSDs", {"ssd_id": ssd_id}, session))
+        intakes = await self.db.get_collection("order_intake")
+        completed_order_id = None
+        
+        async def create(session: AsyncIOMotorClientSession) -> Optional[Order]:
+            nonlocal completed_order_id
+            computer_sets = [build.model_dump() for build in order.all_builds()]
             
-        # Check M2 if present
-        if m2_id := computer_set.get("m2_id"):
-            inventory_updates.append(self.check_and_prepare_update("M2s", {"m2_id": m2_id}, session))
+            if intake_id:
+                # Jobs are processed at least once; only the run that completes the job creates the order
+                job = await intakes.find_one_and_update(
+                    {"intake_id": intake_id, "status": {"$ne": "Completed"}},
+                    {
+                        "$set": {"status": "Completed", "order_id": order.order_id, "error": None, "updated_at": order.order_date},
+                        "$unset": {"lease_expires_at": ""}
+                    },
+                    session=session
+                )
+                if job is None:
+                    completed = await intakes.find_one({"intake_id": intake_id}, {"order_id": 1}, session=session)
+                    if not completed:
+                        raise HTTPException(status_code=404, detail=f"Order request {intake_id} not found")
+                    completed_order_id = completed["order_id"]
+                    return None
             
-        # Check GPU if present
-        if gpu_id := computer_set.get("gpu_id"):
-            inventory_updates.append(self.check_and_prepare_update("GPUs", {"gpu_id": gpu_id}, session))
+            if order.reservation_id:
+                # Stock was already held at checkout; confirm the hold instead of re-checking
+                reservation = await self.reservation_service.confirm(
+                    order.reservation_id, order.user_id, order.order_id, session
+                )
+                held = {(item.collection, item.id_field, item.item_id): item.quantity for item in reservation.items}
+                if held != aggregate_skus(computer_sets):
+                    raise HTTPException(status_code=409, detail="Reservation does not match the items in the order")
+            else:
+                # Check and update inventory quantities for every build in the order
+                await self.check_and_update_inventory(computer_sets, session)
             
-        # Check Case if present
-        if case_id := computer_set.get("case_id"):
-            inventory_updates.append(self.check_and_prepare_update("Cases", {"case_id": case_id}, session))
+            # Insert into database
+            result = await collection.insert_one(order.model_dump(), session=session)
+            if not result:
+                raise HTTPException(status_code=500, detail="Failed to create order")
             
-        # Check PSU if present
-        if psu_id := computer_set.get("psu_id"):
-            inventory_updates.append(self.check_and_prepare_update("PSUs", {"psu_id": psu_id}, session))
+            await self.event_service.append([order_event(
+                "order.created", order.order_id, order.user_id,
+                {"status": order.status, "total_price": order.total_price}
+            )], session)
+            await self.sales_rollup_service.record([order], 1, session)
+            return order
+        
+        # Flash-sale SKUs are admitted in memory first; a reserved order already holds its units
+        acquired = {} if order.reservation_id else self.flash_sale_service.gate.acquire(sku_quantities)
+        committed = False
+        try:
+            for attempt in range(settings.ORDER_ID_MAX_ATTEMPTS):
+                try:
+                    # Use a transaction to ensure all operations succeed or fail together
+                    created = await run_in_transaction(
+                        client, create, name="create_order", passthrough=(DuplicateKeyError,)
+                    )
+                    break
+                except DuplicateKeyError:
+                    # Another order took this ID after it was read; take the next free one
+                    metrics.increment("orders.order_id_conflicts")
+                    if attempt + 1 == settings.ORDER_ID_MAX_ATTEMPTS:
+                        raise HTTPException(
+                            status_code=503,
+                            detail="Could not allocate an order ID, please retry",
+                            headers={"Retry-After": "1"}
+                        )
+                    order.order_id = await self._next_order_id(collection)
+            if created is None:
+                return await self.get_order(completed_order_id)
+            committed = True
+            order_cache.added(created)
+            invalidate_inventory_summary(*{collection_name for collection_name, _, _ in sku_quantities})
+            return created
+        finally:
+            if acquired:
+                await self.flash_sale_service.settle(acquired, committed)
+
+    @staticmethod
+    async def _next_order_id(collection) -> int:
+        """One more than the latest order ID"""
+        latest_order = await collection.find_one(sort=[("order_id", -1)], projection={"order_id": 1})
+        return 10000 if not latest_order else latest_order["order_id"] + 1
+
+    async def check_and_update_inventory(self, computer_sets: Union[dict, List[dict]], session: AsyncIOMotorClientSession = None) -> None:
+        """
+        Check if all items in the computer sets are available in sufficient quantity
+        and update the inventory by reducing the quantity for each item.
+
+        Items are batched by SKU first, so an order for many identical builds
+        applies a single decrement per SKU.
+        """
+        sku_quantities = aggregate_skus(computer_sets)
+
+        inventory_updates = [
+            self.check_and_prepare_update(collection_name, {id_field: id_value}, session, quantity)
+            for (collection_name, id_field, id_value), quantity in sku_quantities.items()
+        ]
         
         # Execute all inventory checks and updates
         results = await asyncio.gather(*inventory_updates, return_exceptions=True)
         
         # Check if any errors occurred
         errors = [result for result in results if isinstance(result, Exception)]
+        
+        # Let write conflicts reach the transaction runner so it can retry
+        for err in errors:
+            if is_transient(err):
+                raise err
+        
         if errors:
-            error_messages = [str(err) for err in errors]
+            error_messages = [str(err.detail) if isinstance(err, HTTPException) else str(err) for err in errors]
             raise HTTPException(status_code=400, detail=f"Inventory issues: {', '.join(error_messages)}")
     
-    async def check_and_prepare_update(self, collection_name: str, query: dict, session: AsyncIOMotorClientSession = None) -> None:
+    async def check_and_prepare_update(self, collection_name: str, query: dict, session: AsyncIOMotorClientSession = None, quantity: int = 1) -> None:
         """
-        Check if an item exists in the collection and has sufficient quantity.
-        If yes, update the inventory by reducing the quantity by 1.
+        Reduce the quantity of an item by `quantity` if enough stock is available.
+        The stock check and decrement are a single conditional update; items
+        with sharded stock are decremented on one of their shards instead.
         """
         collection = await self.db.get_collection(collection_name)
         
-        # Check if the item exists and has sufficient quantity
-        item = await collection.find_one(query, session=session)
-        if not item:
-            id_field = list(query.keys())[0]
-            id_value = query[id_field]
-            raise HTTPException(status_code=404, detail=f"Item with {id_field}={id_value} not found")
-        
-        if item["quantity"] < 1:
-            id_field = list(query.keys())[0]
-            id_value = query[id_field]
-            raise HTTPException(status_code=400, detail=f"Item with {id_field}={id_value} is out of stock")
-        
-        # Update the inventory by reducing the quantity by 1
+        # Decrement only if the item has sufficient unreserved quantity
         result = await collection.update_one(
-            query,
-            {"$inc": {"quantity": -1}},
+            {**query, **UNSHARDED, **available_filter(quantity)},
+            {"$inc": {"quantity": -quantity}},
             session=session
         )
         
         if result.modified_count == 0:
             id_field = list(query.keys())[0]
             id_value = query[id_field]
-            raise HTTPException(status_code=500, detail=f"Failed to update inventory for {id_field}={id_value}")
+            
+            # Find out whether the item is missing, sharded or just out of stock
+            item = await collection.find_one(query, {"quantity": 1, "reserved": 1, "stock_shards": 1}, session=session)
+            if not item:
+                raise HTTPException(status_code=404, detail=f"Item with {id_field}={id_value} not found")
+            
+            if item.get("stock_shards"):
+                if await self.stock_shard_service.take(collection_name, id_field, id_value, item["stock_shards"], quantity, session):
+                    return
+                available = await self.stock_shard_service.total(collection_name, id_field, id_value, session)
+            else:
+                available = item.get("quantity", 0) - item.get("reserved", 0)
+            raise HTTPException(
+                status_code=400,
+                detail=f"Item with {id_field}={id_value} is out of stock (requested {quantity}, available {max(available, 0)})"
+            )
 
     async def get_order(self, order_id: int) -> Order:
+        cached = order_cache.get(order_id)
+        if cached is not None:
+            return cached
+        
         collection = await self.db.get_collection(self.collection)
         order_data = await collection.find_one({"order_id": order_id})
         if not order_data:
             raise HTTPException(status_code=404, detail=f"Order with ID {order_id} not found")
         
-        return Order(**order_data)
+        order = Order(**order_data)
+        order_cache.put(order)
+        return order
+
+    async def get_user_orders(self, user_id: int, limit: int = 20, cursor: Optional[str] = None,
+                              include_total: bool = False) -> OrderPage:
+        """
+        One page of a user's order history, newest first.
 
-    async def get_user_orders(self, user_id: int) -> list[Order]:
+        Pages are keyed on (order_date, order_id) and served from the
+        (user_id, order_date, order_id) index, so every page costs the same
+        no matter how deep into the history it is.
+        """
+        limit = max(1, min(limit, settings.ORDER_HISTORY_MAX_PAGE_SIZE))
+        page_key = (limit, cursor, include_total)
+        cached = order_cache.get_page(user_id, page_key)
+        if cached is not None:
+            return cached
+        
         collection = await self.db.get_collection(self.collection)
-        cursor = collection.find({"user_id": user_id})
-        orders_data = await cursor.to_list(length=100)  # Limit to 100 orders
         
-        if not orders_data:
-            return []
+        query = {"user_id": user_id}
+        if cursor:
+            query.update(keyset_filter(ORDER_HISTORY_SORT, decode_cursor(cursor)))
+        
+        # Fetch one extra order to know whether another page exists
+        orders_data = await collection.find(query).sort(ORDER_HISTORY_SORT).limit(limit + 1).to_list(length=limit + 1)
+        has_more = len(orders_data) > limit
+        orders_data = orders_data[:limit]
         
-        return [Order(**order) for order in orders_data]
+        page = OrderPage(
+            items=[Order(**order) for order in orders_data],
+            next_cursor=page_cursor(orders_data[-1], ORDER_HISTORY_SORT) if has_more else None
+        )
+        
+        if include_total:
+            # Counting stops at the cap, which keeps the count cheap for very long histories
+            cap = settings.ORDER_HISTORY_COUNT_CAP
+            page.total = await collection.count_documents({"user_id": user_id}, limit=cap)
+            page.total_is_estimate = page.total >= cap
+        
+        order_cache.put_page(user_id, page_key, page)
+        return page
 
     async def update_order_status(self, order_id: int, status: str) -> Order:
         # Validate status
-        valid_statuses = ["Pending", "Confirmed", "Delivered", "Cancelled"]
-        if status not in valid_statuses:
-            raise HTTPException(status_code=400, detail=f"Invalid status. Must be one of {valid_statuses}")
+        if status not in ORDER_STATUSES:
+            raise HTTPException(status_code=400, detail=f"Invalid status. Must be one of {ORDER_STATUSES}")
         
         # Get MongoDB client from database class
         client = self.db._client
+        collection = await self.db.get_collection(self.collection)
         
-        # Get the current order to check if status is changing to/from Cancelled
-        current_order = await self.get_order(order_id)
+        async def update(session: AsyncIOMotorClientSession) -> tuple:
+            # Update the order and get it back in one round trip. The previous
+            # status decides whether inventory moves, so the write returns the
+            # document as it was and the new status is applied to it here.
+            order_data = await collection.find_one_and_update(
+                {"order_id": order_id}, 
+                {"$set": {"status": status}},
+                return_document=ReturnDocument.BEFORE,
+                session=session
+            )
+            if not order_data:
+                raise HTTPException(status_code=404, detail=f"Order with ID {order_id} not found")
+            previous_status = order_data.get("status")
+            order = Order(**{**order_data, "status": status})
+            
+            computer_sets = [build.model_dump() for build in order.all_builds()]
+            # Only moves into or out of Cancelled touch inventory
+            stock_moved = (status == "Cancelled") != (previous_status == "Cancelled")
+            
+            # If order is being cancelled, restore inventory quantities
+            if status == "Cancelled" and previous_status != "Cancelled":
+                await self.restore_inventory(computer_sets, session)
+                await self.sales_rollup_service.record([order], -1, session)
+            
+            # If order is being un-cancelled, deduct inventory quantities again
+            if previous_status == "Cancelled" and status != "Cancelled":
+                await self.check_and_update_inventory(computer_sets, session)
+                await self.sales_rollup_service.record([order], 1, session)
+            
+            if previous_status != status:
+                await self.event_service.append([order_event(
+                    "order.status_changed", order_id, order.user_id,
+                    {"from": previous_status, "to": status}
+                )], session)
+            return order, stock_moved
         
-        async with await client.start_session() as session:
-            try:
-                # Start a transaction (no await here, it's not a coroutine)
-                session.start_transaction()
-                
-                # If order is being cancelled, restore inventory quantities
-                if status == "Cancelled" and current_order.status != "Cancelled":
-                    if hasattr(current_order, "order_details") and current_order.order_details:
-                        await self.restore_inventory(current_order.order_details.model_dump(), session)
-                
-                # If order is being un-cancelled, deduct inventory quantities again
-                if current_order.status == "Cancelled" and status != "Cancelled":
-                    if hasattr(current_order, "order_details") and current_order.order_details:
-                        await self.check_and_update_inventory(current_order.order_details.model_dump(), session)
-                
-                # Get collection
-                collection = await self.db.get_collection(self.collection)
-                
-                # Update order
-                update_result = await collection.update_one(
-                    {"order_id": order_id}, 
-                    {"$set": {"status": status}},
-                    session=session
-                )
-                
-                if update_result.matched_count == 0:
-                    await session.abort_transaction()
-                    raise HTTPException(status_code=404, detail=f"Order with ID {order_id} not found")
-                
-                # Commit the transaction
-                await session.commit_transaction()
-                
-                # Get updated order
-                return await self.get_order(order_id)
-                
-            except Exception as e:
-                # Abort the transaction if any error occurs
-                try:
-                    await session.abort_transaction()
-                except:
-                    # If abort itself fails, just log it
-                    pass
-                
-                if isinstance(e, HTTPException):
-                    raise
-                raise HTTPException(status_code=500, detail=f"Transaction failed: {str(e)}")
+        order, stock_moved = await run_in_transaction(client, update, name="update_order_status")
+        order_cache.put(order)
+        if stock_moved:
+            await self._stock_changed([build.model_dump() for build in order.all_builds()])
+        return order
 
-    async def restore_inventory(self, computer_set: dict, session: AsyncIOMotorClientSession = None) -> None:
+    async def restore_inventory(self, computer_sets: Union[dict, List[dict]], session: AsyncIOMotorClientSession = None) -> None:
         """
         Restore inventory quantities when an order is cancelled.
         """
-        inventory_updates = []
-        
-        # Restore CPU if present
-        if cpu_id := computer_set.get("cpu_id"):
-            inventory_updates.append(self.restore_item_quantity("CPUs", {"cpu_id": cpu_id}, session))
-            
-        # Restore RAM if present
-        if ram_id := computer_set.get("ram_id"):
-            inventory_updates.append(self.restore_item_quantity("Rams", {"ram_id": ram_id}, session))
-            
-        # Restore Mainboard if present
-        if mb_id := computer_set.get("mainboard_id"):
-            inventory_updates.append(self.restore_item_quantity("Mainboards", {"mainboard_id": mb_id}, session))
-            
-        # Restore SSD if present
-        if ssd_id := computer_set.get("ssd_id"):
-            inventory_updates.append(self.restore_item_quantity("SSDs", {"ssd_id": ssd_id}, session))
-            
-        # Restore M2 if present
-        if m2_id := computer_set.get("m2_id"):
-            inventory_updates.append(self.restore_item_quantity("M2s", {"m2_id": m2_id}, session))
-            
-        # Restore GPU if present
-        if gpu_id := computer_set.get("gpu_id"):
-            inventory_updates.append(self.restore_item_quantity("GPUs", {"gpu_id": gpu_id}, session))
-            
-        # Restore Case if present
-        if case_id := computer_set.get("case_id"):
-            inventory_updates.append(self.restore_item_quantity("Cases", {"case_id": case_id}, session))
-            
-        # Restore PSU if present
-        if psu_id := computer_set.get("psu_id"):
-            inventory_updates.append(self.restore_item_quantity("PSUs", {"psu_id": psu_id}, session))
+        sku_quantities = aggregate_skus(computer_sets)
+
+        inventory_updates = [
+            self.restore_item_quantity(collection_name, {id_field: id_value}, session, quantity)
+            for (collection_name, id_field, id_value), quantity in sku_quantities.items()
+        ]
         
         # Execute all inventory restorations
-        await asyncio.gather(*inventory_updates, return_exceptions=True)
+        results = await asyncio.gather(*inventory_updates, return_exceptions=True)
+        
+        # Surface database errors so the transaction is retried or aborted
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
     
-    async def restore_item_quantity(self, collection_name: str, query: dict, session: AsyncIOMotorClientSession = None) -> None:
+    async def restore_item_quantity(self, collection_name: str, query: dict, session: AsyncIOMotorClientSession = None, quantity: int = 1) -> None:
         """
-        Increase the quantity of an item by 1 when an order is cancelled.
+        Increase the quantity of an item by `quantity` when an order is cancelled.
+        Items with sharded stock get the units back on one of their shards.
         """
         collection = await self.db.get_collection(collection_name)
         
-        # Update the inventory by increasing the quantity by 1
-        await collection.update_one(
-            query,
-            {"$inc": {"quantity": 1}},
+        # Update the inventory by increasing the quantity
+        result = await collection.update_one(
+            {**query, **UNSHARDED},
+            {"$inc": {"quantity": quantity}},
             session=session
         )
+        
+        if result.matched_count == 0:
+            id_field = list(query.keys())[0]
+            item = await collection.find_one(query, {"stock_shards": 1}, session=session)
+            if item and item.get("stock_shards"):
+                await self.stock_shard_service.put(collection_name, id_field, query[id_field], item["stock_shards"], quantity, session)
 
     async def update_shipping_status(self, order_id: int, shipping_status: str) -> Order:
         # Validate status
-        valid_statuses = ["Pending", "Shipped", "Delivered", "Cancelled"]
-        if shipping_status not in valid_statuses:
-            raise HTTPException(status_code=400, detail=f"Invalid shipping status. Must be one of {valid_statuses}")
+        if shipping_status not in SHIPPING_STATUSES:
+            raise HTTPException(status_code=400, detail=f"Invalid shipping status. Must be one of {SHIPPING_STATUSES}")
         
         # Get collection
         collection = await self.db.get_collection(self.collection)
         
-        # Update shipping status
-        update_result = await collection.update_one(
-            {"order_id": order_id}, 
-            {"$set": {"shipping_details.shipping_status": shipping_status}}
-        )
-        
-        if update_result.matched_count == 0:
-            raise HTTPException(status_code=404, detail=f"Order with ID {order_id} not found")
+        async def update(session: AsyncIOMotorClientSession) -> Order:
+            # Update shipping status and get the order back from the same write;
+            # the previous value is kept for the event
+            order_data = await collection.find_one_and_update(
+                {"order_id": order_id}, 
+                {"$set": {"shipping_details.shipping_status": shipping_status}},
+                return_document=ReturnDocument.BEFORE,
+                session=session
+            )
+            
+            if order_data is None:
+                raise HTTPException(status_code=404, detail=f"Order with ID {order_id} not found")
+            
+            previous_status = order_data["shipping_details"].get("shipping_status")
+            order_data["shipping_details"]["shipping_status"] = shipping_status
+            order = Order(**order_data)
+            
+            if previous_status != shipping_status:
+                await self.event_service.append([order_event(
+                    "order.shipping_changed", order_id, order.user_id,
+                    {"from": previous_status, "to": shipping_status}
+                )], session)
+            return order
         
-        # Get updated order
-        return await self.get_order(order_id)
+        order = await run_in_transaction(self.db._client, update, name="update_shipping_status")
+        order_cache.put(order)
+        return order
 
     async def delete_order(self, order_id: int) -> bool:
         # Get MongoDB client from database class
         client = self.db._client
+        collection = await self.db.get_collection(self.collection)
         
-        async with await client.start_session() as session:
-            try:
-                # Start a transaction (no await here, it's not a coroutine)
-                session.start_transaction()
-                
-                # Get the order first to restore inventory if necessary
-                order = await self.get_order(order_id)
-                
-                # Restore inventory quantities if order is not cancelled
-                if order.status != "Cancelled" and hasattr(order, "order_details") and order.order_details:
-                    await self.restore_inventory(order.order_details.model_dump(), session)
-                
-                # Delete the order
-                collection = await self.db.get_collection(self.collection)
-                delete_result = await collection.delete_one({"order_id": order_id}, session=session)
-                
-                if delete_result.deleted_count == 0:
-                    await session.abort_transaction()
-                    raise HTTPException(status_code=404, detail=f"Order with ID {order_id} not found")
-                
-                # Commit the transaction
-                await session.commit_transaction()
-                return True
-                
-            except Exception as e:
-                # Abort the transaction if any error occurs
-                try:
-                    await session.abort_transaction()
-                except:
-                    # If abort itself fails, just log it
-                    pass
+        async def delete(session: AsyncIOMotorClientSession) -> Order:
+            # Get the order first to restore inventory if necessary
+            order_data = await collection.find_one({"order_id": order_id}, session=session)
+            if not order_data:
+                raise HTTPException(status_code=404, detail=f"Order with ID {order_id} not found")
+            order = Order(**order_data)
+            
+            # Restore inventory quantities if order is not cancelled
+            if order.status != "Cancelled":
+                await self.restore_inventory([build.model_dump() for build in order.all_builds()], session)
+                await self.sales_rollup_service.record([order], -1, session)
+            
+            # Delete the order
+            await collection.delete_one({"order_id": order_id}, session=session)
+            
+            await self.event_service.append([order_event(
+                "order.deleted", order_id, order.user_id, {"status": order.status}
+            )], session)
+            return order
+        
+        deleted = await run_in_transaction(client, delete, name="delete_order")
+        order_cache.remove(order_id, deleted.user_id)
+        if deleted.status != "Cancelled":
+            await self._stock_changed([build.model_dump() for build in deleted.all_builds()])
+        return True
+
+    async def bulk_update_order_status(self, order_ids: List[int], status: str) -> dict:
+        """
+        Set the status of many orders in one transaction.
+
+        Inventory for orders moving into or out of Cancelled is aggregated
+        per SKU across the whole batch and adjusted once per SKU; the order
+        documents are updated with a single bulk_write.
+        """
+        if status not in ORDER_STATUSES:
+            raise HTTPException(status_code=400, detail=f"Invalid status. Must be one of {ORDER_STATUSES}")
+        
+        order_ids = list(dict.fromkeys(order_ids))
+        client = self.db._client
+        collection = await self.db.get_collection(self.collection)
+        
+        async def update(session: AsyncIOMotorClientSession) -> tuple:
+            cursor = collection.find(
+                {"order_id": {"$in": order_ids}},
+                {
+                    "_id": 0, "order_id": 1, "user_id": 1, "status": 1, "order_details": 1, "builds": 1,
+                    "order_date": 1, "total_price": 1, "item_prices": 1
+                },
+                session=session
+            )
+            current = {order["order_id"]: order async for order in cursor}
+            
+            results = {}
+            cancelled_sets, uncancelled_sets, changed_ids = [], [], []
+            cancelled_orders, uncancelled_orders = [], []
+            for order_id in order_ids:
+                order = current.get(order_id)
+                if order is None:
+                    results[order_id] = "not_found"
+                    continue
+                if order.get("status") == status:
+                    results[order_id] = "unchanged"
+                    continue
                 
-                if isinstance(e, HTTPException):
-                    raise
-                raise HTTPException(status_code=500, detail=f"Transaction failed: {str(e)}")
+                computer_sets = [order["order_details"], *order.get("builds", [])]
+                if status == "Cancelled":
+                    cancelled_sets.extend(computer_sets)
+                    cancelled_orders.append(order)
+                elif order.get("status") == "Cancelled":
+                    uncancelled_sets.extend(computer_sets)
+                    uncancelled_orders.append(order)
+                changed_ids.append(order_id)
+                results[order_id] = "updated"
+            
+            # One inventory adjustment per SKU for the whole batch
+            if cancelled_sets:
+                await self.restore_inventory(cancelled_sets, session)
+            if uncancelled_sets:
+                await self.check_and_update_inventory(uncancelled_sets, session)
+            await self.sales_rollup_service.record(cancelled_orders, -1, session)
+            await self.sales_rollup_service.record(uncancelled_orders, 1, session)
+            
+            if changed_ids:
+                await collection.bulk_write(
+                    [UpdateOne({"order_id": order_id}, {"$set": {"status": status}}) for order_id in changed_ids],
+                    ordered=False,
+                    session=session
+                )
+                await self.event_service.append([
+                    order_event(
+                        "order.status_changed", order_id, current[order_id].get("user_id"),
+                        {"from": current[order_id].get("status"), "to": status}
+                    )
+                    for order_id in changed_ids
+                ], session)
+            return results, {current[order_id].get("user_id") for order_id in changed_ids}, cancelled_sets + uncancelled_sets
+        
+        results, user_ids, moved_sets = await run_in_transaction(client, update, name="bulk_update_order_status")
+        order_cache.invalidate([order_id for order_id, result in results.items() if result == "updated"], user_ids)
+        if moved_sets:
+            await self._stock_changed(moved_sets)
+        return self._bulk_summary(results)
+
+    async def bulk_update_shipping_status(self, updates: Dict[int, str]) -> dict:
+        """
+        Apply many shipping status changes (order_id -> shipping status) with one bulk_write
+        """
+        results = {}
+        valid_updates = {}
+        for order_id, shipping_status in updates.items():
+            if shipping_status in SHIPPING_STATUSES:
+                valid_updates[order_id] = shipping_status
+            else:
+                results[order_id] = "invalid_status"
+        
+        collection = await self.db.get_collection(self.collection)
+        
+        async def update(session: AsyncIOMotorClientSession) -> tuple:
+            cursor = collection.find(
+                {"order_id": {"$in": list(valid_updates)}},
+                {"_id": 0, "order_id": 1, "user_id": 1, "shipping_details.shipping_status": 1},
+                session=session
+            )
+            current = {order["order_id"]: order async for order in cursor}
+            
+            batch_results = dict(results)
+            operations, events = [], []
+            for order_id, shipping_status in valid_updates.items():
+                order = current.get(order_id)
+                previous_status = order.get("shipping_details", {}).get("shipping_status") if order else None
+                if order is None:
+                    batch_results[order_id] = "not_found"
+                elif previous_status == shipping_status:
+                    batch_results[order_id] = "unchanged"
+                else:
+                    operations.append(UpdateOne(
+                        {"order_id": order_id},
+                        {"$set": {"shipping_details.shipping_status": shipping_status}}
+                    ))
+                    events.append(order_event(
+                        "order.shipping_changed", order_id, order.get("user_id"),
+                        {"from": previous_status, "to": shipping_status}
+                    ))
+                    batch_results[order_id] = "updated"
+            
+            if operations:
+                await collection.bulk_write(operations, ordered=False, session=session)
+                await self.event_service.append(events, session)
+            return batch_results, {event["user_id"] for event in events}
+        
+        results, user_ids = await run_in_transaction(self.db._client, update, name="bulk_update_shipping_status")
+        order_cache.invalidate([order_id for order_id, result in results.items() if result == "updated"], user_ids)
+        return self._bulk_summary({order_id: results[order_id] for order_id in updates})
+
+    async def _stock_changed(self, computer_sets: List[dict]) -> None:
+        """
+        Drop cached inventory totals and re-read flash-sale tokens for the
+        SKUs of computer sets whose stock was just restored or taken
+        """
+        skus = aggregate_skus(computer_sets)
+        invalidate_inventory_summary(*{collection_name for collection_name, _, _ in skus})
+        await self.flash_sale_service.refresh(skus)
+
+    @staticmethod
+    def _bulk_summary(results: Dict[int, str]) -> dict:
+        """Compact per-order result summary for bulk updates"""
+        counts = {}
+        for result in results.values():
+            counts[result] = counts.get(result, 0) + 1
+        return {
+            "requested": len(results),
+            "counts": counts,
+            "results": [{"order_id": order_id, "result": result} for order_id, result in results.items()]
+        }
@@ -0,0 +1,84 @@
+from fastapi import HTTPException
+from concurrent.futures import ThreadPoolExecutor
+from typing import Tuple
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+from src.config import settings
+from src.utils.metrics import metrics
+
+SCRYPT_PREFIX = "scrypt"
+
+def _b64encode(data: bytes) -> str:
+    return base64.b64encode(data).decode()
+
+def _scrypt(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, maxmem=256 * n * r + 1024 * 1024, dklen=32)
+
+class PasswordService:
+    """
+    scrypt password hashing off the event loop.
+
+    Hashes run on a small dedicated thread pool, and at most
+    PASSWORD_HASH_CONCURRENCY of them are queued or running at once, so a
+    burst of logins cannot starve other routes of CPU. Requests that wait
+    longer than PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS for a slot get a 503.
+
+    Stored hashes look like `scrypt$n$r$p$salt$hash`. Legacy unsalted
+    SHA-256 hex digests still verify, and are reported as needing an upgrade.
+    """
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+        self._slots = asyncio.Semaphore(settings.PASSWORD_HASH_CONCURRENCY)
+
+    @staticmethod
+    def _params() -> Tuple[int, int, int]:
+        return settings.PASSWORD_SCRYPT_N, settings.PASSWORD_SCRYPT_R, settings.PASSWORD_SCRYPT_P
+
+    async def _run(self, password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=settings.PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            metrics.increment("passwords.shed")
+            raise HTTPException(status_code=503, detail="Too many login attempts in progress, please retry", headers={"Retry-After": "1"})
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, _scrypt, password, salt, n, r, p)
+        finally:
+            self._slots.release()
+
+    async def hash(self, password: str) -> str:
+        n, r, p = self._params()
+        salt = os.urandom(16)
+        derived = await self._run(password, salt, n, r, p)
+        metrics.increment("passwords.hashed")
+        return f"{SCRYPT_PREFIX}${n}${r}${p}${_b64encode(salt)}${_b64encode(derived)}"
+
+    async def verify(self, password: str, stored: str) -> Tuple[bool, bool]:
+        """
+        Check a password against a stored hash.
+        Returns (valid, needs_upgrade); needs_upgrade is only True for valid passwords.
+        """
+        if not stored:
+            return False, False
+
+        if not stored.startswith(f"{SCRYPT_PREFIX}$"):
+            # Legacy SHA-256 hex digest
+            valid = hmac.compare_digest(hashlib.sha256(password.encode()).hexdigest(), stored)
+            return valid, valid
+
+        try:
+            _, n, r, p, salt, expected = stored.split("$")
+            n, r, p = int(n), int(r), int(p)
+            salt, expected = base64.b64decode(salt), base64.b64decode(expected)
+        except ValueError:
+            return False, False
+
+        derived = await self._run(password, salt, n, r, p)
+        valid = hmac.compare_digest(derived, expected)
+        return valid, valid and (n, r, p) != self._params()
+
+# Shared by every request handled in this process
+password_service = PasswordService()
@@ -0,0 +1,240 @@
+from fastapi import HTTPException
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Union
+from uuid import uuid4
+import asyncio
+import logging
+from motor.motor_asyncio import AsyncIOMotorClientSession
+from src.config import settings
+from src.database.database import Database
+from src.models.reservation_models import Reservation, ReservationItem
+from src.services.inventory import PART_COLLECTIONS, UNSHARDED, aggregate_skus, available_filter
+from src.services.stock_shard_service import StockShardService
+from src.services.flash_sale_service import FlashSaleService
+from src.utils.transactions import run_in_transaction
+
+logger = logging.getLogger(__name__)
+
+class ReservationService:
+    """
+    Time-limited stock holds for checkout carts.
+
+    A hold increments the `reserved` counter on each SKU document, so the
+    available-to-promise number of an item is always `quantity - reserved`
+    and can be read from the item itself. Confirming a hold moves the units
+    from `reserved` out of `quantity`; releasing a hold (explicitly or when
+    it expires) gives them back.
+
+    For items with sharded stock the held units are taken out of the
+    shards up front, and `reserved` only records how many are held.
+    """
+    def __init__(self, database: Database):
+        self.db = database
+        self.collection = "reservations"
+        self.stock_shard_service = StockShardService(database)
+        self.flash_sale_service = FlashSaleService(database)
+
+    async def hold(self, user_id: int, computer_sets: Union[dict, List[dict]], ttl_seconds: Optional[int] = None) -> Reservation:
+        """
+        Atomically hold stock for every item in the computer sets.
+        Either all items are held or none are.
+        """
+        sku_quantities = aggregate_skus(computer_sets)
+        if not sku_quantities:
+            raise HTTPException(status_code=400, detail="Nothing to reserve")
+
+        now = datetime.now(timezone.utc)
+        ttl = ttl_seconds or settings.RESERVATION_TTL_SECONDS
+        reservation = Reservation(
+            reservation_id=uuid4().hex,
+            user_id=user_id,
+            items=[
+                {"collection": collection_name, "id_field": id_field, "item_id": id_value, "quantity": quantity}
+                for (collection_name, id_field, id_value), quantity in sku_quantities.items()
+            ],
+            status="Held",
+            created_at=now,
+            expires_at=now + timedelta(seconds=ttl)
+        )
+
+        async def hold_items(session: AsyncIOMotorClientSession) -> Reservation:
+            for item in reservation.items:
+                collection = await self.db.get_collection(item.collection)
+                result = await collection.update_one(
+                    {item.id_field: item.item_id, **UNSHARDED, **available_filter(item.quantity)},
+                    {"$inc": {"reserved": item.quantity}},
+                    session=session
+                )
+                if result.modified_count == 0 and not await self._hold_sharded(item, session):
+                    raise HTTPException(
+                        status_code=409,
+                        detail=f"Item with {item.id_field}={item.item_id} cannot be reserved (requested {item.quantity})"
+                    )
+
+            reservations = await self.db.get_collection(self.collection)
+            await reservations.insert_one(reservation.model_dump(), session=session)
+            return reservation
+
+        acquired = self.flash_sale_service.gate.acquire(sku_quantities)
+        committed = False
+        try:
+            held = await run_in_transaction(self.db._client, hold_items, name="hold_reservation")
+            committed = True
+            return held
+        finally:
+            if acquired:
+                await self.flash_sale_service.settle(acquired, committed)
+
+    async def _hold_sharded(self, item: ReservationItem, session: AsyncIOMotorClientSession) -> bool:
+        """Hold units of an item with sharded stock; False if it is not sharded or short"""
+        collection = await self.db.get_collection(item.collection)
+        stock = await collection.find_one({item.id_field: item.item_id}, {"stock_shards": 1}, session=session)
+        if not stock or not stock.get("stock_shards"):
+            return False
+        if not await self.stock_shard_service.take(
+            item.collection, item.id_field, item.item_id, stock["stock_shards"], item.quantity, session
+        ):
+            return False
+        await collection.update_one({item.id_field: item.item_id}, {"$inc": {"reserved": item.quantity}}, session=session)
+        return True
+
+    async def confirm(self, reservation_id: str, user_id: int, order_id: int, session: AsyncIOMotorClientSession) -> Reservation:
+        """
+        Turn an open hold into a stock decrement.
+        Must run inside the caller's order transaction.
+        """
+        reservations = await self.db.get_collection(self.collection)
+        reservation_data = await reservations.find_one_and_update(
+            {
+                "reservation_id": reservation_id,
+                "user_id": user_id,
+                "status": "Held",
+                "expires_at": {"$gt": datetime.now(timezone.utc)}
+            },
+            {"$set": {"status": "Confirmed", "order_id": order_id}},
+            session=session
+        )
+        if not reservation_data:
+            raise HTTPException(status_code=409, detail=f"Reservation {reservation_id} is not held or has expired")
+
+        reservation = Reservation(**reservation_data)
+        for item in reservation.items:
+            collection = await self.db.get_collection(item.collection)
+            result = await collection.update_one(
+                {item.id_field: item.item_id, **UNSHARDED},
+                {"$inc": {"quantity": -item.quantity, "reserved": -item.quantity}},
+                session=session
+            )
+            if result.matched_count == 0:
+                # Sharded stock: the units already left the shards when they were held
+                await collection.update_one(
+                    {item.id_field: item.item_id},
+                    {"$inc": {"reserved": -item.quantity}},
+                    session=session
+                )
+        return reservation
+
+    async def release(self, reservation_id: str, user_id: Optional[int] = None) -> bool:
+        """
+        Give the units of an open hold back to available stock.
+        Returns False if the reservation is no longer held.
+        """
+        query = {"reservation_id": reservation_id, "status": "Held"}
+        if user_id is not None:
+            query["user_id"] = user_id
+
+        async def release_items(session: AsyncIOMotorClientSession) -> bool:
+            reservations = await self.db.get_collection(self.collection)
+            reservation_data = await reservations.find_one_and_update(
+                query,
+                {"$set": {"status": "Released"}},
+                session=session
+            )
+            if not reservation_data:
+                return False
+
+            for item in Reservation(**reservation_data).items:
+                collection = await self.db.get_collection(item.collection)
+                stock = await collection.find_one_and_update(
+                    {item.id_field: item.item_id},
+                    {"$inc": {"reserved": -item.quantity}},
+                    projection={"stock_shards": 1},
+                    session=session
+                )
+                if stock and stock.get("stock_shards"):
+                    await self.stock_shard_service.put(
+                        item.collection, item.id_field, item.item_id, stock["stock_shards"], item.quantity, session
+                    )
+            return True
+
+        released = await run_in_transaction(self.db._client, release_items, name="release_reservation")
+        if released:
+            await self.flash_sale_service.refresh()
+        return released
+
+    async def get_reservation(self, reservation_id: str) -> Reservation:
+        reservations = await self.db.get_collection(self.collection)
+        reservation_data = await reservations.find_one({"reservation_id": reservation_id})
+        if not reservation_data:
+            raise HTTPException(status_code=404, detail=f"Reservation {reservation_id} not found")
+        return Reservation(**reservation_data)
+
+    async def release_expired(self) -> int:
+        """
+        Release every hold whose time has run out. Returns the number released.
+        """
+        reservations = await self.db.get_collection(self.collection)
+        cursor = reservations.find(
+            {"status": "Held", "expires_at": {"$lte": datetime.now(timezone.utc)}},
+            {"_id": 0, "reservation_id": 1}
+        )
+        released = 0
+        async for reservation_data in cursor:
+            if await self.release(reservation_data["reservation_id"]):
+                released += 1
+        return released
+
+    async def get_availability(self, id_field: str, item_id: int) -> Dict:
+        """
+        Available-to-promise for one SKU, read from its quantity and reserved counters.
+        """
+        collection_name = PART_COLLECTIONS.get(id_field)
+        if not collection_name:
+            raise HTTPException(status_code=400, detail=f"Invalid part field: '{id_field}'")
+
+        collection = await self.db.get_collection(collection_name)
+        item = await collection.find_one({id_field: item_id}, {"_id": 0, "quantity": 1, "reserved": 1, "stock_shards": 1})
+        if not item:
+            raise HTTPException(status_code=404, detail=f"Item with {id_field}={item_id} not found")
+
+        reserved = item.get("reserved", 0)
+        if item.get("stock_shards"):
+            available = await self.stock_shard_service.total(collection_name, id_field, item_id)
+            quantity = available + reserved
+        else:
+            quantity = item.get("quantity", 0)
+            available = max(quantity - reserved, 0)
+        return {
+            id_field: item_id,
+            "quantity": quantity,
+            "reserved": reserved,
+            "available": available,
+            "shards": item.get("stock_shards", 0)
+        }
+
+async def run_reservation_sweeper(service: ReservationService, interval_seconds: Optional[int] = None) -> None:
+    """
+    Background loop that releases expired holds.
+    The TTL index only purges old documents; this loop returns their stock.
+    """
+    interval = interval_seconds or settings.RESERVATION_SWEEP_INTERVAL_SECONDS
+    while True:
+        try:
+            released = await service.release_expired()
+            if released:
+                logger.info("Released expired reservations", extra={"count": released})
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Error releasing expired reservations")
+        await asyncio.sleep(interval)
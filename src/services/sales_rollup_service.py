@@ -0,0 +1,145 @@
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Union
+import random
+from motor.motor_asyncio import AsyncIOMotorClientSession
+from pymongo import UpdateOne
+from src.config import settings
+from src.database.database import Database
+from src.models.order_models import Order
+from src.services.inventory import PART_COLLECTIONS, aggregate_skus
+
+# Order statuses that do not count as sales
+EXCLUDED_STATUSES = ["Cancelled"]
+
+def _day(order_date: datetime) -> datetime:
+    """UTC midnight of the day an order was placed"""
+    if order_date.tzinfo is not None:
+        order_date = order_date.astimezone(timezone.utc)
+    return datetime(order_date.year, order_date.month, order_date.day, tzinfo=timezone.utc)
+
+def _increments(order: Dict, sign: int) -> Dict[str, int]:
+    """$inc fields for one order: totals for the day and for each category in it"""
+    computer_sets = [order["order_details"], *(order.get("builds") or [])]
+    units = defaultdict(int)
+    for (collection_name, _, _), quantity in aggregate_skus(computer_sets).items():
+        units[collection_name] += quantity
+    # Orders placed before item prices were recorded only have units per category
+    revenue = defaultdict(int)
+    for item in order.get("item_prices") or []:
+        revenue[PART_COLLECTIONS[item["id_field"]]] += item["quantity"] * item["unit_price"]
+
+    increments = {
+        "order_count": sign,
+        "revenue": sign * order.get("total_price", 0),
+        "units": sign * sum(units.values())
+    }
+    for category, quantity in units.items():
+        increments[f"categories.{category}.order_count"] = sign
+        increments[f"categories.{category}.units"] = sign * quantity
+        increments[f"categories.{category}.revenue"] = sign * revenue[category]
+    return increments
+
+class SalesRollupService:
+    """
+    Daily sales totals in `sales_daily`, kept up to date by OrderService.
+
+    Every order that is not cancelled is counted on its UTC order day: order
+    count, revenue and units, overall and per hardware category. Each day is
+    split across SALES_DAILY_SHARDS documents that writes pick at random, so
+    concurrent checkouts rarely update the same document; reads sum them.
+    """
+    def __init__(self, database: Database):
+        self.db = database
+        self.collection = "sales_daily"
+
+    async def record(self, orders: Iterable[Union[Order, Dict]], sign: int,
+                     session: Optional[AsyncIOMotorClientSession] = None) -> None:
+        """
+        Add (sign 1) or remove (sign -1) orders from the rollup, with one write per day
+        """
+        per_day: Dict[datetime, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        for order in orders:
+            if isinstance(order, Order):
+                order = order.model_dump()
+            for field, value in _increments(order, sign).items():
+                per_day[_day(order["order_date"])][field] += value
+        if not per_day:
+            return
+
+        collection = await self.db.get_collection(self.collection)
+        writes = []
+        for day, increments in per_day.items():
+            shard = random.randrange(settings.SALES_DAILY_SHARDS)
+            writes.append(UpdateOne(
+                {"_id": f"{day:%Y-%m-%d}:{shard}"},
+                {"$inc": dict(increments), "$setOnInsert": {"day": day, "shard": shard}},
+                upsert=True
+            ))
+        await collection.bulk_write(writes, ordered=False, session=session)
+
+    async def read(self, date_from: datetime, date_to: datetime) -> List[Dict]:
+        """Totals per UTC day for the days starting in [date_from, date_to), oldest first"""
+        collection = await self.db.get_collection(self.collection)
+        days: Dict[datetime, Dict] = {}
+        async for shard in collection.find({"day": {"$gte": date_from, "$lt": date_to}}, {"_id": 0, "shard": 0}):
+            day = shard["day"].replace(tzinfo=timezone.utc)
+            totals = days.setdefault(day, {"day": day, "order_count": 0, "revenue": 0, "units": 0, "categories": {}})
+            for field in ("order_count", "revenue", "units"):
+                totals[field] += shard.get(field, 0)
+            for category, values in (shard.get("categories") or {}).items():
+                merged = totals["categories"].setdefault(category, {"order_count": 0, "revenue": 0, "units": 0})
+                for field, value in values.items():
+                    merged[field] += value
+        return [days[day] for day in sorted(days)]
+
+    async def backfill(self) -> int:
+        """
+        Rebuild the rollup from the orders collection. Returns the number of
+        days written. Orders changed while it runs may be miscounted, so run
+        it while order writes are stopped.
+        """
+        orders = await self.db.get_collection("orders")
+        per_day: Dict[datetime, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        cursor = orders.find(
+            {"status": {"$nin": EXCLUDED_STATUSES}},
+            {"_id": 0, "order_date": 1, "total_price": 1, "order_details": 1, "builds": 1, "item_prices": 1}
+        )
+        async for order in cursor:
+            for field, value in _increments(order, 1).items():
+                per_day[_day(order["order_date"])][field] += value
+
+        # Written to a side collection first so readers never see a half-built rollup
+        staging = await self.db.get_collection(f"{self.collection}_backfill")
+        await staging.drop()
+        if per_day:
+            await staging.insert_many([
+                {"_id": f"{day:%Y-%m-%d}:0", "day": day, "shard": 0, **self._nest(increments)}
+                for day, increments in per_day.items()
+            ])
+            await staging.create_index("day")
+            await staging.rename(self.collection, dropTarget=True)
+        else:
+            collection = await self.db.get_collection(self.collection)
+            await collection.delete_many({})
+        return len(per_day)
+
+    @staticmethod
+    def _nest(increments: Dict[str, int]) -> Dict:
+        """Turn dotted $inc paths into a document"""
+        document: Dict = {}
+        for path, value in increments.items():
+            *parents, field = path.split(".")
+            target = document
+            for parent in parents:
+                target = target.setdefault(parent, {})
+            target[field] = value
+        return document
+
+def day_range(date_from: datetime, date_to: datetime) -> tuple:
+    """Widen [date_from, date_to) to whole UTC days"""
+    start = _day(date_from)
+    end = _day(date_to)
+    if end < date_to.astimezone(timezone.utc):
+        end += timedelta(days=1)
+    return start, end
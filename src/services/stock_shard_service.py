@@ -0,0 +1,264 @@
+from fastapi import HTTPException
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+import random
+from motor.motor_asyncio import AsyncIOMotorClientSession
+from src.config import settings
+from src.database.database import Database
+from pymongo import UpdateOne
+from src.services.inventory import PART_COLLECTIONS
+from src.utils.transactions import run_in_transaction
+
+class StockShardService:
+    """
+    Sharded stock counters for hot SKUs.
+
+    A SKU flagged as hot (`stock_shards: N` on its item document) keeps its
+    available stock in N sub-counters in `stock_shards` instead of in
+    `quantity`. Orders decrement a random shard, so concurrent checkouts of
+    the same item rarely write the same document. Reads sum the shards.
+
+    While an item is sharded its available stock is the shard total; units
+    held by reservations stay in the item's `reserved` counter, and the
+    item's own `quantity` is not kept up to date until sharding is turned off.
+    Reads that show stock use `with_shard_quantities` or `sharded_items`,
+    and quantity edits go through `update_item`.
+    """
+    def __init__(self, database: Database):
+        self.db = database
+        self.collection = "stock_shards"
+
+    @staticmethod
+    def _key(collection_name: str, id_field: str, item_id: int) -> Dict:
+        return {"collection": collection_name, "id_field": id_field, "item_id": item_id}
+
+    async def take(self, collection_name: str, id_field: str, item_id: int, shard_count: int,
+                   quantity: int, session: Optional[AsyncIOMotorClientSession] = None) -> bool:
+        """
+        Remove `quantity` units from the shards of an item.
+        Returns False if the shards hold fewer units than requested.
+        """
+        shards = await self.db.get_collection(self.collection)
+        key = self._key(collection_name, id_field, item_id)
+
+        # Common case: one random shard covers the request
+        result = await shards.update_one(
+            {**key, "shard": random.randrange(shard_count), "quantity": {"$gte": quantity}},
+            {"$inc": {"quantity": -quantity}},
+            session=session
+        )
+        if result.modified_count:
+            return True
+
+        # Otherwise drain the fullest shards until the request is covered
+        candidates = await shards.find(
+            {**key, "quantity": {"$gt": 0}}, {"quantity": 1}, session=session
+        ).sort("quantity", -1).to_list(length=None)
+        if sum(shard["quantity"] for shard in candidates) < quantity:
+            return False
+
+        remaining = quantity
+        for shard in candidates:
+            units = min(shard["quantity"], remaining)
+            result = await shards.update_one(
+                {"_id": shard["_id"], "quantity": {"$gte": units}},
+                {"$inc": {"quantity": -units}},
+                session=session
+            )
+            if result.modified_count == 0:
+                return False
+            remaining -= units
+            if remaining == 0:
+                break
+        return True
+
+    async def put(self, collection_name: str, id_field: str, item_id: int, shard_count: int,
+                  quantity: int, session: Optional[AsyncIOMotorClientSession] = None) -> None:
+        """Return `quantity` units to a random shard of an item"""
+        shards = await self.db.get_collection(self.collection)
+        await shards.update_one(
+            {**self._key(collection_name, id_field, item_id), "shard": random.randrange(shard_count)},
+            {"$inc": {"quantity": quantity}},
+            upsert=True,
+            session=session
+        )
+
+    async def total(self, collection_name: str, id_field: str, item_id: int,
+                    session: Optional[AsyncIOMotorClientSession] = None) -> int:
+        """Available units of a sharded item: the sum of its shards"""
+        shards = await self.db.get_collection(self.collection)
+        result = await shards.aggregate([
+            {"$match": self._key(collection_name, id_field, item_id)},
+            {"$group": {"_id": None, "quantity": {"$sum": "$quantity"}}}
+        ], session=session).to_list(length=1)
+        return result[0]["quantity"] if result else 0
+
+    @staticmethod
+    def _split(available: int, shard_count: int) -> List[int]:
+        """Spread units as evenly as possible over the shards"""
+        per_shard, extra = divmod(available, shard_count)
+        return [per_shard + (1 if shard < extra else 0) for shard in range(shard_count)]
+
+    async def update_item(self, collection_name: str, id_field: str, item_id: int, update_data: Dict) -> bool:
+        """
+        Apply an admin edit ($set of `update_data`) to an item. While the item
+        is sharded, a new `quantity` (units on hand, reserved ones included)
+        is written to its shards instead. Returns False if the item does not exist.
+        """
+        collection = await self.db.get_collection(collection_name)
+        if "quantity" not in update_data:
+            result = await collection.update_one({id_field: item_id}, {"$set": update_data})
+            return result.matched_count > 0
+
+        async def write(session: AsyncIOMotorClientSession) -> bool:
+            item = await collection.find_one({id_field: item_id}, {"reserved": 1, "stock_shards": 1}, session=session)
+            if not item:
+                return False
+            fields = dict(update_data)
+            if item.get("stock_shards"):
+                available = fields.pop("quantity") - item.get("reserved", 0)
+                if available < 0:
+                    raise HTTPException(
+                        status_code=409,
+                        detail=f"Quantity is below the {item.get('reserved', 0)} units held by reservations"
+                    )
+                shards = await self.db.get_collection(self.collection)
+                key = self._key(collection_name, id_field, item_id)
+                await shards.bulk_write([
+                    UpdateOne({**key, "shard": shard}, {"$set": {"quantity": units}}, upsert=True)
+                    for shard, units in enumerate(self._split(available, item["stock_shards"]))
+                ], session=session)
+            if fields:
+                await collection.update_one({id_field: item_id}, {"$set": fields}, session=session)
+            return True
+
+        return await run_in_transaction(self.db._client, write, name="update_item")
+
+    async def _on_hand(self, collection_name: str, item_ids: List[int]) -> Dict[int, int]:
+        """Shard totals of the given items of a collection"""
+        shards = await self.db.get_collection(self.collection)
+        totals = await shards.aggregate([
+            {"$match": {"collection": collection_name, "item_id": {"$in": item_ids}}},
+            {"$group": {"_id": "$item_id", "quantity": {"$sum": "$quantity"}}}
+        ]).to_list(length=None)
+        return {total["_id"]: total["quantity"] for total in totals}
+
+    async def with_shard_quantities(self, collection_name: str, id_field: str, items: List[Dict]) -> List[Dict]:
+        """
+        Set `quantity` of sharded items to their units on hand: the shard
+        total plus the units held by reservations. Other items are unchanged.
+        """
+        sharded = [item for item in items if item.get("stock_shards")]
+        if sharded:
+            totals = await self._on_hand(collection_name, [item[id_field] for item in sharded])
+            for item in sharded:
+                item["quantity"] = totals.get(item[id_field], 0) + item.get("reserved", 0)
+        return items
+
+    async def sharded_items(self, collection_names: List[str]) -> Dict[str, List[Dict]]:
+        """Every sharded item of the given collections, with its units on hand as `quantity`"""
+        shards = await self.db.get_collection(self.collection)
+        ids = await shards.aggregate([
+            {"$match": {"collection": {"$in": collection_names}}},
+            {"$group": {"_id": {"collection": "$collection", "id_field": "$id_field"}, "item_ids": {"$addToSet": "$item_id"}}}
+        ]).to_list(length=None)
+
+        items = {collection_name: [] for collection_name in collection_names}
+        for group in ids:
+            collection_name, id_field = group["_id"]["collection"], group["_id"]["id_field"]
+            collection = await self.db.get_collection(collection_name)
+            found = await collection.find(
+                {id_field: {"$in": group["item_ids"]}, "stock_shards": {"$exists": True}}, {"_id": 0}
+            ).to_list(length=None)
+            items[collection_name].extend(await self.with_shard_quantities(collection_name, id_field, found))
+        return items
+
+    @staticmethod
+    def _collection_for(id_field: str) -> str:
+        collection_name = PART_COLLECTIONS.get(id_field)
+        if not collection_name:
+            raise HTTPException(status_code=400, detail=f"Invalid part field: '{id_field}'")
+        return collection_name
+
+    async def enable(self, id_field: str, item_id: int, shard_count: Optional[int] = None) -> Dict:
+        """
+        Split the available stock of an item across `shard_count` shards
+        """
+        shard_count = shard_count or settings.STOCK_SHARDS_DEFAULT
+        if not 1 < shard_count <= settings.STOCK_SHARDS_MAX:
+            raise HTTPException(status_code=400, detail=f"Shard count must be between 2 and {settings.STOCK_SHARDS_MAX}")
+        collection_name = self._collection_for(id_field)
+
+        async def split(session: AsyncIOMotorClientSession) -> Dict:
+            collection = await self.db.get_collection(collection_name)
+            item = await collection.find_one(
+                {id_field: item_id}, {"quantity": 1, "reserved": 1, "stock_shards": 1}, session=session
+            )
+            if not item:
+                raise HTTPException(status_code=404, detail=f"Item with {id_field}={item_id} not found")
+            if item.get("stock_shards"):
+                raise HTTPException(status_code=409, detail=f"Item with {id_field}={item_id} is already sharded")
+
+            available = max(item.get("quantity", 0) - item.get("reserved", 0), 0)
+            now = datetime.now(timezone.utc)
+            shards = await self.db.get_collection(self.collection)
+            await shards.insert_many([
+                {
+                    **self._key(collection_name, id_field, item_id),
+                    "shard": shard,
+                    "quantity": units,
+                    "created_at": now
+                }
+                for shard, units in enumerate(self._split(available, shard_count))
+            ], session=session)
+            await collection.update_one({id_field: item_id}, {"$set": {"stock_shards": shard_count}}, session=session)
+            return {id_field: item_id, "shards": shard_count, "available": available}
+
+        return await run_in_transaction(self.db._client, split, name="enable_stock_shards")
+
+    async def disable(self, id_field: str, item_id: int) -> Dict:
+        """
+        Merge the shards of an item back into its `quantity`
+        """
+        collection_name = self._collection_for(id_field)
+
+        async def merge(session: AsyncIOMotorClientSession) -> Dict:
+            collection = await self.db.get_collection(collection_name)
+            item = await collection.find_one({id_field: item_id}, {"reserved": 1, "stock_shards": 1}, session=session)
+            if not item:
+                raise HTTPException(status_code=404, detail=f"Item with {id_field}={item_id} not found")
+            if not item.get("stock_shards"):
+                raise HTTPException(status_code=409, detail=f"Item with {id_field}={item_id} is not sharded")
+
+            available = await self.total(collection_name, id_field, item_id, session)
+            shards = await self.db.get_collection(self.collection)
+            await shards.delete_many(self._key(collection_name, id_field, item_id), session=session)
+            await collection.update_one(
+                {id_field: item_id},
+                {"$set": {"quantity": available + item.get("reserved", 0)}, "$unset": {"stock_shards": ""}},
+                session=session
+            )
+            return {id_field: item_id, "shards": 0, "available": available}
+
+        # Stock reads already count the shards, so merging them changes no totals
+        return await run_in_transaction(self.db._client, merge, name="disable_stock_shards")
+
+    async def list_sharded(self) -> List[Dict]:
+        """Every sharded item with its merged available stock"""
+        shards = await self.db.get_collection(self.collection)
+        return await shards.aggregate([
+            {"$group": {
+                "_id": {"collection": "$collection", "id_field": "$id_field", "item_id": "$item_id"},
+                "shards": {"$sum": 1},
+                "available": {"$sum": "$quantity"}
+            }},
+            {"$project": {
+                "_id": 0,
+                "collection": "$_id.collection",
+                "id_field": "$_id.id_field",
+                "item_id": "$_id.item_id",
+                "shards": 1,
+                "available": 1
+            }},
+            {"$sort": {"collection": 1, "item_id": 1}}
+        ]).to_list(length=None)
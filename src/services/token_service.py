@@ -0,0 +1,107 @@
+from fastapi import HTTPException, status
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+from uuid import uuid4
+import hashlib
+import logging
+import secrets
+from src.config import settings
+from src.database.database import Database
+from src.utils.auth import TokenData
+from src.utils.metrics import metrics
+from src.utils.revocation import revocation_list
+
+logger = logging.getLogger(__name__)
+
+def _hash(refresh_token: str) -> str:
+    return hashlib.sha256(refresh_token.encode()).hexdigest()
+
+class TokenService:
+    """
+    Refresh token rotation and access token revocation.
+
+    Refresh tokens are opaque random strings, stored only as a hash in
+    `refresh_tokens` (TTL indexed on `expires_at`). Each one can be used
+    once; using it issues a new one in the same family. Presenting a token
+    that was already used means it leaked, so its whole family is revoked.
+
+    Revoked access tokens go into `revoked_tokens`, which every process
+    mirrors in its in-memory revocation list.
+    """
+    def __init__(self, database: Database):
+        self.db = database
+
+    async def issue_refresh_token(self, user_id: int, family_id: Optional[str] = None) -> str:
+        refresh_token = secrets.token_urlsafe(32)
+        now = datetime.now(timezone.utc)
+        collection = await self.db.get_collection("refresh_tokens")
+        await collection.insert_one({
+            "token_hash": _hash(refresh_token),
+            "user_id": user_id,
+            "family_id": family_id or uuid4().hex,
+            "used_at": None,
+            "created_at": now,
+            "expires_at": now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+        })
+        return refresh_token
+
+    async def rotate(self, refresh_token: str) -> Tuple[int, str]:
+        """
+        Spend a refresh token and issue its replacement.
+        Returns (user_id, new refresh token); raises 401 if the token is not usable.
+        """
+        collection = await self.db.get_collection("refresh_tokens")
+        now = datetime.now(timezone.utc)
+        token_hash = _hash(refresh_token)
+        current = await collection.find_one_and_update(
+            {"token_hash": token_hash, "used_at": None, "expires_at": {"$gt": now}},
+            {"$set": {"used_at": now}}
+        )
+        if current is None:
+            used = await collection.find_one({"token_hash": token_hash, "used_at": {"$ne": None}})
+            if used is not None:
+                await collection.delete_many({"family_id": used["family_id"]})
+                metrics.increment("auth.refresh_reuse")
+                logger.warning("Refresh token reused, family revoked", extra={"user_id": used["user_id"]})
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
+
+        replacement = await self.issue_refresh_token(current["user_id"], current["family_id"])
+        return current["user_id"], replacement
+
+    async def revoke_refresh_token(self, refresh_token: str) -> None:
+        """Revoke a refresh token and the tokens rotated from it"""
+        collection = await self.db.get_collection("refresh_tokens")
+        current = await collection.find_one({"token_hash": _hash(refresh_token)}, {"family_id": 1})
+        if current is not None:
+            await collection.delete_many({"family_id": current["family_id"]})
+
+    async def revoke_access_token(self, token_data: TokenData) -> None:
+        """Revoke one access token until it expires"""
+        if token_data.jti is None:
+            # Issued before token IDs existed; only revoke_user can cover it
+            await self.revoke_user(token_data.user_id)
+            return
+        expires_at = token_data.exp.timestamp()
+        revocation_list.add_token(token_data.jti, expires_at)
+        collection = await self.db.get_collection("revoked_tokens")
+        await collection.update_one(
+            {"jti": token_data.jti},
+            {"$set": {"expires_at": datetime.fromtimestamp(expires_at, timezone.utc)}},
+            upsert=True
+        )
+
+    async def revoke_user(self, user_id: int) -> None:
+        """Revoke every access and refresh token issued to a user so far"""
+        now = datetime.now(timezone.utc)
+        # Tokens issued before now are all expired once the longest access token lifetime has passed
+        expires_at = now + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        revocation_list.add_user(user_id, now.timestamp(), expires_at.timestamp())
+
+        revoked_tokens = await self.db.get_collection("revoked_tokens")
+        await revoked_tokens.update_one(
+            {"user_id": user_id},
+            {"$max": {"revoked_before": now, "expires_at": expires_at}},
+            upsert=True
+        )
+        refresh_tokens = await self.db.get_collection("refresh_tokens")
+        await refresh_tokens.delete_many({"user_id": user_id})
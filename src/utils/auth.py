@@ -1,21 +1,47 @@
-from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import APIKeyHeader, OAuth2PasswordBearer
 from jose import JWTError, jwt
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Dict, Optional, Any
 from pydantic import BaseModel
 from src.config import settings
 from src.database.database import Database
+from src.utils.cache import TTLCache
+from src.utils.metrics import metrics
+from src.utils.revocation import revocation_list
+from src.utils.signing_keys import signing_keys, uses_signing_keys
+from uuid import uuid4
+import hashlib
+import logging
 
 # OAuth2 scheme for token authentication - Use relative path without API prefix
 # This will be combined with the API prefix automatically
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
+# Same scheme for routes that also accept API keys, where the token is optional
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token", auto_error=False)
+api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
+
+# Scopes an API key can carry: GET access (read) or any other method (write) per route group
+API_KEY_SCOPES = {"orders:read", "orders:write", "admin:read", "admin:write"}
+
+logger = logging.getLogger(__name__)
 
 # Model for JWT token data
 class TokenData(BaseModel):
     user_id: Optional[int] = None
     role: Optional[str] = None
     exp: Optional[datetime] = None
+    jti: Optional[str] = None
+    iat: Optional[float] = None
+
+# Verified token claims by SHA-256 of the token, and user records by user_id
+_token_cache = TTLCache(maxsize=settings.AUTH_TOKEN_CACHE_SIZE, ttl=settings.AUTH_CACHE_TTL_SECONDS)
+_user_cache = TTLCache(maxsize=settings.AUTH_USER_CACHE_SIZE, ttl=settings.AUTH_CACHE_TTL_SECONDS)
+metrics.register_gauge("auth.token_cache", _token_cache.stats)
+metrics.register_gauge("auth.user_cache", _user_cache.stats)
+# Verified API key clients by SHA-256 of the key
+_api_key_cache = TTLCache(maxsize=settings.API_KEY_CACHE_SIZE, ttl=settings.API_KEY_CACHE_TTL_SECONDS)
+metrics.register_gauge("auth.api_key_cache", _api_key_cache.stats)
 
 async def get_user_by_id(db: Database, user_id: int) -> Dict:
     """
@@ -25,82 +51,110 @@ async def get_user_by_id(db: Database, user_id: int) -> Dict:
         # Get the users collection
         users_collection = await db.get_collection("users")
         # Find user by user_id
-        user = await users_collection.find_one({"user_id": user_id})
-        print(f"User lookup result for ID {user_id}: {user is not None}")
-        if not user:
-            return None
-        return user
-    except Exception as e:
-        print(f"Error in get_user_by_id: {str(e)}")
+        return await users_collection.find_one({"user_id": user_id})
+    except Exception:
+        logger.exception("Error in get_user_by_id", extra={"user_id": user_id})
         return None
 
-async def get_current_user(token: str = Depends(oauth2_scheme)) -> Dict:
+def invalidate_user(user_id: int) -> None:
     """
-    Validate the JWT token and return the current user's information
-    
-    This function is used as a dependency in routes that require authentication.
-    It verifies the JWT token, extracts the user ID, and fetches the user data.
+    Drop the cached record of a user. Call after any change to the user.
     """
-    credentials_exception = HTTPException(
+    _user_cache.pop(user_id)
+
+def _credentials_exception(detail: str = "Could not validate credentials") -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
+        detail=detail,
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
+def _decode_token(token: str) -> TokenData:
+    """
+    Verify a JWT and extract its claims
+    """
     try:
+        key = settings.JWT_SECRET_KEY
+        if uses_signing_keys():
+            # Pick the key the token was signed with
+            key = signing_keys.verification_key(jwt.get_unverified_header(token).get("kid"))
+            if key is None:
+                raise _credentials_exception()
+        
         # Decode JWT token
-        print(f"Received token: {token[:10]}...")
         payload = jwt.decode(
             token, 
-            settings.JWT_SECRET_KEY, 
+            key, 
             algorithms=[settings.JWT_ALGORITHM]
         )
-        print(f"Token payload: {payload}")
-        
-        # Extract user ID from payload - convert to int if it's a string
-        user_id_str = payload.get("sub")
-        if user_id_str is None:
-            print("No 'sub' field in token payload")
-            raise credentials_exception
-        
-        # Convert user_id to integer if it's a string
-        try:
-            user_id = int(user_id_str)
-        except (ValueError, TypeError):
-            print(f"Invalid user_id format: {user_id_str}")
-            raise credentials_exception
-        
-        # Create token data
-        token_data = TokenData(
-            user_id=user_id,
-            role=payload.get("role", "user"),
-            exp=datetime.fromtimestamp(payload.get("exp", 0))
-        )
-        
-        # Check if token has expired
-        if token_data.exp < datetime.now():
-            print(f"Token has expired: {token_data.exp} < {datetime.now()}")
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Token has expired",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-        
-    except JWTError as e:
-        print(f"JWT error: {str(e)}")
-        raise credentials_exception
-    except Exception as e:
-        print(f"Error decoding token: {str(e)}")
-        raise credentials_exception
-    
-    # Get the database instance
-    db = Database.get_instance()
-    
-    # Get user from database
-    user = await get_user_by_id(db, token_data.user_id)
+    except JWTError:
+        raise _credentials_exception()
+    
+    # Extract user ID from payload - convert to int if it's a string
+    try:
+        user_id = int(payload["sub"])
+    except (KeyError, ValueError, TypeError):
+        raise _credentials_exception()
+    
+    return TokenData(
+        user_id=user_id,
+        role=payload.get("role", "user"),
+        exp=datetime.fromtimestamp(payload.get("exp", 0)),
+        jti=payload.get("jti"),
+        iat=payload.get("iat")
+    )
+
+def verify_token(token: str) -> TokenData:
+    """
+    Validate a JWT and return its claims
+    
+    Verified tokens are cached by hash until they expire. Revocation is
+    checked against the in-process revocation list, without a database read.
+    """
+    token_key = hashlib.sha256(token.encode()).hexdigest()
+    token_data = _token_cache.get(token_key)
+    if token_data is None:
+        token_data = _decode_token(token)
+        # Never cache a token past its expiry
+        remaining = (token_data.exp - datetime.now()).total_seconds()
+        if remaining > 0:
+            _token_cache.set(token_key, token_data, ttl=min(settings.AUTH_CACHE_TTL_SECONDS, remaining))
+    
+    # Check if token has expired
+    if token_data.exp < datetime.now():
+        _token_cache.pop(token_key)
+        raise _credentials_exception("Token has expired")
+    
+    if revocation_list.is_revoked(token_data.jti, token_data.user_id, token_data.iat):
+        raise _credentials_exception("Token has been revoked")
+    
+    return token_data
+
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> Dict:
+    """
+    Validate the JWT token and return the current user's information
+    
+    This function is used as a dependency in routes that require authentication.
+    User records are cached by user ID, so a repeat request normally needs no
+    decoding or database access.
+    With AUTH_TRUST_TOKEN_CLAIMS the user is built from the token claims alone.
+    """
+    token_data = verify_token(token)
+    
+    if settings.AUTH_TRUST_TOKEN_CLAIMS:
+        return {"user_id": token_data.user_id, "role": token_data.role}
+    
+    user = _user_cache.get(token_data.user_id)
     if user is None:
-        print(f"User with ID {token_data.user_id} not found in database")
-        raise credentials_exception
+        # Get user from database
+        user = await get_user_by_id(Database.get_instance(), token_data.user_id)
+        if user is None:
+            raise _credentials_exception()
+        user.pop("password", None)
+        _user_cache.set(token_data.user_id, user)
+    
+    # Callers get their own copy of the cached record
+    user = dict(user)
     
     # Add role to user data if not present
     if "role" not in user:
@@ -108,6 +162,73 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> Dict:
     
     return user
 
+def hash_api_key(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode()).hexdigest()
+
+def invalidate_api_key(key_hash: str) -> None:
+    """
+    Drop a cached API key. Call after revoking it.
+    """
+    _api_key_cache.pop(key_hash)
+
+async def get_api_client(api_key: Optional[str] = Depends(api_key_header)) -> Dict:
+    """
+    Validate an X-API-Key header and return the client it belongs to
+    
+    Verified keys are cached by hash, so a repeat request needs no database
+    access. The client has the key's user_id and role, like a user record.
+    """
+    if not api_key:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="API key required")
+    
+    key_hash = hash_api_key(api_key)
+    client = _api_key_cache.get(key_hash)
+    if client is None:
+        api_keys = await Database.get_collection("api_keys")
+        record = await api_keys.find_one_and_update(
+            {"key_hash": key_hash, "revoked": False},
+            {"$set": {"last_used_at": datetime.now(timezone.utc)}},
+            projection={"key_id": 1, "user_id": 1, "role": 1, "scopes": 1}
+        )
+        if record is None:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid API key")
+        client = {
+            "user_id": record["user_id"],
+            "role": record["role"],
+            "api_key_id": record["key_id"],
+            "scopes": record["scopes"]
+        }
+        _api_key_cache.set(key_hash, client)
+    
+    return dict(client)
+
+async def get_current_client(
+    api_key: Optional[str] = Depends(api_key_header),
+    token: Optional[str] = Depends(optional_oauth2_scheme)
+) -> Dict:
+    """
+    Like get_current_user, but also accepts an X-API-Key header instead of a JWT
+    """
+    if api_key:
+        return await get_api_client(api_key)
+    if not token:
+        raise _credentials_exception("Not authenticated")
+    return await get_current_user(token)
+
+def require_scope(area: str):
+    """
+    Router dependency: API key clients need `<area>:read` for GET requests and
+    `<area>:write` for other methods. Requests with a JWT are not affected.
+    """
+    async def check_scope(request: Request, api_key: Optional[str] = Depends(api_key_header)) -> None:
+        if not api_key:
+            return
+        client = await get_api_client(api_key)
+        scope = f"{area}:{'read' if request.method in ('GET', 'HEAD') else 'write'}"
+        if scope not in client["scopes"]:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=f"API key lacks scope '{scope}'")
+    return check_scope
+
 async def create_access_token(data: Dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     Create a new JWT access token
@@ -131,10 +252,15 @@ async def create_access_token(data: Dict, expires_delta: Optional[timedelta] = N
     if "sub" in to_encode and not isinstance(to_encode["sub"], str):
         to_encode["sub"] = str(to_encode["sub"])
     
-    to_encode.update({"exp": expire.timestamp()})
-    print(f"Creating token with payload: {to_encode}")
+    # Token ID and issue time, so the token can be revoked on its own or with all of the user's tokens
+    to_encode.update({"exp": expire.timestamp(), "iat": datetime.now().timestamp(), "jti": uuid4().hex})
+    logger.debug("Creating access token", extra={"user_id": to_encode.get("sub")})
     
     # Create JWT token
+    if uses_signing_keys():
+        kid, key = signing_keys.signing_key()
+        return jwt.encode(to_encode, key, algorithm=settings.JWT_ALGORITHM, headers={"kid": kid})
+    
     encoded_jwt = jwt.encode(
         to_encode, 
         settings.JWT_SECRET_KEY, 
@@ -0,0 +1,70 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+class TTLCache:
+    """
+    Bounded in-process cache with per-entry expiry and LRU eviction.
+
+    Meant for single event loop use; no locking is done.
+    """
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+
+        value, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """Read an entry without counting a hit or miss or refreshing its LRU position"""
+        entry = self._data.get(key)
+        if entry is None or entry[1] < time.monotonic():
+            return default
+        return entry[0]
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.pop(key, None)
+        return default if entry is None else entry[0]
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._data.get(key)
+        return entry is not None and entry[1] >= time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+        }
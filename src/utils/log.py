@@ -0,0 +1,123 @@
+import atexit
+import copy
+import json
+import logging
+import queue
+import random
+import sys
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+from src.config import settings
+from src.utils.metrics import metrics
+
+# ID of the request being handled, set by the request ID middleware in main.py
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has; anything else came in through `extra=`
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id", "sample_rate"}
+
+_listener: Optional[QueueListener] = None
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line, with `extra=` fields as top-level keys"""
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        entry.update({key: value for key, value in vars(record).items() if key not in _RECORD_ATTRS})
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+class RequestContextFilter(logging.Filter):
+    """Stamp records with the ID of the request they were logged from"""
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep a fraction of DEBUG records. A call can pick its own rate with
+    `extra={"sample_rate": 0.01}`, which also applies above DEBUG.
+    """
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = getattr(record, "sample_rate", None)
+        if rate is None:
+            if record.levelno > logging.DEBUG:
+                return True
+            rate = self.rate
+        return rate >= 1 or random.random() < rate
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Hands records to the listener thread without waiting. When the queue is
+    full the record is dropped and counted, rather than stalling the caller.
+    """
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Render the message and traceback here; args and exc_info may not be safe to pass on
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            metrics.increment("logging.dropped")
+
+def parse_levels(spec: str) -> Dict[str, str]:
+    """Parse per-module levels, e.g. "src.utils.auth=DEBUG,pymongo=WARNING" """
+    levels = {}
+    for item in spec.split(","):
+        if "=" in item:
+            name, level = item.split("=", 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+def setup_logging() -> None:
+    """
+    Route all logging through a bounded queue drained by a background
+    thread that writes JSON lines to stdout. Safe to call more than once.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    handler = NonBlockingQueueHandler(log_queue)
+    handler.addFilter(RequestContextFilter())
+    handler.addFilter(SamplingFilter(settings.LOG_DEBUG_SAMPLE_RATE))
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JSONFormatter())
+    _listener = QueueListener(log_queue, output)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(settings.LOG_LEVEL.upper())
+    for name, level in parse_levels(settings.LOG_LEVELS).items():
+        logging.getLogger(name).setLevel(level)
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
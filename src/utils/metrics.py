@@ -0,0 +1,37 @@
+from collections import defaultdict
+from typing import Callable, Dict, Any
+
+class Metrics:
+    """
+    Process-local counters and gauges, exposed at GET /metrics.
+
+    Counter names are dotted paths, e.g. `transactions.create_order.retries`.
+    Gauges are callables evaluated when a snapshot is taken.
+    """
+    def __init__(self):
+        self._counters: Dict[str, int] = defaultdict(int)
+        self._gauges: Dict[str, Callable[[], Any]] = {}
+
+    def increment(self, name: str, value: int = 1) -> None:
+        self._counters[name] += value
+
+    def get(self, name: str) -> int:
+        return self._counters.get(name, 0)
+
+    def register_gauge(self, name: str, func: Callable[[], Any]) -> None:
+        self._gauges[name] = func
+
+    def snapshot(self) -> Dict[str, Any]:
+        data = {"counters": dict(sorted(self._counters.items())), "gauges": {}}
+        for name, func in sorted(self._gauges.items()):
+            try:
+                data["gauges"][name] = func()
+            except Exception as e:
+                data["gauges"][name] = f"error: {e}"
+        return data
+
+    def reset(self) -> None:
+        self._counters.clear()
+
+# Global metrics registry
+metrics = Metrics()
@@ -0,0 +1,51 @@
+import base64
+import json
+from datetime import datetime
+from fastapi import HTTPException
+from typing import Any, Dict, List, Optional, Tuple
+
+def encode_cursor(values: Dict[str, Any]) -> str:
+    """
+    Encode the sort key of the last item on a page into an opaque token
+    """
+    def default(value):
+        if isinstance(value, datetime):
+            return {"$date": value.isoformat()}
+        raise TypeError(f"Cannot encode {type(value).__name__} in a cursor")
+
+    raw = json.dumps(values, default=default, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(token: str) -> Dict[str, Any]:
+    def object_hook(obj):
+        if set(obj) == {"$date"}:
+            return datetime.fromisoformat(obj["$date"])
+        return obj
+
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode()), object_hook=object_hook)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+def keyset_filter(sort: List[Tuple[str, int]], cursor: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Query matching documents that come after `cursor` in `sort` order.
+
+    For sort [(a, -1), (b, -1)] this is
+    {"$or": [{a: {"$lt": ca}}, {a: ca, b: {"$lt": cb}}]}
+    """
+    clauses = []
+    for i, (field, direction) in enumerate(sort):
+        if field not in cursor:
+            raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+        clause = {prev_field: cursor[prev_field] for prev_field, _ in sort[:i]}
+        clause[field] = {"$lt" if direction < 0 else "$gt": cursor[field]}
+        clauses.append(clause)
+    return {"$or": clauses}
+
+def page_cursor(document: Optional[Dict[str, Any]], sort: List[Tuple[str, int]]) -> Optional[str]:
+    """Cursor for the page that follows `document`, or None at the end"""
+    if document is None:
+        return None
+    return encode_cursor({field: document.get(field) for field, _ in sort})
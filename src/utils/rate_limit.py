@@ -0,0 +1,151 @@
+from fastapi import HTTPException, Request, status
+from datetime import datetime, timedelta, timezone
+from typing import Dict, NamedTuple, Optional, Tuple
+import math
+import time
+from pymongo.errors import DuplicateKeyError
+from src.config import settings
+from src.database.database import Database
+from src.utils.cache import TTLCache
+from src.utils.metrics import metrics
+
+class Rule(NamedTuple):
+    limit: int
+    window: float
+
+def parse_limits(spec: str) -> Dict[Tuple[str, str], Rule]:
+    """
+    Parse per-route limits, e.g. "login.ip=20/60,login.username=10/300":
+    at most 20 requests per IP and 10 per username in any 60 and 300 seconds.
+    """
+    rules = {}
+    for item in spec.split(","):
+        if "=" not in item:
+            continue
+        name, value = item.split("=", 1)
+        route, scope = name.strip().split(".", 1)
+        limit, window = value.strip().split("/", 1)
+        rules[(route, scope)] = Rule(int(limit), float(window))
+    return rules
+
+def _retry_after(now: float, window_start: float, rule: Rule, current: int, previous: int) -> float:
+    """
+    Sliding window estimate: the previous window's count, weighted by how much
+    of it still overlaps the last `rule.window` seconds, plus the current
+    count. Returns 0 if one more request fits, otherwise the seconds until it does.
+    """
+    elapsed = (now - window_start) / rule.window
+    if previous * (1 - elapsed) + current + 1 <= rule.limit:
+        return 0.0
+    if current + 1 <= rule.limit:
+        # Wait for enough of the previous window to slide out
+        return window_start + rule.window * (1 - (rule.limit - current - 1) / previous) - now
+    # Wait for the next window, then for enough of this one to slide out
+    next_start = window_start + rule.window
+    return next_start + rule.window * max(0.0, 1 - (rule.limit - 1) / current) - now
+
+class MemoryBackend:
+    """
+    Sliding window counters held in this process. The default backend, and
+    the local stand-in for a shared one: each process enforces its own limits.
+    """
+    def __init__(self, max_keys: int = 100000):
+        # key -> (window index, count in that window, count in the window before)
+        self._windows = TTLCache(maxsize=max_keys, ttl=60)
+
+    async def hit(self, key: str, rule: Rule) -> float:
+        now = time.time()
+        index = int(now // rule.window)
+        entry = self._windows.peek(key)
+        if entry is None or entry[0] < index - 1:
+            current, previous = 0, 0
+        elif entry[0] == index - 1:
+            current, previous = 0, entry[1]
+        else:
+            _, current, previous = entry
+
+        retry_after = _retry_after(now, index * rule.window, rule, current, previous)
+        if retry_after == 0:
+            self._windows.set(key, (index, current + 1, previous), ttl=2 * rule.window)
+        return retry_after
+
+class MongoBackend:
+    """
+    Sliding window counters in the `rate_limits` collection, shared by every
+    process. Costs two or three database round trips per limited key and
+    request. As in MemoryBackend, only requests that fit are counted.
+    """
+    def __init__(self, collection: str = "rate_limits"):
+        self.collection = collection
+
+    async def hit(self, key: str, rule: Rule) -> float:
+        now = time.time()
+        index = int(now // rule.window)
+        window_start = index * rule.window
+        collection = await Database.get_collection(self.collection)
+        before = await collection.find_one({"_id": f"{key}:{index - 1}"}, {"count": 1})
+        previous = before["count"] if before else 0
+        # Requests the current window can hold before this one is turned away
+        room = math.floor(rule.limit - previous * (1 - (now - window_start) / rule.window))
+
+        while True:
+            if room > 0:
+                try:
+                    # Count the request only while the window has room; a full
+                    # window fails the match and the upsert hits the duplicate _id
+                    await collection.update_one(
+                        {"_id": f"{key}:{index}", "count": {"$lt": room}},
+                        {
+                            "$inc": {"count": 1},
+                            "$setOnInsert": {"expires_at": datetime.now(timezone.utc) + timedelta(seconds=2 * rule.window)}
+                        },
+                        upsert=True
+                    )
+                    return 0.0
+                except DuplicateKeyError:
+                    pass
+            window = await collection.find_one({"_id": f"{key}:{index}"}, {"count": 1})
+            retry_after = _retry_after(now, window_start, rule, window["count"] if window else 0, previous)
+            if retry_after > 0:
+                return retry_after
+            # Another process created the window at the same moment; it has room, so try again
+
+class RateLimiter:
+    """
+    Per-route request limits keyed by client IP, username or user ID.
+    Routes call `check` with the keys they can identify the caller by.
+    """
+    def __init__(self, backend=None, limits: Optional[Dict[Tuple[str, str], Rule]] = None):
+        self.backend = backend or MemoryBackend(settings.RATE_LIMIT_MAX_KEYS)
+        self.limits = parse_limits(settings.RATE_LIMITS) if limits is None else limits
+
+    async def check(self, route: str, **keys) -> None:
+        """
+        Count one request against every configured limit of the route.
+        Raises 429 with a Retry-After header once any of them is exceeded.
+        """
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+        for scope, value in keys.items():
+            rule = self.limits.get((route, scope))
+            if rule is None or value is None:
+                continue
+            retry_after = await self.backend.hit(f"{route}:{scope}:{value}", rule)
+            if retry_after > 0:
+                metrics.increment(f"rate_limit.{route}.{scope}.rejected")
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Too many requests, please retry later",
+                    headers={"Retry-After": str(max(math.ceil(retry_after), 1))}
+                )
+
+def client_ip(request: Request) -> Optional[str]:
+    """Address of the client, from X-Forwarded-For when behind a trusted proxy"""
+    if settings.RATE_LIMIT_TRUST_PROXY:
+        forwarded = request.headers.get("X-Forwarded-For")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else None
+
+# Shared by every request handled in this process
+rate_limiter = RateLimiter(MongoBackend() if settings.RATE_LIMIT_BACKEND == "mongo" else None)
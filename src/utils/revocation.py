@@ -0,0 +1,91 @@
+from datetime import datetime, timezone
+from typing import Dict, Optional
+import asyncio
+import logging
+import time
+from src.config import settings
+from src.database.database import Database
+from src.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+class RevocationList:
+    """
+    In-process copy of the `revoked_tokens` collection.
+
+    Holds revoked access token IDs (jti) and, per user, a cut-off time
+    before which all of the user's tokens are revoked. Entries are only
+    kept until the tokens they cover would have expired anyway, so the set
+    stays small and an exact set is used rather than a Bloom filter.
+
+    Revocations made in this process apply at once; those made by other
+    processes apply after the next sync, at most
+    REVOCATION_SYNC_INTERVAL_SECONDS later.
+    """
+    def __init__(self):
+        # jti -> expiry timestamp
+        self._tokens: Dict[str, float] = {}
+        # user_id -> (revoked_before timestamp, expiry timestamp)
+        self._users: Dict[int, tuple] = {}
+        self.synced_at: Optional[float] = None
+
+    def is_revoked(self, jti: Optional[str], user_id: Optional[int], issued_at: Optional[float]) -> bool:
+        if jti is not None and jti in self._tokens:
+            return True
+        cutoff = self._users.get(user_id)
+        return cutoff is not None and (issued_at or 0) < cutoff[0]
+
+    def add_token(self, jti: str, expires_at: float) -> None:
+        self._tokens[jti] = expires_at
+
+    def add_user(self, user_id: int, revoked_before: float, expires_at: float) -> None:
+        current = self._users.get(user_id)
+        if current is None or current[0] < revoked_before:
+            self._users[user_id] = (revoked_before, expires_at)
+
+    async def sync(self, database: Database) -> None:
+        """Reload every entry that has not expired"""
+        collection = await database.get_collection("revoked_tokens")
+        tokens, users = {}, {}
+        async for entry in collection.find({"expires_at": {"$gt": datetime.now(timezone.utc)}}, {"_id": 0}):
+            expires_at = entry["expires_at"].replace(tzinfo=timezone.utc).timestamp()
+            if "jti" in entry:
+                tokens[entry["jti"]] = expires_at
+            elif "user_id" in entry:
+                revoked_before = entry["revoked_before"].replace(tzinfo=timezone.utc).timestamp()
+                users[entry["user_id"]] = (revoked_before, expires_at)
+
+        # Keep local revocations the database read may have raced with
+        now = time.time()
+        tokens.update({jti: exp for jti, exp in self._tokens.items() if exp > now and jti not in tokens})
+        for user_id, (revoked_before, expires_at) in self._users.items():
+            if expires_at > now and (user_id not in users or users[user_id][0] < revoked_before):
+                users[user_id] = (revoked_before, expires_at)
+
+        self._tokens, self._users = tokens, users
+        self.synced_at = now
+
+    def stats(self) -> Dict:
+        return {
+            "tokens": len(self._tokens),
+            "users": len(self._users),
+            "synced_at": self.synced_at
+        }
+
+# Shared by every request handled in this process
+revocation_list = RevocationList()
+metrics.register_gauge("auth.revocations", revocation_list.stats)
+
+async def run_revocation_sync(database: Database, interval_seconds: Optional[float] = None) -> None:
+    """
+    Background loop that keeps the revocation list in line with the database
+    """
+    interval = interval_seconds or settings.REVOCATION_SYNC_INTERVAL_SECONDS
+    while True:
+        try:
+            await revocation_list.sync(database)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Error syncing token revocations")
+        await asyncio.sleep(interval)
@@ -0,0 +1,82 @@
+from typing import Dict, Optional, Tuple
+import logging
+import os
+import time
+from jose import jwk
+from jose.backends.base import Key
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+class SigningKeys:
+    """
+    Key ring for asymmetric JWT signing (JWT_ALGORITHM RS256 or ES256).
+
+    Keys are PEM files in JWT_KEYS_DIR named after their key ID: `<kid>.pem`
+    for a private key, `<kid>.pub.pem` for the public half of a retired key.
+    Tokens are signed with JWT_ACTIVE_KID (by default the last private key
+    in name order) and verified with whichever key their `kid` header names.
+    Every key is published in the JWKS, so gateways can verify tokens
+    without calling this service.
+
+    To rotate, add the new private key and make it active; keep the old one
+    (or just its public half) until the tokens it signed have expired. The
+    directory is re-read when it changes, at most every JWT_KEYS_RELOAD_SECONDS.
+    """
+    def __init__(self):
+        self._private: Dict[str, Key] = {}
+        self._public: Dict[str, Key] = {}
+        self._jwks: Dict = {"keys": []}
+        self._active: Optional[str] = None
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+
+    def _reload(self) -> None:
+        now = time.monotonic()
+        if self._mtime is not None and now - self._checked_at < settings.JWT_KEYS_RELOAD_SECONDS:
+            return
+        self._checked_at = now
+        mtime = os.stat(settings.JWT_KEYS_DIR).st_mtime
+        if mtime == self._mtime:
+            return
+
+        private, public = {}, {}
+        for filename in sorted(os.listdir(settings.JWT_KEYS_DIR)):
+            if not filename.endswith(".pem"):
+                continue
+            with open(os.path.join(settings.JWT_KEYS_DIR, filename), "rb") as f:
+                pem = f.read()
+            if filename.endswith(".pub.pem"):
+                public[filename[:-len(".pub.pem")]] = jwk.construct(pem, settings.JWT_ALGORITHM)
+            else:
+                kid = filename[:-len(".pem")]
+                private[kid] = jwk.construct(pem, settings.JWT_ALGORITHM)
+                public[kid] = private[kid].public_key()
+
+        active = settings.JWT_ACTIVE_KID or (max(private) if private else None)
+        if active not in private:
+            raise RuntimeError(f"No private signing key '{active}' in {settings.JWT_KEYS_DIR}")
+
+        self._private, self._public, self._active, self._mtime = private, public, active, mtime
+        # Built once per reload and served as is
+        self._jwks = {"keys": [{**key.to_dict(), "kid": kid, "use": "sig"} for kid, key in public.items()]}
+        logger.info("Loaded JWT signing keys", extra={"active_kid": active, "kids": list(public)})
+
+    def signing_key(self) -> Tuple[str, Key]:
+        self._reload()
+        return self._active, self._private[self._active]
+
+    def verification_key(self, kid: Optional[str]) -> Optional[Key]:
+        self._reload()
+        return self._public.get(kid)
+
+    def jwks(self) -> Dict:
+        self._reload()
+        return self._jwks
+
+def uses_signing_keys() -> bool:
+    """True when tokens are signed with an asymmetric key rather than JWT_SECRET_KEY"""
+    return not settings.JWT_ALGORITHM.startswith("HS")
+
+# Shared by every request handled in this process
+signing_keys = SigningKeys()
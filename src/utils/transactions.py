@@ -0,0 +1,96 @@
+from fastapi import HTTPException
+from typing import Any, Awaitable, Callable, Optional, Tuple, Type
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorClientSession
+from pymongo.errors import PyMongoError
+import asyncio
+import random
+from src.config import settings
+from src.utils.metrics import metrics
+
+TRANSIENT_TRANSACTION_ERROR = "TransientTransactionError"
+UNKNOWN_COMMIT_RESULT = "UnknownTransactionCommitResult"
+
+def is_transient(error: Exception) -> bool:
+    return isinstance(error, PyMongoError) and error.has_error_label(TRANSIENT_TRANSACTION_ERROR)
+
+def backoff_delay(attempt: int) -> float:
+    """
+    Exponential backoff with full jitter, capped at TRANSACTION_BACKOFF_MAX_MS
+    """
+    cap = min(
+        settings.TRANSACTION_BACKOFF_MAX_MS,
+        settings.TRANSACTION_BACKOFF_BASE_MS * (2 ** attempt)
+    )
+    return random.uniform(0, cap) / 1000
+
+async def _abort_quietly(session: AsyncIOMotorClientSession) -> None:
+    try:
+        await session.abort_transaction()
+    except Exception:
+        # Already committed/aborted, or the abort itself failed; nothing to undo
+        pass
+
+async def _commit_with_retry(session: AsyncIOMotorClientSession, name: str) -> None:
+    """
+    Commit, retrying while the outcome of the commit is unknown.
+    Commit is idempotent on the server, so retrying it is safe.
+    """
+    attempts = settings.TRANSACTION_MAX_COMMIT_ATTEMPTS
+    for attempt in range(attempts):
+        try:
+            await session.commit_transaction()
+            return
+        except PyMongoError as e:
+            if e.has_error_label(UNKNOWN_COMMIT_RESULT) and attempt + 1 < attempts:
+                metrics.increment(f"transactions.{name}.commit_retries")
+                await asyncio.sleep(backoff_delay(attempt))
+                continue
+            raise
+
+async def run_in_transaction(
+    client: AsyncIOMotorClient,
+    callback: Callable[[AsyncIOMotorClientSession], Awaitable[Any]],
+    name: str = "transaction",
+    max_attempts: Optional[int] = None,
+    passthrough: Tuple[Type[Exception], ...] = ()
+) -> Any:
+    """
+    Run `callback(session)` inside a transaction and commit it.
+
+    The whole transaction is retried with bounded exponential backoff when
+    MongoDB labels the failure TransientTransactionError (write conflicts,
+    primary step-downs). The callback must therefore be safe to re-run.
+    HTTPExceptions, and exceptions of the `passthrough` types, abort the
+    transaction and are passed through unchanged; anything else becomes a
+    500, or a 503 once retries are exhausted.
+    """
+    max_attempts = max_attempts or settings.TRANSACTION_MAX_ATTEMPTS
+    metrics.increment(f"transactions.{name}.started")
+
+    async with await client.start_session() as session:
+        for attempt in range(max_attempts):
+            session.start_transaction()
+            try:
+                result = await callback(session)
+                await _commit_with_retry(session, name)
+                metrics.increment(f"transactions.{name}.committed")
+                return result
+            except Exception as e:
+                await _abort_quietly(session)
+
+                if is_transient(e) and attempt + 1 < max_attempts:
+                    metrics.increment(f"transactions.{name}.retries")
+                    await asyncio.sleep(backoff_delay(attempt))
+                    continue
+
+                metrics.increment(f"transactions.{name}.failed")
+                if isinstance(e, (HTTPException, *passthrough)):
+                    raise
+                if is_transient(e):
+                    metrics.increment(f"transactions.{name}.exhausted")
+                    raise HTTPException(
+                        status_code=503,
+                        detail=f"Transaction failed after {max_attempts} attempts: {str(e)}",
+                        headers={"Retry-After": "1"}
+                    )
+                raise HTTPException(status_code=500, detail=f"Transaction failed: {str(e)}")
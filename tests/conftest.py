@@ -0,0 +1,105 @@
+import pytest
+from pymongo.errors import DuplicateKeyError
+from src.utils.metrics import metrics
+
+class FakeSession:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def start_transaction(self):
+        pass
+
+    async def commit_transaction(self):
+        pass
+
+    async def abort_transaction(self):
+        pass
+
+class FakeClient:
+    async def start_session(self):
+        return FakeSession()
+
+class FakeOrders:
+    """
+    The orders collection, with a unique order_id. The next `stale_reads`
+    lookups of the latest order miss the newest one, as if another process
+    inserted it after the lookup.
+    """
+    def __init__(self):
+        self.docs = {}
+        self.stale_reads = 0
+
+    async def find_one(self, *args, sort=None, projection=None, session=None):
+        if self.stale_reads:
+            self.stale_reads -= 1
+            return None
+        return {"order_id": max(self.docs)} if self.docs else None
+
+    async def insert_one(self, doc, session=None):
+        if doc["order_id"] in self.docs:
+            raise DuplicateKeyError(f"E11000 duplicate key error dup key: {{ order_id: {doc['order_id']} }}")
+        self.docs[doc["order_id"]] = doc
+        return doc
+
+    async def find_one_and_update(self, query, update, return_document=None, session=None):
+        doc = self.docs.get(query["order_id"])
+        if doc is None:
+            return None
+        before = dict(doc)
+        doc.update(update["$set"])
+        return before
+
+class FakeDatabase:
+    def __init__(self):
+        self._client = FakeClient()
+        self.collections = {"orders": FakeOrders()}
+
+    async def get_collection(self, name):
+        return self.collections.get(name)
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+@pytest.fixture
+def fake_db():
+    return FakeDatabase()
+
+@pytest.fixture
+def order_data():
+    return {
+        "user_id": 10001,
+        "order_details": {
+            "cpu_id": 10001, "ram_id": 20001, "mainboard_id": 30001,
+            "gpu_id": 50001, "case_id": 60001, "psu_id": 70001, "quantity": 1
+        },
+        "builds": [],
+        "shipping_details": {
+            "user_id": 10001, "name": "Test", "phone": "0800000000", "email": "test@example.com",
+            "shipping_address": "1 Test Road", "shipping_status": "Pending", "note": None
+        },
+        "total_price": 6000
+    }
+
+def stub_order_writes(order_service, unit_price: int = 1000) -> None:
+    """Price every part at `unit_price` and skip the stock, event and rollup writes"""
+    async def price_skus(sku_quantities):
+        items = [
+            {"id_field": id_field, "item_id": id_value, "quantity": quantity, "unit_price": unit_price}
+            for (_, id_field, id_value), quantity in sku_quantities.items()
+        ]
+        return sum(item["quantity"] * unit_price for item in items), items
+
+    async def noop(*args, **kwargs):
+        pass
+
+    order_service.catalog_service.price_skus = price_skus
+    order_service.check_and_update_inventory = noop
+    order_service.restore_inventory = noop
+    order_service.event_service.append = noop
+    order_service.sales_rollup_service.record = noop
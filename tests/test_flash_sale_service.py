@@ -0,0 +1,70 @@
+import asyncio
+import pytest
+from src.services.flash_sale_service import FlashSaleGate, FlashSaleService
+
+GPU = ("GPUs", "gpu_id", 50001)
+CASE = ("Cases", "case_id", 60001)
+
+class FakeParts:
+    def __init__(self, items=()):
+        self.items = list(items)
+
+    def find(self, query, projection=None):
+        async def cursor():
+            for item in self.items:
+                if all(item.get(field) == value for field, value in query.items()):
+                    yield item
+        return cursor()
+
+    async def find_one(self, query, projection=None):
+        return next((item for item in self.items if all(item.get(field) == value for field, value in query.items())), None)
+
+class FakePartsDatabase:
+    def __init__(self, collections):
+        self.collections = collections
+
+    async def get_collection(self, name):
+        return self.collections.setdefault(name, FakeParts())
+
+@pytest.fixture
+def gpus():
+    return FakeParts([{"gpu_id": 50001, "quantity": 0, "reserved": 0, "flash_sale": True}])
+
+@pytest.fixture
+def service(gpus):
+    service = FlashSaleService(FakePartsDatabase({"GPUs": gpus}))
+    service.gate = FlashSaleGate()
+    return service
+
+def test_restock_refills_a_sold_out_gate(service, gpus):
+    asyncio.run(service.load())
+    assert service.gate.tokens(GPU) == 0
+
+    gpus.items[0]["quantity"] = 5
+    asyncio.run(service.refresh([GPU]))
+
+    assert service.gate.tokens(GPU) == 5
+
+def test_load_drops_items_no_longer_in_a_flash_sale(service, gpus):
+    service.gate.load(CASE, 3)
+    asyncio.run(service.load())
+
+    assert GPU in service.gate
+    assert CASE not in service.gate
+
+def test_checkout_committed_during_a_refresh_is_not_readmitted(service, gpus):
+    gpus.items[0]["quantity"] = 5
+    asyncio.run(service.load())
+    acquired = service.gate.acquire({GPU: 1})
+    stale_find_one = gpus.find_one
+
+    async def find_one(query, projection=None):
+        # Read the stock, then let the checkout commit before the read returns
+        item = dict(await stale_find_one(query, projection))
+        service.gate.settle(acquired, committed=True)
+        return item
+
+    gpus.find_one = find_one
+    asyncio.run(service.refresh([GPU]))
+
+    assert service.gate.tokens(GPU) == 4
@@ -0,0 +1,114 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+import pytest
+from pymongo.errors import DuplicateKeyError
+from src.services import idempotency_service
+from src.services.idempotency_service import IdempotencyService
+
+def matches(doc, query):
+    for field, condition in query.items():
+        value = doc.get(field)
+        if isinstance(condition, dict) and "$not" in condition:
+            if matches(doc, {field: condition["$not"]}):
+                return False
+        elif isinstance(condition, dict) and "$gte" in condition:
+            if value is None or value < condition["$gte"]:
+                return False
+        elif value != condition:
+            return False
+    return True
+
+class FakeKeys:
+    """idempotency_keys with its unique (user_id, key) index"""
+    def __init__(self):
+        self.docs = []
+
+    async def insert_one(self, doc):
+        if any(d["key"] == doc["key"] and d["user_id"] == doc["user_id"] for d in self.docs):
+            raise DuplicateKeyError("E11000 duplicate key error")
+        self.docs.append(dict(doc))
+
+    async def find_one(self, query):
+        return next((dict(d) for d in self.docs if matches(d, query)), None)
+
+    async def find_one_and_update(self, query, update):
+        for doc in self.docs:
+            if matches(doc, query):
+                before = dict(doc)
+                doc.update(update["$set"])
+                return before
+        return None
+
+    async def update_one(self, query, update):
+        for doc in self.docs:
+            if matches(doc, query):
+                doc.update(update["$set"])
+                for field in update.get("$unset", {}):
+                    doc.pop(field, None)
+
+    async def delete_one(self, query):
+        self.docs = [d for d in self.docs if not matches(d, query)]
+
+class FakeKeysDatabase:
+    def __init__(self):
+        self.keys = FakeKeys()
+
+    async def get_collection(self, name):
+        return self.keys
+
+@pytest.fixture
+def database():
+    idempotency_service._result_cache.clear()
+    return FakeKeysDatabase()
+
+def test_expired_claim_of_a_dead_request_is_taken_over(database):
+    # A request claimed the key and died before completing it
+    database.keys.docs.append({
+        "key": "k", "user_id": 1, "fingerprint": "f", "status": "InProgress", "owner": "dead",
+        "lease_expires_at": datetime.now(timezone.utc) - timedelta(seconds=1)
+    })
+    calls = []
+
+    async def operation():
+        calls.append(1)
+        return {"order_id": 10000}
+
+    result = asyncio.run(IdempotencyService(database).run("k", 1, "f", operation))
+
+    assert result == {"order_id": 10000}
+    assert calls == [1]
+    assert database.keys.docs[0]["status"] == "Completed"
+
+def test_live_claim_is_waited_for(database, monkeypatch):
+    monkeypatch.setattr(idempotency_service.settings, "IDEMPOTENCY_WAIT_SECONDS", 0)
+    database.keys.docs.append({
+        "key": "k", "user_id": 1, "fingerprint": "f", "status": "InProgress", "owner": "alive",
+        "lease_expires_at": datetime.now(timezone.utc) + timedelta(seconds=60)
+    })
+
+    async def operation():
+        raise AssertionError("the key is held by a live request")
+
+    with pytest.raises(idempotency_service.HTTPException) as excinfo:
+        asyncio.run(IdempotencyService(database).run("k", 1, "f", operation))
+
+    assert excinfo.value.status_code == 409
+
+def test_record_deleted_after_duplicate_insert_is_claimed_again(database):
+    keys = database.keys
+    insert_one = keys.insert_one
+
+    async def insert_racing_a_delete(doc):
+        # The first insert collides with a record that is deleted right after
+        if not hasattr(keys, "raced"):
+            keys.raced = True
+            raise DuplicateKeyError("E11000 duplicate key error")
+        await insert_one(doc)
+
+    keys.insert_one = insert_racing_a_delete
+
+    async def operation():
+        return {"order_id": 10001}
+
+    assert asyncio.run(IdempotencyService(database).run("k", 1, "f", operation)) == {"order_id": 10001}
+    assert keys.docs[0]["status"] == "Completed"
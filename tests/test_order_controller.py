@@ -0,0 +1,53 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from src.controllers.order_controller import OrderController
+from tests.conftest import stub_order_writes
+
+ORDER_DATA = {
+    "user_id": 1,
+    "order_details": {"cpu_id": 10001, "quantity": 1},
+    "builds": [],
+    "shipping_details": {},
+    "total_price": 1000
+}
+
+@pytest.fixture
+def controller():
+    return OrderController(database=None)
+
+def test_retryable_status_reaches_the_client(controller, monkeypatch):
+    async def create_order(order_data):
+        raise HTTPException(status_code=503, detail="Transaction failed", headers={"Retry-After": "1"})
+
+    monkeypatch.setattr(controller.order_service, "create_order", create_order)
+
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(controller.create_order(dict(ORDER_DATA)))
+
+    assert excinfo.value.status_code == 503
+    assert excinfo.value.headers == {"Retry-After": "1"}
+
+def test_unexpected_errors_are_still_400(controller, monkeypatch):
+    async def create_order(order_data):
+        raise ValueError("bad order")
+
+    monkeypatch.setattr(controller.order_service, "create_order", create_order)
+
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(controller.create_order(dict(ORDER_DATA)))
+
+    assert excinfo.value.status_code == 400
+    assert excinfo.value.detail == "bad order"
+
+def test_catalog_price_mismatch_is_409(fake_db, order_data):
+    controller = OrderController(fake_db)
+    stub_order_writes(controller.order_service, unit_price=1000)
+    order_data["total_price"] = 5000
+
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(controller.create_order(order_data))
+
+    assert excinfo.value.status_code == 409
+    assert "expected 6000" in excinfo.value.detail
+    assert fake_db.collections["orders"].docs == {}
@@ -0,0 +1,88 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from src.services.order_event_service import OrderEventService, order_event
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, field, direction):
+        self.docs = sorted(self.docs, key=lambda doc: doc[field], reverse=direction < 0)
+        return self
+
+    def limit(self, limit):
+        self.docs = self.docs[:limit]
+        return self
+
+    async def to_list(self, length=None):
+        return [dict(doc) for doc in self.docs]
+
+class FakeEvents:
+    def __init__(self):
+        self.docs = []
+
+    async def insert_one(self, doc, session=None):
+        self.docs.append(dict(doc))
+
+    async def insert_many(self, docs, ordered=True, session=None):
+        self.docs.extend(dict(doc) for doc in docs)
+
+    def find(self, query):
+        after = query.get("seq", {}).get("$gt", 0)
+        return FakeCursor([doc for doc in self.docs if doc["seq"] > after])
+
+class FakeSequence:
+    def __init__(self):
+        self.docs = {}
+
+    async def find_one_and_update(self, query, update, upsert=False, return_document=None, session=None):
+        doc = self.docs.setdefault(query["_id"], {"_id": query["_id"], "seq": 0})
+        doc["seq"] += update["$inc"]["seq"]
+        return dict(doc)
+
+class FakeDatabase:
+    def __init__(self):
+        self.collections = {"order_events": FakeEvents(), "order_event_sequence": FakeSequence()}
+
+    async def get_collection(self, name):
+        return self.collections[name]
+
+@pytest.fixture
+def event_service():
+    return OrderEventService(FakeDatabase())
+
+def test_events_are_numbered_in_append_order(event_service):
+    async def run():
+        await event_service.append([order_event("order.created", 1, 10)], session=None)
+        await event_service.append([
+            order_event("order.status_changed", 1, 10),
+            order_event("order.status_changed", 2, 10)
+        ], session=None)
+        return await event_service.read()
+
+    batch = asyncio.run(run())
+
+    assert [event["seq"] for event in batch["events"]] == [1, 2, 3]
+    assert batch["resume_token"] == "3"
+
+def test_read_resumes_after_the_token(event_service):
+    async def run():
+        for order_id in range(1, 6):
+            await event_service.append([order_event("order.created", order_id, 10)], session=None)
+        first = await event_service.read(limit=2)
+        second = await event_service.read(first["resume_token"], limit=10)
+        empty = await event_service.read(second["resume_token"])
+        return first, second, empty
+
+    first, second, empty = asyncio.run(run())
+
+    assert [event["order_id"] for event in first["events"]] == [1, 2]
+    assert [event["order_id"] for event in second["events"]] == [3, 4, 5]
+    assert empty == {"events": [], "resume_token": "5"}
+
+def test_invalid_resume_token_is_400(event_service):
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(event_service.read("65f0c0ffee"))
+
+    assert excinfo.value.status_code == 400
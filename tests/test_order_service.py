@@ -0,0 +1,62 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from src.config import settings
+from src.services.order_service import OrderService
+from src.utils.metrics import metrics
+from tests.conftest import stub_order_writes
+
+@pytest.fixture
+def order_service(fake_db):
+    service = OrderService(fake_db)
+    stub_order_writes(service)
+    return service
+
+def test_order_id_collision_takes_the_next_id(order_service, fake_db, order_data):
+    orders = fake_db.collections["orders"]
+    orders.docs[10000] = {"order_id": 10000}
+    orders.stale_reads = 1
+
+    order = asyncio.run(order_service.create_order(order_data))
+
+    assert order.order_id == 10001
+    assert set(orders.docs) == {10000, 10001}
+    assert metrics.get("orders.order_id_conflicts") == 1
+
+def test_order_id_collisions_give_up_with_503(order_service, fake_db, order_data):
+    orders = fake_db.collections["orders"]
+    orders.docs[10000] = {"order_id": 10000}
+    orders.stale_reads = settings.ORDER_ID_MAX_ATTEMPTS
+
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(order_service.create_order(order_data))
+
+    assert excinfo.value.status_code == 503
+    assert excinfo.value.headers == {"Retry-After": "1"}
+    assert set(orders.docs) == {10000}
+
+@pytest.fixture
+def stock_changes(order_service, monkeypatch):
+    changes = []
+
+    async def stock_changed(computer_sets):
+        changes.append(computer_sets)
+
+    monkeypatch.setattr(order_service, "_stock_changed", stock_changed)
+    return changes
+
+def test_status_change_without_stock_movement_skips_stock_refresh(order_service, order_data, stock_changes):
+    order = asyncio.run(order_service.create_order(order_data))
+
+    asyncio.run(order_service.update_order_status(order.order_id, "Confirmed"))
+
+    assert stock_changes == []
+
+def test_cancellation_refreshes_the_order_skus(order_service, order_data, stock_changes):
+    order = asyncio.run(order_service.create_order(order_data))
+
+    asyncio.run(order_service.update_order_status(order.order_id, "Cancelled"))
+    asyncio.run(order_service.update_order_status(order.order_id, "Cancelled"))
+
+    assert len(stock_changes) == 1
+    assert stock_changes[0][0]["gpu_id"] == 50001
@@ -0,0 +1,65 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+from pymongo.errors import DuplicateKeyError
+from src.utils import rate_limit
+from src.utils.rate_limit import MemoryBackend, MongoBackend, Rule
+
+RULE = Rule(limit=3, window=10)
+
+class FakeRateLimits:
+    """The rate_limits collection, enough of it for MongoBackend"""
+    def __init__(self):
+        self.docs = {}
+
+    @staticmethod
+    def _matches(doc, query):
+        if doc is None:
+            return False
+        count = query.get("count")
+        return count is None or doc["count"] < count["$lt"]
+
+    async def find_one(self, query, projection=None):
+        return self.docs.get(query["_id"])
+
+    async def update_one(self, query, update, upsert=False):
+        doc = self.docs.get(query["_id"])
+        if self._matches(doc, query):
+            doc["count"] += update["$inc"]["count"]
+        elif doc is not None:
+            raise DuplicateKeyError(f"E11000 duplicate key error dup key: {{ _id: {query['_id']} }}")
+        else:
+            self.docs[query["_id"]] = {"_id": query["_id"], "count": update["$inc"]["count"]}
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(rate_limit, "time", SimpleNamespace(time=lambda: now[0]))
+    return now
+
+@pytest.fixture
+def mongo_backend(monkeypatch):
+    collection = FakeRateLimits()
+
+    async def get_collection(name):
+        return collection
+
+    monkeypatch.setattr(rate_limit, "Database", SimpleNamespace(get_collection=get_collection))
+    return MongoBackend()
+
+@pytest.mark.parametrize("backend_name", ["memory", "mongo"])
+def test_backends_count_only_accepted_hits(backend_name, clock, mongo_backend):
+    backend = mongo_backend if backend_name == "mongo" else MemoryBackend()
+    # (time, hits): a burst over the limit, then hits as the burst slides out
+    schedule = [(100.0, 5), (110.0, 1), (115.0, 2)]
+
+    async def run():
+        accepted = []
+        for now, hits in schedule:
+            clock[0] = now
+            for _ in range(hits):
+                accepted.append(await backend.hit("login:ip:127.0.0.1", RULE) == 0)
+        return accepted
+
+    # Had the two rejected hits at 100s been counted, nothing would fit at 115s
+    assert asyncio.run(run()) == [True, True, True, False, False, False, True, False]
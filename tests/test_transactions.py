@@ -0,0 +1,182 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+from fastapi import HTTPException
+from pymongo.errors import PyMongoError
+from src.config import settings
+from src.utils import transactions
+from src.utils.metrics import metrics
+from src.utils.transactions import TRANSIENT_TRANSACTION_ERROR, UNKNOWN_COMMIT_RESULT, run_in_transaction
+
+def transient_error() -> PyMongoError:
+    return PyMongoError("WriteConflict", error_labels=[TRANSIENT_TRANSACTION_ERROR])
+
+def unknown_commit_error() -> PyMongoError:
+    return PyMongoError("commit timed out", error_labels=[UNKNOWN_COMMIT_RESULT])
+
+class FakeSession:
+    """Stands in for a Motor session; `commit_errors` are raised by the next commits"""
+    def __init__(self, commit_errors=()):
+        self.commit_errors = list(commit_errors)
+        self.started = 0
+        self.commits = 0
+        self.aborts = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def start_transaction(self):
+        self.started += 1
+
+    async def commit_transaction(self):
+        self.commits += 1
+        if self.commit_errors:
+            raise self.commit_errors.pop(0)
+
+    async def abort_transaction(self):
+        self.aborts += 1
+
+class FakeClient:
+    def __init__(self, session_factory=FakeSession):
+        self.session_factory = session_factory
+
+    async def start_session(self):
+        return self.session_factory()
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record backoff delays instead of sleeping; jitter always picks its upper bound"""
+    delays = []
+
+    async def fake_sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(transactions, "asyncio", SimpleNamespace(sleep=fake_sleep))
+    monkeypatch.setattr(transactions.random, "uniform", lambda low, high: high)
+    return delays
+
+def test_transient_errors_are_retried_until_commit(sleeps):
+    calls = []
+
+    async def callback(session):
+        calls.append(session)
+        if len(calls) <= 2:
+            raise transient_error()
+        return "created"
+
+    result = asyncio.run(run_in_transaction(FakeClient(), callback, name="test"))
+
+    assert result == "created"
+    assert len(calls) == 3
+    assert calls[0].aborts == 2
+    assert len(sleeps) == 2
+    assert metrics.get("transactions.test.retries") == 2
+    assert metrics.get("transactions.test.committed") == 1
+
+def test_backoff_is_exponential_and_capped(sleeps, monkeypatch):
+    monkeypatch.setattr(settings, "TRANSACTION_BACKOFF_BASE_MS", 100)
+    monkeypatch.setattr(settings, "TRANSACTION_BACKOFF_MAX_MS", 250)
+
+    async def callback(session):
+        raise transient_error()
+
+    with pytest.raises(HTTPException):
+        asyncio.run(run_in_transaction(FakeClient(), callback, name="test", max_attempts=5))
+
+    assert sleeps == [0.1, 0.2, 0.25, 0.25]
+
+def test_exhausted_retries_become_503_with_retry_after(sleeps):
+    attempts = []
+
+    async def callback(session):
+        attempts.append(session)
+        raise transient_error()
+
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(run_in_transaction(FakeClient(), callback, name="test", max_attempts=4))
+
+    assert excinfo.value.status_code == 503
+    assert excinfo.value.headers == {"Retry-After": "1"}
+    assert len(attempts) == 4
+    assert len(sleeps) == 3
+    assert metrics.get("transactions.test.retries") == 3
+    assert metrics.get("transactions.test.exhausted") == 1
+
+def test_unknown_commit_result_retries_only_the_commit(sleeps):
+    session = FakeSession(commit_errors=[unknown_commit_error(), unknown_commit_error()])
+    calls = []
+
+    async def callback(session):
+        calls.append(session)
+        return "created"
+
+    result = asyncio.run(run_in_transaction(FakeClient(lambda: session), callback, name="test"))
+
+    assert result == "created"
+    assert len(calls) == 1
+    assert session.commits == 3
+    assert metrics.get("transactions.test.commit_retries") == 2
+    assert metrics.get("transactions.test.retries") == 0
+
+def test_http_errors_are_not_retried(sleeps):
+    calls = []
+
+    async def callback(session):
+        calls.append(session)
+        raise HTTPException(status_code=409, detail="Sold out")
+
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(run_in_transaction(FakeClient(), callback, name="test"))
+
+    assert excinfo.value.status_code == 409
+    assert len(calls) == 1
+    assert sleeps == []
+
+def test_retries_raise_goodput_under_contention(monkeypatch):
+    """
+    Concurrent orders for one SKU: every transaction reads the stock version,
+    yields, and conflicts at commit if another one committed in between.
+    """
+    monkeypatch.setattr(settings, "TRANSACTION_BACKOFF_BASE_MS", 1)
+    monkeypatch.setattr(settings, "TRANSACTION_BACKOFF_MAX_MS", 5)
+    orders = 20
+
+    def run_orders(max_attempts: int) -> int:
+        stock = {"version": 0, "quantity": orders}
+
+        class ConflictingSession(FakeSession):
+            async def commit_transaction(self):
+                if stock["version"] != self.read_version:
+                    raise transient_error()
+                stock["version"] += 1
+                stock["quantity"] -= 1
+
+        async def callback(session):
+            session.read_version = stock["version"]
+            await asyncio.sleep(0)
+
+        async def place(client):
+            try:
+                await run_in_transaction(client, callback, name="contention", max_attempts=max_attempts)
+                return True
+            except HTTPException as e:
+                assert e.status_code == 503
+                return False
+
+        async def run():
+            client = FakeClient(ConflictingSession)
+            return sum(await asyncio.gather(*(place(client) for _ in range(orders))))
+
+        committed = asyncio.run(run())
+        assert stock["quantity"] == orders - committed
+        return committed
+
+    without_retries = run_orders(max_attempts=1)
+    with_retries = run_orders(max_attempts=orders)
+
+    assert without_retries == 1
+    assert with_retries == orders
+    assert metrics.get("transactions.contention.retries") > 0